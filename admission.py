@@ -0,0 +1,179 @@
+import time
+import heapq
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from fastapi import HTTPException
+
+import config
+from metrics import metrics
+
+# Tenant and lane of the request currently being served; read by run_crew_with_retry so every
+# LLM call is queued under the right tenant without threading arguments through the agent code.
+current_tenant = contextvars.ContextVar("current_tenant", default="anonymous")
+current_lane = contextvars.ContextVar("current_lane", default="interactive")
+
+LANES = {"interactive": 0, "batch": 1}
+
+
+def reject(retry_after: float, reason: str):
+    metrics.incr(f"admission.rejected.{reason}")
+    raise HTTPException(
+        status_code=429, detail=f"Server busy ({reason}). Please retry shortly.",
+        headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+    )
+
+
+class _Ticket:
+    __slots__ = ("tenant", "lane", "granted", "queued_at")
+
+    def __init__(self, tenant, lane):
+        self.tenant, self.lane, self.granted = tenant, lane, False
+        self.queued_at = time.monotonic()
+
+
+class FairScheduler:
+    """Admission control and weighted fair queuing of LLM calls across tenants.
+
+    - At most max_concurrent LLM calls run at once, and at most tenant_concurrency per tenant.
+    - Waiting calls are ordered by lane (interactive before batch), then by start-time fair
+      queuing tag (a WFQ variant), so a tenant chaining four agents gets its fair share
+      instead of the whole quota.
+    - A batch call that has waited batch_aging_seconds moves up to the interactive lane (keeping its
+      fair queuing tag), so sustained interactive load delays batch work but cannot starve it.
+    - Requests whose expected queue wait exceeds max_wait_seconds get an immediate 429."""
+
+    def __init__(self, max_concurrent=4, tenant_concurrency=2, tenant_max_requests=4, max_wait_seconds=30.0, tenant_weights=None,
+                 batch_aging_seconds=None):
+        self.max_concurrent, self.tenant_concurrency = max_concurrent, tenant_concurrency
+        self.tenant_max_requests = tenant_max_requests
+        self.max_wait_seconds = max_wait_seconds
+        # Well inside the slot wait deadline (2 x max_wait_seconds), so an aged call still gets served
+        self.batch_aging_seconds = batch_aging_seconds if batch_aging_seconds is not None else max_wait_seconds / 2
+        self.tenant_weights = tenant_weights or {}
+        self.avg_service_seconds = 5.0
+        self.active = 0
+        self.active_by_tenant = {}
+        self.requests_by_tenant = {}
+        self.queue = []                # heap of (lane rank, virtual start tag, seq, ticket)
+        self.virtual_time = 0.0
+        self.last_finish = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition(threading.RLock())
+
+    def expected_wait(self, lane="interactive"):
+        """Rough seconds a new call in this lane would wait: calls ahead of it / parallelism x service time."""
+        with self._cond:
+            return self._expected_wait(LANES.get(lane, 0))
+
+    def _expected_wait(self, lane_rank):
+        ahead = sum(1 for rank, *_ in self.queue if rank <= lane_rank)
+        if self.active < self.max_concurrent and not ahead: return 0.0
+        return (ahead // self.max_concurrent + 1) * self.avg_service_seconds
+
+    def admit(self, tenant, lane="interactive"):
+        """Fail fast with 429 when the queue's expected wait is over budget or the tenant is saturated."""
+        with self._cond:
+            wait = self._expected_wait(LANES.get(lane, 0))
+            if wait > self.max_wait_seconds: reject(wait, "queue")
+            if self.requests_by_tenant.get(tenant, 0) >= self.tenant_max_requests:
+                reject(self.avg_service_seconds, "tenant")
+
+    @contextmanager
+    def request(self, tenant, lane="interactive"):
+        """Admit one API request and bind its tenant/lane to every LLM call made while serving it."""
+        with self._cond:
+            self.admit(tenant, lane)
+            self.requests_by_tenant[tenant] = self.requests_by_tenant.get(tenant, 0) + 1
+        tenant_token, lane_token = current_tenant.set(tenant), current_lane.set(lane)
+        metrics.incr(f"admission.admitted.{lane}")
+        try:
+            yield
+        finally:
+            current_tenant.reset(tenant_token); current_lane.reset(lane_token)
+            with self._cond:
+                self.requests_by_tenant[tenant] -= 1
+                if not self.requests_by_tenant[tenant]: del self.requests_by_tenant[tenant]
+
+    @contextmanager
+    def slot(self, tenant=None, lane=None, cost=1.0):
+        """Block until this tenant may run one LLM call, then hold the slot for the duration of the block."""
+        tenant = tenant or current_tenant.get()
+        lane = lane or current_lane.get()
+        ticket = _Ticket(tenant, lane)
+        queued_at = time.perf_counter()
+        with self._cond:
+            start = max(self.virtual_time, self.last_finish.get(tenant, 0.0))
+            finish = start + cost / self.tenant_weights.get(tenant, 1.0)
+            self.last_finish[tenant] = finish
+            heapq.heappush(self.queue, (LANES.get(lane, 0), start, next(self._seq), ticket))
+            self._dispatch()
+            deadline = time.monotonic() + self.max_wait_seconds * 2
+            while not ticket.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.queue = [item for item in self.queue if item[3] is not ticket]
+                    heapq.heapify(self.queue)
+                    reject(self.avg_service_seconds, "timeout")
+                self._cond.wait(remaining)
+        metrics.observe(f"admission.queue_wait_seconds.{lane}", time.perf_counter() - queued_at)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._cond:
+                self.active -= 1
+                self.active_by_tenant[tenant] -= 1
+                if not self.active_by_tenant[tenant]: del self.active_by_tenant[tenant]
+                self.avg_service_seconds = 0.8 * self.avg_service_seconds + 0.2 * elapsed
+                self._dispatch()
+
+    def _age(self):
+        """Move batch tickets that waited batch_aging_seconds to the interactive lane (caller holds the lock)."""
+        aged_before = time.monotonic() - self.batch_aging_seconds
+        if not any(item[0] and item[3].queued_at <= aged_before for item in self.queue): return
+        self.queue = [(0, *item[1:]) if item[0] and item[3].queued_at <= aged_before else item for item in self.queue]
+        heapq.heapify(self.queue)
+        metrics.incr("admission.batch_aged")
+
+    def _dispatch(self):
+        """Grant free slots to the best waiting tickets whose tenant is under its cap (caller holds the lock)."""
+        if self.queue and self.active < self.max_concurrent: self._age()
+        skipped = []
+        while self.queue and self.active < self.max_concurrent:
+            item = heapq.heappop(self.queue)
+            ticket = item[3]
+            if self.active_by_tenant.get(ticket.tenant, 0) >= self.tenant_concurrency:
+                skipped.append(item)
+                continue
+            ticket.granted = True
+            self.virtual_time = max(self.virtual_time, item[1])
+            self.active += 1
+            self.active_by_tenant[ticket.tenant] = self.active_by_tenant.get(ticket.tenant, 0) + 1
+        for item in skipped: heapq.heappush(self.queue, item)
+        if not self.queue and not self.active: self.last_finish.clear()
+        self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "active": self.active, "queued": len(self.queue), "tenants_active": len(self.active_by_tenant),
+                "avg_service_seconds": round(self.avg_service_seconds, 3),
+                "expected_wait_seconds": {lane: round(self._expected_wait(rank), 3) for lane, rank in LANES.items()},
+            }
+
+def run_as(tenant, lane, fn, *args):
+    """Call fn in a fresh context bound to tenant/lane (for work handed to worker threads)."""
+    def runner():
+        current_tenant.set(tenant); current_lane.set(lane)
+        return fn(*args)
+    return contextvars.copy_context().run(runner)
+
+# Global scheduler shared by /chat and /batch/match
+scheduler = FairScheduler(
+    max_concurrent=config.ADMISSION_MAX_CONCURRENT_LLM, tenant_concurrency=config.ADMISSION_TENANT_CONCURRENCY,
+    tenant_max_requests=config.ADMISSION_TENANT_MAX_REQUESTS, max_wait_seconds=config.ADMISSION_MAX_WAIT_SECONDS,
+    batch_aging_seconds=config.ADMISSION_BATCH_AGING_SECONDS,
+)
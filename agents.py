@@ -1,34 +1,62 @@
 import os
-from crewai import Agent
-from langchain_groq import ChatGroq
-from tools import web_search_tool
+import threading
+from tools import get_web_search_tool
 from dotenv import load_dotenv
-import litellm
 load_dotenv()
-litellm.max_retries = 3
 groq_api_key = os.getenv("GROQ_API_KEY")
 model_name = "groq/llama-3.1-8b-instant"
-llm = ChatGroq(api_key=groq_api_key, model_name=model_name)
-router_llm = ChatGroq(api_key=groq_api_key, model_name=model_name)
-synthesizer_llm = ChatGroq(api_key=groq_api_key, model_name=model_name)
+
+# LLM clients are built on first use: importing this module must not pull in
+# langchain_groq/litellm or need credentials.
+_llms = {}
+_llm_lock = threading.Lock()
+
+def _get_llm_client(name):
+    if name not in _llms:
+        with _llm_lock:
+            if name not in _llms:
+                import litellm
+                from langchain_groq import ChatGroq
+                litellm.max_retries = 3
+                _llms[name] = ChatGroq(api_key=groq_api_key, model_name=model_name)
+    return _llms[name]
+
+def get_llm(): return _get_llm_client("default")
+def get_router_llm(): return _get_llm_client("router")
+def get_synthesizer_llm(): return _get_llm_client("synthesizer")
+
+def Agent(**kwargs):
+    """Build a crewai Agent, importing crewai on first use."""
+    from crewai import Agent as CrewAgent
+    return CrewAgent(**kwargs)
 
 
 # --- AGENT DEFINITIONS ---
 
-def create_router_agent():
-    """Creates the agent responsible for routing user queries."""
+def create_router_agent(combined=False):
+    """Creates the agent responsible for routing user queries.
+
+    With combined=True the router may also complete a single-agent task inline."""
+    backstory = (
+        "You are an intelligent routing system that analyzes user intent. "
+        "You output ONLY a JSON array of agent keywords in the correct execution order. "
+        "For complex queries, chain multiple agents. For simple queries, use a single agent."
+    )
+    if combined:
+        backstory = (
+            "You are an intelligent routing system that analyzes user intent and an expert resume writer. "
+            "You always start with a JSON array of agent keywords in the correct execution order. "
+            "When a single job matching or section enhancement step suffices, you complete it yourself "
+            "without adding skills or technologies that are not in the original resume."
+        )
     return Agent(
         role='Intelligent Conversation Router',
         goal=(
             "Analyze the user's query to determine the appropriate agent sequence. "
             "Available agents: 'job_matcher', 'company_researcher', 'section_enhancer', 'translation', 'general_chitchat'."
         ),
-        backstory=(
-            "You are an intelligent routing system that analyzes user intent. "
-            "You output ONLY a JSON array of agent keywords in the correct execution order. "
-            "For complex queries, chain multiple agents. For simple queries, use a single agent."
-        ),
-        llm=router_llm,
+        backstory=backstory,
+        llm=get_router_llm(),
         verbose=True,
         allow_delegation=False
     )
@@ -44,8 +72,8 @@ def create_company_researcher_agent():
             "CRITICAL RULE: When you use the web_search_tool, you MUST pass a simple string as the 'query'. "
             "For example: `web_search_tool(query='VectorShift company culture and values')`."
         ),
-        tools=[web_search_tool],
-        llm=llm,
+        tools=[get_web_search_tool()],
+        llm=get_llm(),
         allow_delegation=False,
         verbose=True
     )
@@ -60,7 +88,7 @@ def create_job_matcher_agent():
             "You provide structured analysis: required skills, match percentage, and specific gaps. "
             "You DO NOT rewrite resumes; you provide data for other agents to use."
         ),
-        llm=llm,
+        llm=get_llm(),
         verbose=True,
         allow_delegation=False
     )
@@ -79,13 +107,13 @@ def create_section_enhancer_agent():
             "4. Apply STAR method to existing achievements "
             "If provided with research keywords, incorporate them ONLY if they relate to existing experience."
         ),
-        llm=llm,
+        llm=get_llm(),
         verbose=True,
         allow_delegation=False
     )
 
-def create_translation_agent():
-    """Creates the agent for resume localization."""
+def create_translation_agent(with_search=True):
+    """Creates the agent for resume localization (without the search tool for chunk-level translation)."""
     return Agent(
         role='International Resume Localization Expert',
         goal="Translate and adapt resumes for target countries using local conventions.",
@@ -93,8 +121,8 @@ def create_translation_agent():
             "You are a localization expert who adapts resumes for international markets. "
             "You research local hiring customs and translate content while maintaining professional quality."
         ),
-        llm=llm,
-        tools=[web_search_tool],
+        llm=get_llm(),
+        tools=[get_web_search_tool()] if with_search else [],
         verbose=True,
         allow_delegation=False
     )
@@ -112,7 +140,7 @@ def create_synthesizer_agent():
             "4. Provide a clear summary: what changed, why, match score, and skill gaps. "
             "5. Output the final resume in ###UPDATED_RESUME### tags and skill gaps in ###SKILL_GAPS### tags."
         ),
-        llm=synthesizer_llm,
+        llm=get_synthesizer_llm(),
         verbose=True,
         allow_delegation=False
     )
@@ -0,0 +1,76 @@
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from metrics import metrics
+
+
+def pair_key(resume_text: str, job_description: str) -> str:
+    """Stable checkpoint key for a resume/JD pair, independent of its position in the request."""
+    digest = hashlib.sha256()
+    digest.update(resume_text.encode('utf-8')); digest.update(b'\0'); digest.update(job_description.encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+def build_pairs(resumes: list, job_descriptions: list):
+    """Cross product of resumes and job descriptions as (index, resume_index, jd_index, resume, jd) tuples."""
+    return [
+        (r_i * len(job_descriptions) + j_i, r_i, j_i, resume, jd)
+        for r_i, resume in enumerate(resumes) for j_i, jd in enumerate(job_descriptions)
+    ]
+
+def run_batch(batch_id, pairs, score_fn, load_checkpoint, save_checkpoint, workers=4):
+    """Score every pair concurrently and yield one NDJSON line per result.
+
+    score_fn(resume, jd) returns a dict with 'match_score', 'skill_gaps' and 'analysis'.
+    Pairs already present in the checkpoint are replayed first without calling score_fn,
+    so re-submitting the same batch_id after a restart resumes where it left off."""
+    done = load_checkpoint(batch_id)
+    pending, completed, failed = [], 0, 0
+
+    for index, r_i, j_i, resume, jd in pairs:
+        key = pair_key(resume, jd)
+        if key in done:
+            completed += 1
+            metrics.incr("batch.checkpoint_hits")
+            yield json.dumps({"index": index, "resume_index": r_i, "jd_index": j_i, "cached": True, **done[key]}) + "\n"
+        else:
+            pending.append((index, r_i, j_i, resume, jd, key))
+
+    def score(resume, jd, key):
+        # Checkpointed by the worker, so a finished call is kept even if the client is gone by then
+        result = score_fn(resume, jd)
+        save_checkpoint(batch_id, key, result)
+        return result
+
+    # At most `workers` pairs are submitted at a time, so a disconnect leaves nothing queued behind them
+    pool, queue, running = ThreadPoolExecutor(max_workers=workers), iter(pending), {}
+    def fill():
+        while len(running) < workers:
+            item = next(queue, None)
+            if item is None: return
+            index, r_i, j_i, resume, jd, key = item
+            running[pool.submit(score, resume, jd, key)] = (index, r_i, j_i)
+    try:
+        fill()
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index, r_i, j_i = running.pop(future)
+                fill()
+                line = {"index": index, "resume_index": r_i, "jd_index": j_i, "cached": False}
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed += 1
+                    metrics.incr("batch.failed")
+                    yield json.dumps({**line, "error": str(getattr(e, 'detail', e))}) + "\n"
+                    continue
+                completed += 1
+                metrics.incr("batch.scored")
+                yield json.dumps({**line, **result}) + "\n"
+    finally:
+        # On a client disconnect (GeneratorExit) calls already running finish and are checkpointed in
+        # the background; nothing else is started
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    yield json.dumps({"done": True, "batch_id": batch_id, "total": len(pairs), "completed": completed, "failed": failed}) + "\n"
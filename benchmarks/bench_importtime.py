@@ -0,0 +1,54 @@
+"""Measure the cold import cost of the API with `python -X importtime`.
+
+Usage: python benchmarks/bench_importtime.py [--module main] [--top 15] [--max-seconds 2.0] [--write]
+
+--write refreshes benchmarks/importtime.txt, the tracked baseline for this repo.
+--max-seconds exits non-zero when the import is slower than the budget (for CI).
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "importtime.txt")
+
+
+def measure(module):
+    """Return (total_seconds, [(cumulative_us, depth, name)]) for a cold import in a fresh interpreter."""
+    env = {k: v for k, v in os.environ.items() if k not in ("GROQ_API_KEY", "TAVILY_API_KEY", "GOOGLE_APPLICATION_CREDENTIALS")}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line: continue
+        self_us, cumulative_us, raw_name = line[len("import time:"):].split("|")
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        rows.append((int(cumulative_us), depth, raw_name.strip()))
+    total = next(cum for cum, depth, name in reversed(rows) if name == module and depth == 0)
+    return total / 1e6, rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    parser.add_argument("--write", action="store_true")
+    args = parser.parse_args()
+
+    total, rows = measure(args.module)
+    # Modules imported directly by the target give the readable breakdown
+    direct = sorted((r for r in rows if r[1] == 1), reverse=True)[:args.top]
+    report = [f"import {args.module}: {total:.3f}s", "", f"{'cumulative':>12}  module"]
+    report += [f"{cum / 1e6:>11.3f}s  {name}" for cum, _, name in direct]
+    print("\n".join(report))
+    if args.write:
+        with open(BASELINE, "w") as f: f.write("\n".join(report) + "\n")
+    if args.max_seconds is not None and total > args.max_seconds:
+        raise SystemExit(f"import {args.module} took {total:.3f}s, budget is {args.max_seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Measure how much of each prompt a provider prefix cache can reuse, per prompt version.
+
+For a simulated conversation (several turns on one resume) and for unrelated conversations, reports the
+average common prefix between consecutive task descriptions, in estimated tokens and as a share of the prompt.
+The agent system prompt (role/goal/backstory) comes before the description and is shared in both versions.
+
+Usage: python benchmarks/bench_prompts.py [n_resumes]
+"""
+import os
+import sys
+import random
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompts import get_prompt, CHARS_PER_TOKEN
+from benchmarks.corpus import make_resume, make_job_description
+
+MESSAGES = ["Improve my experience section", "Make the summary stronger", "Add more metrics to my projects",
+            "Optimize my resume for Google", "Translate my resume to German"]
+
+
+def shared_prefix(a, b):
+    return len(os.path.commonprefix([a, b]))
+
+def measure(version, resumes, jds):
+    rows = {}
+    for name in ("section_enhancer", "job_matcher", "company_researcher", "match_scoring"):
+        prompt = get_prompt(name, version)
+        render = (lambda resume, i: prompt.render(current_resume=resume, job_description=jds[i % len(jds)])) if name == "match_scoring" \
+            else (lambda resume, i: prompt.render(current_resume=resume, message=MESSAGES[i % len(MESSAGES)]))
+        same, other, total = [], [], []
+        for r_i, resume in enumerate(resumes):
+            turns = [render(resume, i) for i in range(len(MESSAGES))]
+            same += [shared_prefix(a, b) for a, b in zip(turns, turns[1:])]
+            total += [len(t) for t in turns]
+            if r_i: other.append(shared_prefix(turns[0], render(resumes[r_i - 1], 1)))
+        avg = lambda xs: sum(xs) / len(xs)
+        rows[name] = (avg(same) / CHARS_PER_TOKEN, avg(same) / avg(total), avg(other) / CHARS_PER_TOKEN, avg(total) / CHARS_PER_TOKEN)
+    return rows
+
+def main(n_resumes=50):
+    rng = random.Random(5)
+    resumes = [make_resume(rng)[0] for _ in range(n_resumes)]
+    jds = [make_job_description(rng)[0] for _ in range(len(MESSAGES))]
+    print(f"{'prompt':20s} {'ver':4s} {'same-convo prefix':>18s} {'share':>7s} {'cross-convo prefix':>19s} {'prompt tokens':>14s}")
+    for version in ("v1", "v2", "v3"):
+        for name, (same, share, other, total) in measure(version, resumes, jds).items():
+            print(f"{name:20s} {version:4s} {same:14.0f} tok {share:7.1%} {other:15.0f} tok {total:14.0f}")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
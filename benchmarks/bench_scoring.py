@@ -0,0 +1,48 @@
+"""Benchmark the local match-scoring engine.
+
+Usage: python benchmarks/bench_scoring.py [n_resumes] [n_jds]
+"""
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring import ScoringEngine
+from benchmarks.corpus import make_corpus
+
+
+def main(n_resumes=200, n_jds=200):
+    resumes, jds = make_corpus(n_resumes, n_jds)
+    resume_texts, jd_texts = [r for r, _ in resumes], [j for j, _ in jds]
+
+    start = time.perf_counter()
+    engine = ScoringEngine().fit(resume_texts + jd_texts)
+    fit_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for jd in jd_texts[:100]: engine.score(resume_texts[0], jd)
+    pair_ms = (time.perf_counter() - start) * 1000 / 100
+
+    start = time.perf_counter()
+    all_scores = [engine.score_many(resume, jd_texts) for resume in resume_texts]
+    many_ms = (time.perf_counter() - start) * 1000
+
+    # Sanity check: the local top-1 JD should share far more skills with the resume than an average JD
+    top1 = best = avg = 0.0
+    sample = min(50, n_resumes)
+    for (resume, r_skills), scores in zip(resumes[:sample], all_scores[:sample]):
+        overlaps = [len(set(r_skills) & set(j_skills)) for _, j_skills in jds]
+        top1 += overlaps[max(range(len(scores)), key=lambda i: scores[i]["match_score"])]
+        best += max(overlaps); avg += sum(overlaps) / len(overlaps)
+
+    repeat = engine.score(resume_texts[0], jd_texts[0]) == engine.score(resume_texts[0], jd_texts[0])
+    print(f"corpus: {n_resumes} resumes x {n_jds} JDs")
+    print(f"fit IDF:                 {fit_ms:8.2f} ms")
+    print(f"single pair score:       {pair_ms:8.3f} ms/pair")
+    print(f"vectorized 1 x {n_jds} JDs:  {many_ms / n_resumes:8.3f} ms/resume ({many_ms * 1000 / (n_resumes * n_jds):.1f} us/pair)")
+    print(f"true skill overlap of local top-1 JD: {top1 / sample:.2f} (best possible {best / sample:.2f}, average JD {avg / sample:.2f})")
+    print(f"reproducible: {repeat}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,69 @@
+"""Benchmark the resume search index: build time, footprint and query latency against a linear scan.
+
+Usage: python benchmarks/bench_search.py [n_resumes] [n_updates]
+"""
+import os
+import sys
+import time
+import random
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import ResumeIndex, document_terms, query_terms
+from benchmarks.corpus import make_resume
+
+QUERIES = [
+    ("boolean", "Kubernetes AND Docker"),
+    ("boolean", "(PyTorch OR TensorFlow) AND NOT Java"),
+    ("boolean", '"system design" AND Kafka AND Redis'),
+    ("bm25", "python fastapi postgresql kubernetes"),
+    ("bm25", "data pipelines spark airflow"),
+]
+
+
+def scan(terms_by_doc, query):
+    """Linear-scan baseline for an all-terms query over pre-tokenized documents."""
+    wanted = [t for atom in query.split() if atom.upper() not in ("AND", "OR", "NOT") for t in query_terms(atom.strip('()"'))]
+    return sum(1 for terms in terms_by_doc if all(t in terms for t in wanted))
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat): result = fn()
+    return (time.perf_counter() - start) * 1000 / repeat, result
+
+
+def main(n_resumes=100_000, n_updates=20_000):
+    rng = random.Random(5)
+    resumes = [make_resume(rng)[0] for _ in range(n_resumes)]
+    index = ResumeIndex()
+
+    start = time.perf_counter()
+    index.bootstrap({"conversationId": f"c{i}", "version": 1, "modified_text": text} for i, text in enumerate(resumes))
+    build = time.perf_counter() - start
+    stats = index.stats()
+    print(f"build:    {n_resumes} resumes in {build:.1f}s ({build * 1e6 / n_resumes:.0f} us/resume), "
+          f"{stats['terms']} terms, {stats['postings']} postings")
+
+    start = time.perf_counter()
+    for i in range(n_updates): index.add(f"c{rng.randrange(n_resumes)}", 2 + i, make_resume(rng)[0])
+    updates = time.perf_counter() - start
+    stats = index.stats()
+    print(f"updates:  {n_updates} new versions, {updates * 1e6 / n_updates:.0f} us each; "
+          f"{stats['tombstones']} tombstones, {stats['documents']} live documents")
+
+    start = time.perf_counter()
+    index.compact()
+    print(f"compact:  {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    terms_by_doc = [set(document_terms(text)) for text in resumes[:10_000]]
+    for mode, query in QUERIES:
+        ms, result = timed(lambda: index.search(query, mode=mode), 20)
+        line = f"{mode:8s} {query!r:45s} {result['total']:7d} hits  {ms:7.2f} ms"
+        if mode == "boolean" and "OR" not in query:
+            scan_ms, _ = timed(lambda: scan(terms_by_doc, query), 3)
+            line += f"   (scan of 10k pre-tokenized: {scan_ms:.1f} ms, ~{scan_ms * n_resumes / 10_000:.0f} ms at {n_resumes})"
+        print(line)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
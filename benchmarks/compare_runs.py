@@ -0,0 +1,51 @@
+"""Compare two cassettes or replay run logs: end-to-end latency and token totals per endpoint.
+
+Usage: python benchmarks/compare_runs.py BASELINE CANDIDATE
+"""
+import sys
+import json
+import gzip
+
+FIELDS = ("prompt_tokens", "cached_prompt_tokens", "completion_tokens")
+
+
+def summarize(path):
+    requests, calls = {}, {}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for entry in map(json.loads, f):
+            if entry["kind"] == "request":
+                requests.setdefault(entry["endpoint"], []).append(entry)
+            else:
+                calls[f"{entry['kind']}:{entry['name']}"] = calls.get(f"{entry['kind']}:{entry['name']}", 0) + 1
+    summary = {}
+    for endpoint, entries in requests.items():
+        seconds = sorted(e["seconds"] for e in entries if e["status"] == 200)
+        pick = lambda q: seconds[min(len(seconds) - 1, int(q * len(seconds)))] if seconds else 0.0
+        row = {"requests": len(entries), "errors": sum(e["status"] != 200 for e in entries),
+               "mean": sum(seconds) / len(seconds) if seconds else 0.0, "p50": pick(0.5), "p95": pick(0.95), "max": pick(1.0)}
+        for field in FIELDS: row[field] = sum(e.get("usage", {}).get(field, 0) for e in entries)
+        summary[endpoint] = row
+    return summary, calls
+
+def delta(a, b):
+    return f"{(b - a) / a:+.1%}" if a else "n/a"
+
+def main(baseline, candidate):
+    (base, base_calls), (cand, cand_calls) = summarize(baseline), summarize(candidate)
+    for endpoint in sorted(set(base) | set(cand)):
+        a, b = base.get(endpoint, {}), cand.get(endpoint, {})
+        print(f"{endpoint}")
+        print(f"  {'metric':22s} {'baseline':>12s} {'candidate':>12s} {'change':>9s}")
+        for key in ("requests", "errors", "mean", "p50", "p95", "max") + FIELDS:
+            x, y = a.get(key, 0), b.get(key, 0)
+            fmt = (lambda v: f"{v:12.3f}") if isinstance(x, float) or isinstance(y, float) else (lambda v: f"{v:12d}")
+            print(f"  {key:22s} {fmt(x)} {fmt(y)} {delta(x, y):>9s}")
+    if base_calls or cand_calls:
+        print("calls")
+        for name in sorted(set(base_calls) | set(cand_calls)):
+            print(f"  {name:22s} {base_calls.get(name, 0):12d} {cand_calls.get(name, 0):12d}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3: sys.exit(__doc__)
+    main(*sys.argv[1:])
@@ -0,0 +1,34 @@
+"""Synthetic resume / job description corpus shared by the benchmark scripts."""
+import random
+
+SKILLS = [
+    "python", "java", "go", "rust", "c++", "typescript", "javascript", "react", "node.js", "django", "fastapi",
+    "flask", "spring", "kubernetes", "docker", "terraform", "aws", "gcp", "azure", "postgresql", "mysql",
+    "mongodb", "redis", "kafka", "spark", "airflow", "pytorch", "tensorflow", "scikit-learn", "pandas", "numpy",
+    "graphql", "grpc", "linux", "bash", "git", "jenkins", "ansible", "prometheus", "grafana", "elasticsearch",
+    "langchain", "llm", "rag", "nlp", "computer vision", "mlops", "ci/cd", "microservices", "system design",
+]
+TITLES = ["Software Engineer", "Backend Engineer", "ML Engineer", "Data Engineer", "DevOps Engineer", "AI Engineer"]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Optimized", "Automated", "Shipped", "Scaled"]
+NOUNS = ["data pipelines", "REST APIs", "recommendation service", "CI pipeline", "search backend", "ETL jobs"]
+
+
+def make_resume(rng: random.Random, n_skills=8, n_bullets=6):
+    skills = rng.sample(SKILLS, n_skills)
+    bullets = [f"- {rng.choice(VERBS)} {rng.choice(NOUNS)} using {rng.choice(skills)} and {rng.choice(skills)}, "
+               f"improving throughput by {rng.randint(10, 90)}%" for _ in range(n_bullets)]
+    return (f"{rng.choice(['Asha Rao', 'Liam Chen', 'Maya Singh', 'Omar Haddad'])}\n{rng.choice(TITLES)}\n\n"
+            f"SUMMARY\nEngineer with {rng.randint(2, 12)} years of experience.\n\n"
+            f"EXPERIENCE\n" + "\n".join(bullets) + f"\n\nSKILLS\n{', '.join(skills)}\n"), skills
+
+
+def make_job_description(rng: random.Random, n_skills=7):
+    skills = rng.sample(SKILLS, n_skills)
+    return (f"We are hiring a {rng.choice(TITLES)}.\nRequirements:\n" +
+            "\n".join(f"- Hands-on experience with {s}" for s in skills) +
+            "\nResponsibilities: design, build and operate production systems.\n"), skills
+
+
+def make_corpus(n_resumes=200, n_jds=200, seed=7):
+    rng = random.Random(seed)
+    return [make_resume(rng) for _ in range(n_resumes)], [make_job_description(rng) for _ in range(n_jds)]
@@ -0,0 +1,66 @@
+"""Re-send recorded /chat traffic to a running server, keeping the recorded arrival pattern.
+
+Start the build under test with CASSETTE_MODE=replay CASSETTE_PATH=<cassette> REPLAY_LOG_PATH=<run log>,
+run this script against it, then compare with: python benchmarks/compare_runs.py <cassette> <run log>
+
+The server reads the recorded conversations' resumes and history from its Firestore project, so point it at
+the project (or a copy of it) the cassette was recorded against. In replay mode /chat writes nothing back:
+new resume versions and history entries stay in the server's memory, because replayed answers carry masked
+resumes that would otherwise overwrite the real ones.
+
+Usage: python benchmarks/replay_traffic.py CASSETTE [--base-url URL] [--speed N] [--limit N]
+"""
+import sys
+import json
+import gzip
+import time
+import argparse
+import threading
+import urllib.request
+import urllib.error
+
+
+def load_requests(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [e for e in map(json.loads, f) if e["kind"] == "request" and e["endpoint"] == "/chat"]
+
+def send(base_url, entry, results):
+    body = json.dumps({"conversation_id": entry["conversation_id"], "message": entry["message"]}).encode()
+    req = urllib.request.Request(base_url.rstrip("/") + "/chat", data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=600) as response: status = response.status
+    except urllib.error.HTTPError as e: status = e.code
+    except OSError: status = 0
+    results.append((status, time.perf_counter() - start))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cassette")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="arrival-rate multiplier (0 = send sequentially, no gaps)")
+    parser.add_argument("--limit", type=int, default=0)
+    args = parser.parse_args()
+
+    entries = load_requests(args.cassette)
+    if args.limit: entries = entries[:args.limit]
+    if not entries: sys.exit("No /chat requests in the cassette.")
+    results, threads = [], []
+    start, first = time.monotonic(), entries[0]["t"]
+    for entry in entries:
+        if args.speed <= 0:
+            send(args.base_url, entry, results)
+            continue
+        delay = (entry["t"] - first) / args.speed - (time.monotonic() - start)
+        if delay > 0: time.sleep(delay)
+        thread = threading.Thread(target=send, args=(args.base_url, entry, results))
+        thread.start(); threads.append(thread)
+    for thread in threads: thread.join()
+
+    ok = sorted(seconds for status, seconds in results if status == 200)
+    print(f"sent {len(results)} requests, {len(ok)} OK, {len(results) - len(ok)} failed")
+    if ok: print(f"client-side latency p50 {ok[len(ok) // 2]:.3f}s  p95 {ok[min(len(ok) - 1, int(0.95 * len(ok)))]:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
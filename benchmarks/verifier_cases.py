@@ -0,0 +1,72 @@
+"""Hand-labelled resume rewrites for the verifier benchmark.
+
+Each case is a turn as the chat sees it: the resume before the turn, the user's message, the agent that
+answered, the rewrite it produced, and whether that rewrite claims something the candidate never wrote.
+The clean rewrites carry the edits real models make (reworded bullets, merged lines, reformatted dates
+and metrics); the fabricated ones the failures seen in practice (JD skills copied into the resume,
+rounded-up or invented metrics).
+"""
+
+BASE = """Priya Raman
+priya.raman@example.com
+
+SUMMARY
+Backend engineer with 6 years of experience building payment services.
+
+EXPERIENCE
+Senior Software Engineer, Paylane (03/2021 - Present)
+- Built a Python/PostgreSQL ledger service processing $2M in daily volume
+- Cut p95 API latency by 40% by adding Redis caching
+- Mentored 4 junior engineers
+
+Software Engineer, Finbox (2018-21)
+- Maintained Django REST APIs serving 10,000+ merchants
+- Migrated CI from Jenkins to GitHub Actions
+
+SKILLS
+Python, Django, PostgreSQL, Redis, Docker, AWS
+"""
+
+JD = """Senior Platform Engineer. Responsibilities include operating Kubernetes clusters, writing Terraform
+modules and owning our Kafka pipelines. Experience with Go is a plus."""
+
+CASES = [
+    # Faithful rewrites
+    dict(note="reworded bullets", agent="section_enhancer", message="Make my experience bullets punchier",
+         rewrite=BASE.replace("- Built a", "- Designed and shipped a").replace("- Mentored 4", "- Coached 4")),
+    dict(note="dates reformatted", agent="section_enhancer", message="Use a consistent date format",
+         rewrite=BASE.replace("(03/2021 - Present)", "(2021 – Present)").replace("(2018-21)", "(2018 – 2021)")),
+    dict(note="metrics spelled out", agent="section_enhancer", message="Spell out the numbers",
+         rewrite=BASE.replace("$2M", "$2 million").replace("40%", "40 percent").replace("10,000+", "10k+")),
+    dict(note="summary tightened", agent="section_enhancer", message="Shorten my summary",
+         rewrite=BASE.replace("Backend engineer with 6 years of experience building payment services.", "Payments backend engineer, 6 years.")),
+    dict(note="user vouches for a skill", agent="section_enhancer", message="I've also used Kafka at Paylane for event streaming, please add it",
+         rewrite=BASE.replace("Redis, Docker", "Redis, Kafka, Docker")),
+    dict(note="tailored to a JD without new claims", agent="job_matcher", message="Tailor my resume to this job:\n" + JD,
+         rewrite=BASE.replace("Backend engineer with", "Backend engineer focused on reliable infrastructure, with").replace("Docker, AWS", "AWS, Docker")),
+    dict(note="translated headings", agent="translation", message="Translate my resume into Spanish",
+         rewrite=BASE.replace("SUMMARY", "RESUMEN").replace("EXPERIENCE", "EXPERIENCIA").replace("SKILLS", "HABILIDADES")),
+    dict(note="French translation with taxonomy look-alikes", agent="translation", message="Translate my resume into French",
+         rewrite=BASE.replace("SUMMARY", "PROFIL").replace("- Mentored 4 junior engineers",
+                              "- Création d'un tableau de bord de suivi et encadrement de 4 ingénieurs juniors")),
+    dict(note="company research applied", agent="company_researcher", message="Tailor it for Stripe, they use Ruby a lot",
+         rewrite=BASE.replace("payment services.", "payment services at scale, with a focus on merchant experience.")),
+    # Fabrications
+    dict(note="JD skills copied in", agent="job_matcher", message="Tailor my resume to this job:\n" + JD, fabricated=True,
+         rewrite=BASE.replace("Docker, AWS", "Docker, Kubernetes, Terraform, AWS")),
+    dict(note="JD skill in a bullet", agent="job_matcher", message="Match this JD please. " + JD, fabricated=True,
+         rewrite=BASE.replace("- Mentored 4 junior engineers", "- Owned Kafka pipelines and mentored 4 junior engineers")),
+    dict(note="company stack claimed", agent="company_researcher", message="Tailor it for Stripe, they use Ruby a lot", fabricated=True,
+         rewrite=BASE.replace("Python, Django", "Python, Ruby, Django")),
+    dict(note="metric rounded up", agent="section_enhancer", message="Quantify my impact more", fabricated=True,
+         rewrite=BASE.replace("40%", "60%")),
+    dict(note="metric invented", agent="section_enhancer", message="Quantify my impact more", fabricated=True,
+         rewrite=BASE.replace("- Mentored 4 junior engineers", "- Mentored 4 junior engineers, raising team velocity by 25%")),
+    dict(note="imperative is not an assertion", agent="section_enhancer", message="Add Kubernetes, recruiters love it", fabricated=True,
+         rewrite=BASE.replace("Docker, AWS", "Docker, Kubernetes, AWS")),
+    dict(note="years inflated", agent="section_enhancer", message="Make my summary stronger", fabricated=True,
+         rewrite=BASE.replace("6 years", "8+ years")),
+    # Outside what a skills/numbers check can see: counted as a miss on purpose
+    dict(note="title inflated", agent="section_enhancer", message="Make it sound more senior", fabricated=True,
+         rewrite=BASE.replace("Senior Software Engineer", "Staff Software Engineer")),
+]
@@ -0,0 +1,105 @@
+import copy
+import math
+from typing import NamedTuple
+
+import config
+
+# Output budgets per agent call. Each prompt gets a max output token count sized from its input
+# (a rewrite is about as long as the resume it rewrites, plus a short explanation), a stop sequence
+# right after the resume so nothing is generated past it, and a wall-clock deadline derived from
+# the token budget. An answer that ends at its token budget instead of at its end is continued
+# from where it stopped (see main.run_budgeted) rather than regenerated from scratch.
+
+CHARS_PER_TOKEN = 4
+
+# Resume-producing prompts open the resume with the first tag and close it with the second, which is
+# also their stop sequence (so providers leave it out of the returned text)
+UPDATED_RESUME_TAG = "###UPDATED_RESUME###"
+END_RESUME_TAG = "###END_RESUME###"
+
+# CrewAI agents answer in its ReAct format ("Thought: ...\nFinal Answer: ..."): every call spends
+# this many tokens on the scaffolding before the answer the fixed budgets below are sized for
+REACT_SCAFFOLD_TOKENS = 96
+
+# prompt name -> (fixed tokens for the explanation/analysis, output tokens per input token)
+OUTPUT_BUDGETS = {
+    "company_researcher": (500, 1.3),
+    "job_matcher": (600, 1.3),
+    "section_enhancer": (400, 1.3),
+    # Translations run longer than the source, more so in non-Latin scripts
+    "translation": (400, 2.0),
+    "chunk_translation": (64, 2.0),
+    "repair": (200, 1.2),
+    "combined_routing": (600, 1.3),
+    "match_scoring": (300, 0.0),
+    "routing": (48, 0.0),
+}
+DEFAULT_BUDGET = (800, 1.3)
+RESUME_PROMPTS = frozenset({"company_researcher", "job_matcher", "section_enhancer", "translation", "repair", "combined_routing"})
+
+# An answer within this share of its budget most likely ran into it
+NEAR_BUDGET = 0.97
+# Repeated text stitch() looks for: shorter than MIN_OVERLAP is coincidence
+MIN_OVERLAP, MAX_OVERLAP = 8, 400
+
+
+class Budget(NamedTuple):
+    name: str
+    max_tokens: int
+    deadline_seconds: float
+    stop: tuple
+
+
+def budget_for(name: str, input_chars: int) -> Budget:
+    """The output budget of one call of the named prompt on input_chars characters of input."""
+    fixed, per_token = OUTPUT_BUDGETS.get(name, DEFAULT_BUDGET)
+    tokens = REACT_SCAFFOLD_TOKENS + fixed + per_token * input_chars / CHARS_PER_TOKEN
+    # Rounded up to 64 so near-identical inputs get the same settings
+    max_tokens = min(config.OUTPUT_MAX_TOKENS, 64 * math.ceil(tokens / 64))
+    deadline = min(config.AGENT_DEADLINE_MAX_SECONDS, config.AGENT_DEADLINE_BASE_SECONDS + max_tokens / config.OUTPUT_TOKENS_PER_SECOND)
+    return Budget(name, max_tokens, deadline, (END_RESUME_TAG,) if name in RESUME_PROMPTS else ())
+
+
+def apply_budget(agent, budget: Budget):
+    """Give the agent its own copy of its LLM with the budget's max tokens, stop sequences and request
+    timeout, and the deadline as its max_execution_time."""
+    llm = getattr(agent, "llm", None)
+    if llm is not None and hasattr(llm, "max_tokens"):
+        llm = copy.copy(llm)
+        llm.max_tokens = budget.max_tokens
+        if hasattr(llm, "stop"): llm.stop = list(dict.fromkeys([*(llm.stop or []), *budget.stop]))
+        # The request timeout is what actually ends a slow generation: crewai's max_execution_time
+        # raises on time but still waits for the running call to return
+        if hasattr(llm, "timeout"): llm.timeout = budget.deadline_seconds
+        agent.llm = llm
+    if hasattr(agent, "max_execution_time"): agent.max_execution_time = math.ceil(budget.deadline_seconds)
+    return agent
+
+
+def is_truncated(output: str, completion_tokens: int, budget: Budget) -> bool:
+    """Whether an answer most likely stopped at its token budget rather than at its end."""
+    if budget.name in RESUME_PROMPTS and UPDATED_RESUME_TAG in output:
+        # An opened resume block with nothing in it is unfinished whatever the token count says
+        if not output.split(UPDATED_RESUME_TAG)[1].strip(): return True
+    estimated = len(output) // CHARS_PER_TOKEN
+    if not completion_tokens: return estimated >= NEAR_BUDGET * (budget.max_tokens - REACT_SCAFFOLD_TOKENS)
+    # Usage adds up every LLM call of the task (tool-using agents make several), so the final
+    # answer must also be long enough to have used a good part of the budget by itself
+    return completion_tokens >= NEAR_BUDGET * budget.max_tokens and estimated >= budget.max_tokens // 4
+
+
+def stitch(partial: str, continuation: str) -> str:
+    """Join a cut-off answer and its continuation, dropping what the continuation repeats."""
+    for size in range(min(len(partial), len(continuation), MAX_OVERLAP), MIN_OVERLAP - 1, -1):
+        if partial.endswith(continuation[:size]): return partial + continuation[size:]
+    # The continuation restarted the unfinished last line
+    last_line = partial[partial.rfind("\n") + 1:]
+    if len(last_line.strip()) >= MIN_OVERLAP and continuation.lstrip().startswith(last_line.strip()):
+        return partial[:len(partial) - len(last_line)] + continuation.lstrip()
+    return partial + continuation
+
+
+def is_timeout_error(exc) -> bool:
+    """True for an exceeded deadline: crewai's TimeoutError or a LiteLLM request timeout."""
+    return isinstance(exc, TimeoutError) or type(exc).__name__ in ("Timeout", "APITimeoutError")
+
@@ -0,0 +1,309 @@
+import os
+import re
+import json
+import gzip
+import time
+import atexit
+import string
+import hashlib
+import threading
+import functools
+import contextvars
+from types import SimpleNamespace
+from collections import deque
+from contextlib import contextmanager
+
+import config
+from metrics import metrics
+from prompts import PROMPTS, HINT_PREFIX
+
+# Record/replay of the slow, non-deterministic boundaries (CrewAI kickoffs and Tavily searches).
+# A cassette is gzipped JSON lines; every entry has a "kind": "llm", "search" or "request".
+# Resume text never reaches the cassette. Prompts are redacted by the structure of their registered
+# template: the static text and the user's message are kept, the resume becomes its length and hash,
+# and every other field (history, glossary, lines, hints...) is masked character by character so its
+# shape (and cost) survives. Resumes in responses are masked the same way.
+# In replay mode /chat stores nothing (ReplayStore), so replays never write masked resumes to Firestore.
+
+# Prompts that match no registered template (hand-written task descriptions) fall back to markers.
+# A resume block runs to the "---" line followed by what prompts.py puts after a resume (the next
+# section, or the next numbered step in v1), so "---" lines inside the resume do not end it
+_RESUME_BLOCK_RE = re.compile(
+    r"(---RESUME---\n)(.*?)(\n---(?:\n(?:USER REQUEST: |UNSUPPORTED CLAIMS: |CONVERSATION HISTORY: |---JOB DESCRIPTION---\n"
+    r"|---YOUR ANSWER SO FAR|\d\. (?:Rewrite the resume|Rewrite only the target|Explain your localization|Calculate a match score|Remove or rephrase))|\Z))", re.S)
+# The cut-off answer a continuation prompt repeats, and resumes written after the tag in any text
+# (the prompts' own instructions quote the tag: '###UPDATED_RESUME###')
+_PARTIAL_ANSWER_RE = re.compile(r"(---YOUR ANSWER SO FAR[^\n]*---\n)(.*?)(\n---\nContinue the answer|\Z)", re.S)
+_UPDATED_RESUME_RE = re.compile(r"((?<!')###UPDATED_RESUME###)(.*?)(###END_RESUME###|\nUSER (?:QUERY|REQUEST): |\Z)", re.S)
+_NUMBERED_LINE_RE = re.compile(r"^(\s*\[\d+\]\s?)(.*)$", re.M)
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE_RE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+_WORD_CHARS_RE = re.compile(r"[^\W_]")
+
+# Token usage of the request being served, shared with worker threads started from copied contexts
+_request_usage = contextvars.ContextVar("cassette_request_usage", default=None)
+
+
+class CassetteMiss(KeyError):
+    pass
+
+
+def prompt_key(kind: str, prompt: str) -> str:
+    return hashlib.sha256(f"{kind}\0{prompt}".encode("utf-8")).hexdigest()[:32]
+
+def _mask(text: str) -> str:
+    return _WORD_CHARS_RE.sub("x", text)
+
+def redact_contacts(text: str) -> str:
+    return _PHONE_RE.sub("[phone]", _EMAIL_RE.sub("[email]", text))
+
+def _mask_middle(match):
+    return match.group(1) + _mask(match.group(2)) + match.group(3)
+
+def _resume_placeholder(resume: str) -> str:
+    return f"[resume redacted: {len(resume)} chars, sha256 {hashlib.sha256(resume.encode('utf-8')).hexdigest()[:12]}]"
+
+@functools.lru_cache(maxsize=None)
+def _template_re(version: str, name: str):
+    """The rendered prompt as a regex: literal text kept, each field a group, an appended hint last."""
+    prompt = PROMPTS[version][name]
+    parts = [re.escape(literal) + (f"(?P<{field}>.*?)" if field else "")
+             for literal, field, _, _ in string.Formatter().parse(prompt.instructions + prompt.body)]
+    return re.compile("".join(parts) + f"(?P<hint>\n{re.escape(HINT_PREFIX)}.*)?", re.S)
+
+def _match_template(name, prompt: str):
+    """Match prompt against every version of the named template (any template when name is None)."""
+    for version, prompts in PROMPTS.items():
+        for candidate in ([name] if name else prompts):
+            if candidate not in prompts: continue
+            match = _template_re(version, candidate).fullmatch(prompt)
+            if match: return match
+    return None
+
+def _redact_field(field: str, value: str) -> str:
+    if field == "message": return redact_contacts(value)
+    if field == "current_resume": return _resume_placeholder(value)
+    if field == "task": return redact_prompt(None, value)  # a continuation repeats the task it continues
+    return _mask(value)
+
+def redact_prompt(name, prompt: str) -> str:
+    """Keep a prompt's static text and the user's message; the resume becomes its length and hash and
+    every other field is masked."""
+    match = _match_template(name, prompt)
+    if match is None: return _redact_by_markers(name, prompt)
+    out, last = [], 0
+    for field in sorted((f for f, v in match.groupdict().items() if v is not None), key=match.start):
+        out += [prompt[last:match.start(field)], _redact_field(field, match.group(field))]
+        last = match.end(field)
+    return "".join(out) + prompt[last:]
+
+def _redact_by_markers(name, prompt: str) -> str:
+    """Fallback for prompts with no registered template: resume blocks, answers and hints found by their markers."""
+    head, hint_sep, hint = prompt.partition("\n" + HINT_PREFIX)
+    prompt = _UPDATED_RESUME_RE.sub(_mask_middle, _PARTIAL_ANSWER_RE.sub(_mask_middle, head))
+    # Resume blocks become placeholders while the contact regexes run, so they cannot rewrite the digests
+    blocks = []
+    def block(match):
+        blocks.append(_resume_placeholder(match.group(2)))
+        return f"{match.group(1)}\0{len(blocks) - 1}\0{match.group(3)}"
+    prompt = _RESUME_BLOCK_RE.sub(block, prompt)
+    if name == "chunk_translation": prompt = _NUMBERED_LINE_RE.sub(lambda m: m.group(1) + _mask(m.group(2)), prompt)
+    prompt = re.sub(r"\0(\d+)\0", lambda m: blocks[int(m.group(1))], redact_contacts(prompt))
+    return prompt + (hint_sep + _mask(hint) if hint_sep else "")
+
+def redact_response(name: str, response: str) -> str:
+    """Mask resume content in an LLM response, keeping its layout and length."""
+    if "###UPDATED_RESUME###" in response:
+        head, _, resume = response.partition("###UPDATED_RESUME###")
+        response = head + "###UPDATED_RESUME###" + _mask(resume)
+    if name == "chunk_translation":
+        response = _NUMBERED_LINE_RE.sub(lambda m: m.group(1) + _mask(m.group(2)), response)
+    return redact_contacts(response)
+
+
+class ReplayedOutput:
+    """Stands in for a CrewOutput: run_crew_with_retry reads .raw and prompts.record_usage reads .token_usage."""
+
+    def __init__(self, raw, usage):
+        self.raw = raw
+        self.token_usage = SimpleNamespace(**(usage or {}))
+
+    def __str__(self):
+        return self.raw
+
+
+class Cassette:
+    """Records or replays LLM and search calls.
+
+    mode "off" adds one attribute check per call. In "record" mode every call is timed and appended
+    to path. In "replay" mode calls are answered from path, matched by prompt hash and otherwise by
+    call order per task name (so a build with edited prompts still replays), after sleeping the
+    recorded latency times latency_scale. A miss raises CassetteMiss, or goes live with on_miss="live".
+    log_path, in replay mode, receives the new build's request timings for benchmarks/compare_runs.py."""
+
+    def __init__(self, mode="off", path=None, latency_scale=1.0, on_miss="error", log_path=None):
+        self.mode, self.path, self.latency_scale, self.on_miss = mode, path, latency_scale, on_miss
+        self.log_path = path if mode == "record" else log_path
+        self.by_key, self.by_name = {}, {}
+        self.started = time.time()
+        self._out = None
+        self._lock = threading.Lock()
+        if mode == "replay": self.load(path)
+
+    # --- replay index ---
+    def load(self, path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry["kind"] == "request": continue
+                self.by_key.setdefault(entry["key"], deque()).append(entry)
+                self.by_name.setdefault((entry["kind"], entry["name"]), deque()).append(entry)
+        return self
+
+    def _take(self, kind, name, key):
+        with self._lock:
+            for queue in (self.by_key.get(key), self.by_name.get((kind, name))):
+                while queue:
+                    entry = queue.popleft()
+                    if not entry.get("used"):
+                        entry["used"] = True
+                        return entry
+        return None
+
+    # --- writing ---
+    def _write(self, entry):
+        if not self.log_path: return
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._out is None:
+                os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+                self._out = gzip.open(self.log_path, "at", encoding="utf-8")
+            self._out.write(line)
+            self._out.flush()
+
+    def close(self):
+        with self._lock:
+            if self._out is not None: self._out.close(); self._out = None
+
+    # --- boundaries ---
+    def call(self, kind, name, prompt, fn):
+        """Run fn() (the live call) through the cassette. Returns fn's result, or the replayed one."""
+        if self.mode == "off": return fn()
+        key = prompt_key(kind, prompt)
+        if self.mode == "replay":
+            entry = self._take(kind, name, key)
+            if entry is not None:
+                metrics.incr(f"cassette.replayed.{kind}")
+                if self.latency_scale: time.sleep(entry["seconds"] * self.latency_scale)
+                self._add_usage(entry.get("usage"))
+                self._write({"kind": kind, "name": name, "replayed": True, "seconds": round(entry["seconds"] * self.latency_scale, 4)})
+                return ReplayedOutput(entry["response"], entry.get("usage")) if kind == "llm" else entry["response"]
+            metrics.incr(f"cassette.miss.{kind}")
+            if self.on_miss != "live": raise CassetteMiss(f"No recorded {kind} call for {name} ({key})")
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+        usage = _usage_dict(result) if kind == "llm" else None
+        self._add_usage(usage)
+        if self.mode == "replay":
+            self._write({"kind": kind, "name": name, "replayed": False, "seconds": round(seconds, 4), "usage": usage})
+        else:
+            response = str(result.raw) if hasattr(result, "raw") else result
+            if kind == "llm": response = redact_response(name, str(response))
+            self._write({
+                "kind": kind, "name": name, "key": key, "t": round(time.time() - self.started, 3),
+                "seconds": round(seconds, 4), "prompt": redact_prompt(name, prompt), "response": response, "usage": usage,
+            })
+        return result
+
+    def kickoff(self, crew):
+        """crew.kickoff() through the cassette, keyed on the crew's task descriptions."""
+        if self.mode == "off": return crew.kickoff()
+        tasks = getattr(crew, "tasks", None) or []
+        name = getattr(tasks[0], "name", None) if tasks else None
+        prompt = "\n\n".join(str(getattr(task, "description", "")) for task in tasks)
+        return self.call("llm", name if isinstance(name, str) else "other", prompt, crew.kickoff)
+
+    @contextmanager
+    def request(self, endpoint, conversation_id="", message=""):
+        """Log one API request: latency, status and the tokens its LLM calls used."""
+        if self.mode == "off" or not self.log_path:
+            yield
+            return
+        usage = {}
+        token = _request_usage.set(usage)
+        start, status = time.perf_counter(), 200
+        try:
+            yield
+        except Exception as e:
+            status = getattr(e, "status_code", 500)
+            raise
+        finally:
+            _request_usage.reset(token)
+            self._write({
+                "kind": "request", "endpoint": endpoint, "conversation_id": conversation_id,
+                "message": redact_contacts(message), "t": round(time.time() - self.started, 3),
+                "seconds": round(time.perf_counter() - start, 4), "status": status, "usage": usage,
+            })
+
+    def _add_usage(self, usage):
+        totals = _request_usage.get()
+        if totals is None or not usage: return
+        with self._lock:
+            for field, value in usage.items(): totals[field] = totals.get(field, 0) + value
+
+
+class ReplayStore:
+    """Conversation storage for /chat in replay mode: reads go to Firestore once per conversation,
+    writes stay in memory.
+
+    Replayed answers carry masked resumes ("xxxx") and the history they build is synthetic, so
+    writing them would overwrite the real conversations the cassette was recorded from."""
+
+    def __init__(self, store):
+        self.store = store
+        self.history, self.latest = {}, {}
+        self._lock = threading.Lock()
+
+    def get_conversation_history(self, conversation_id):
+        if conversation_id not in self.history:
+            loaded = list(self.store.get_conversation_history(conversation_id))
+            with self._lock: self.history.setdefault(conversation_id, loaded)
+        with self._lock: return list(self.history[conversation_id])
+
+    def update_conversation_history(self, conversation_id, new_entry):
+        self.get_conversation_history(conversation_id)
+        with self._lock: self.history[conversation_id].append(new_entry)
+        metrics.incr("cassette.write_skipped")
+
+    def get_latest_resume(self, conversation_id):
+        if conversation_id not in self.latest:
+            loaded = self.store.get_latest_resume(conversation_id)
+            with self._lock: self.latest.setdefault(conversation_id, loaded)
+        with self._lock:
+            latest = self.latest[conversation_id]
+            return dict(latest) if latest else None
+
+    def save_resume_version(self, conversation_id, original_text, modified_text=None, agent_reasoning=""):
+        previous = self.get_latest_resume(conversation_id)
+        with self._lock:
+            version = ((self.latest.get(conversation_id) or {}).get('version') or 0) + 1
+            self.latest[conversation_id] = {
+                **(previous or {}), 'conversationId': conversation_id, 'version': version, 'original_text': original_text,
+                'modified_text': modified_text if modified_text is not None else original_text, 'agent_reasoning': agent_reasoning,
+            }
+        metrics.incr("cassette.write_skipped")
+        return version
+
+
+def _usage_dict(result):
+    usage = getattr(result, "token_usage", None)
+    fields = ("prompt_tokens", "cached_prompt_tokens", "completion_tokens")
+    return {f: getattr(usage, f) for f in fields if isinstance(getattr(usage, f, None), int)}
+
+# Global cassette (off unless CASSETTE_MODE is "record" or "replay")
+cassette = Cassette(
+    mode=config.CASSETTE_MODE, path=config.CASSETTE_PATH, latency_scale=config.REPLAY_LATENCY_SCALE,
+    on_miss=config.REPLAY_ON_MISS, log_path=config.REPLAY_LOG_PATH,
+)
+atexit.register(cassette.close)
@@ -30,3 +30,152 @@ ROUTER_MODEL_NAME = 'groq/llama-3.1-8b-instant'
 
 # Synthesizer uses same model for now
 SYNTHESIZER_MODEL_NAME = 'groq/llama-3.1-8b-instant'
+
+# --- Routing Config ---
+# How /chat picks and runs agents:
+#   'sequential'  - router call, then specialist calls (the original two-step flow)
+#   'combined'    - the router completes single-agent job matching / section enhancement inline
+#   'speculative' - guess the specialist from keywords and run it in parallel with the router
+ROUTING_MODE = os.getenv("ROUTING_MODE", "sequential")
+SPECULATION_WORKERS = int(os.getenv("SPECULATION_WORKERS", "4"))
+
+# --- Batch Matching Config ---
+# Concurrent score-only job_matcher calls per /batch/match request, and the largest batch accepted.
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+BATCH_MAX_PAIRS = int(os.getenv("BATCH_MAX_PAIRS", "1000"))
+
+# --- Local Scoring Config ---
+# Optional CPU sentence-embedding model (e.g. 'all-MiniLM-L6-v2') blended into local match scores.
+# Needs sentence-transformers installed; leave empty for pure TF-IDF/BM25 scoring.
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "")
+# IDF corpus for local scoring: original resumes read at startup (0, the default, disables it: every worker
+# reads the resumes collection); uploads and batch job descriptions are added either way
+SCORING_CORPUS_MAX_DOCS = int(os.getenv("SCORING_CORPUS_MAX_DOCS", "0"))
+# Distinct documents counted in the IDF weights; past this the oldest drop out. Weights are used from SCORING_MIN_CORPUS documents
+SCORING_CORPUS_WINDOW = int(os.getenv("SCORING_CORPUS_WINDOW", "5000"))
+SCORING_MIN_CORPUS = int(os.getenv("SCORING_MIN_CORPUS", "20"))
+
+# --- Semantic Cache Config ---
+# Reuse agent results for paraphrased queries against the same resume version (opt-in: watch the
+# false-hit audit at /cache/semantic/audit before relying on it)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+# Minimum cosine similarity of two queries' local embeddings; their terms must also pair up role by role
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.75"))
+# Total size of cached agent outputs, least recently used resume/agent scopes are evicted first
+SEMANTIC_CACHE_MAX_BYTES = int(os.getenv("SEMANTIC_CACHE_MAX_BYTES", str(64 * 2**20)))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+
+# --- Admission Control Config ---
+# Fair sharing of the Groq quota between tenants (API key, or conversation id when no key is sent).
+ADMISSION_MAX_CONCURRENT_LLM = int(os.getenv("ADMISSION_MAX_CONCURRENT_LLM", "4"))
+ADMISSION_TENANT_CONCURRENCY = int(os.getenv("ADMISSION_TENANT_CONCURRENCY", "2"))
+ADMISSION_TENANT_MAX_REQUESTS = int(os.getenv("ADMISSION_TENANT_MAX_REQUESTS", "4"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "30"))
+# Batch LLM calls waiting this long are served like interactive ones, so batch work is never starved
+ADMISSION_BATCH_AGING_SECONDS = float(os.getenv("ADMISSION_BATCH_AGING_SECONDS", "15"))
+
+# --- Startup Config ---
+# Warm Firestore, LLM clients, Tavily and CrewAI in the background as soon as the server starts.
+# /ready reports progress and returns 503 until everything is initialized.
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+
+# --- Session Cache Config ---
+# Active conversations are kept in memory; history writes are batched and flushed in the background.
+# Off by default: the cache is per worker, so it is only safe with one worker or sticky sessions
+SESSION_CACHE_ENABLED = os.getenv("SESSION_CACHE_ENABLED", "false").lower() == "true"
+SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", "900"))
+SESSION_CACHE_MAX_BYTES = int(os.getenv("SESSION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+SESSION_CACHE_FLUSH_INTERVAL = float(os.getenv("SESSION_CACHE_FLUSH_INTERVAL", "1.0"))
+# History writes failing this many flushes in a row are dropped (deleted conversations are dropped at once)
+SESSION_CACHE_FLUSH_MAX_ATTEMPTS = int(os.getenv("SESSION_CACHE_FLUSH_MAX_ATTEMPTS", "30"))
+
+# --- Hallucination Verifier Config ---
+# Local check for skills/numbers added by a rewrite; only violations trigger an LLM repair pass.
+VERIFIER_ENABLED = os.getenv("VERIFIER_ENABLED", "true").lower() == "true"
+VERIFIER_CHECK_NUMBERS = os.getenv("VERIFIER_CHECK_NUMBERS", "true").lower() == "true"
+SKILL_TAXONOMY_PATH = os.getenv("SKILL_TAXONOMY_PATH") or None
+
+# --- Translation Config ---
+# Translate section-aligned chunks concurrently instead of the whole resume in one call
+TRANSLATION_CHUNKED = os.getenv("TRANSLATION_CHUNKED", "true").lower() == "true"
+TRANSLATION_WORKERS = int(os.getenv("TRANSLATION_WORKERS", "4"))
+TRANSLATION_CHUNK_CHARS = int(os.getenv("TRANSLATION_CHUNK_CHARS", "1500"))
+TRANSLATION_MEMORY_SIZE = int(os.getenv("TRANSLATION_MEMORY_SIZE", "5000"))
+# The memory is partitioned by tenant; least recently used (tenant, language) scopes are dropped past this
+TRANSLATION_MEMORY_SCOPES = int(os.getenv("TRANSLATION_MEMORY_SCOPES", "1000"))
+# One web search per chunked translation for the target market's resume conventions, trimmed and sent with every chunk
+TRANSLATION_CONVENTIONS_SEARCH = os.getenv("TRANSLATION_CONVENTIONS_SEARCH", "true").lower() == "true"
+TRANSLATION_CONVENTIONS_CHARS = int(os.getenv("TRANSLATION_CONVENTIONS_CHARS", "1200"))
+
+# --- Prompt Config ---
+# "v2" orders every prompt static instructions -> resume -> user message so providers can cache the prefix; "v1" is the original layout;
+# "v3" is v2 asking for the brief, tag-closed answers the output budgets are sized for
+PROMPT_VERSION = os.getenv("PROMPT_VERSION", "v3")
+
+# --- Record/Replay Config ---
+# "record" writes LLM/search calls and request timings to CASSETTE_PATH; "replay" serves calls from it
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off")
+CASSETTE_PATH = os.getenv("CASSETTE_PATH", "cassettes/traffic.jsonl.gz")
+REPLAY_LATENCY_SCALE = float(os.getenv("REPLAY_LATENCY_SCALE", "1.0"))   # 0 = no sleeping
+REPLAY_ON_MISS = os.getenv("REPLAY_ON_MISS", "error")                     # or "live"
+REPLAY_LOG_PATH = os.getenv("REPLAY_LOG_PATH") or None                    # request timings of the replayed build
+
+# --- Admin Config ---
+# Key for /admin/* endpoints (sent as X-Admin-Key); admin endpoints are disabled while unset
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "")
+
+# --- Search Index Config ---
+# Index only each conversation's latest version (default) or every version
+SEARCH_INDEX_ALL_VERSIONS = os.getenv("SEARCH_INDEX_ALL_VERSIONS", "false").lower() == "true"
+# The index is in memory and per worker. It is built from Firestore in the background, at startup when this
+# is on, otherwise on the worker's first /search, which answers 503 until the build finishes (so results are
+# never partial). Later saves update it incrementally either way
+SEARCH_INDEX_BOOTSTRAP = os.getenv("SEARCH_INDEX_BOOTSTRAP", "false").lower() == "true"
+
+# --- Retention Config ---
+# Background job that archives and deletes cold data (also runnable via POST /admin/retention/run)
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "false").lower() == "true"
+RETENTION_INTERVAL_HOURS = float(os.getenv("RETENTION_INTERVAL_HOURS", "24"))
+# Resume versions kept per conversation besides the original
+RETENTION_KEEP_VERSIONS = int(os.getenv("RETENTION_KEEP_VERSIONS", "10"))
+RETENTION_KEEP_HISTORY = int(os.getenv("RETENTION_KEEP_HISTORY", "200"))
+# Conversations idle this long are archived and deleted (0 disables aging out)
+RETENTION_IDLE_DAYS = int(os.getenv("RETENTION_IDLE_DAYS", "180"))
+RETENTION_ARCHIVE_DIR = os.getenv("RETENTION_ARCHIVE_DIR", "archive")
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "200"))
+RETENTION_PAUSE_SECONDS = float(os.getenv("RETENTION_PAUSE_SECONDS", "0.1"))
+
+# --- Idempotency Config ---
+# Idempotency-Key header on /chat and /upload: duplicates join the running request or get its stored result
+IDEMPOTENCY_ENABLED = os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "3600"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "2000"))
+# How long a duplicate waits for the original request before getting a 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "300"))
+
+# --- Response Size Config ---
+# gzip (or brotli, when the brotli package is installed) for responses of at least this many bytes
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1000"))
+# A resume patch is sent instead of the full text only if smaller than this fraction of it
+PATCH_MAX_RATIO = float(os.getenv("PATCH_MAX_RATIO", "0.7"))
+
+# --- Upload Precompute Config ---
+# Analyze uploaded resumes in the background (sections, weak bullets, scoring caches) for the first turn.
+# Opt-in: every upload then costs CPU in this worker even if no chat turn follows, and the analyses are
+# per worker, so they only pay off with sticky sessions or a single worker
+PRECOMPUTE_ENABLED = os.getenv("PRECOMPUTE_ENABLED", "false").lower() == "true"
+PRECOMPUTE_WORKERS = int(os.getenv("PRECOMPUTE_WORKERS", "1"))
+# How long job_matcher waits for an upload's precompute (which may queue behind other uploads) before going without it
+PRECOMPUTE_WAIT_SECONDS = float(os.getenv("PRECOMPUTE_WAIT_SECONDS", "2"))
+
+# --- Output Budget Config ---
+# Per-call max output tokens sized from the input, a stop sequence after the resume, and a deadline
+OUTPUT_BUDGETS_ENABLED = os.getenv("OUTPUT_BUDGETS_ENABLED", "true").lower() == "true"
+OUTPUT_MAX_TOKENS = int(os.getenv("OUTPUT_MAX_TOKENS", "8192"))
+# Continuation requests for an answer cut off by its budget (0 keeps the cut-off answer)
+OUTPUT_MAX_CONTINUATIONS = int(os.getenv("OUTPUT_MAX_CONTINUATIONS", "2"))
+# Deadline = base + max tokens / tokens per second, capped
+OUTPUT_TOKENS_PER_SECOND = float(os.getenv("OUTPUT_TOKENS_PER_SECOND", "100"))
+AGENT_DEADLINE_BASE_SECONDS = float(os.getenv("AGENT_DEADLINE_BASE_SECONDS", "20"))
+AGENT_DEADLINE_MAX_SECONDS = float(os.getenv("AGENT_DEADLINE_MAX_SECONDS", "180"))
@@ -1,56 +1,107 @@
 # firebase_utils.py
 import uuid
-from google.cloud import firestore
+import threading
 
-db = firestore.Client()
+_client = None
+_client_lock = threading.Lock()
+_resume_saved_listeners = []
+
+def on_resume_saved(listener):
+    """Register listener(conversation_id, version, modified_text), called after every saved resume version."""
+    _resume_saved_listeners.append(listener)
+
+def _firestore():
+    """The google.cloud.firestore module, imported on first use."""
+    from google.cloud import firestore
+    return firestore
+
+def get_client():
+    """Firestore client, created on first use so imports never need credentials (thread-safe)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None: _client = _firestore().Client()
+    return _client
 
 def create_new_conversation():
     conversation_id = str(uuid.uuid4())
-    conversation_ref = db.collection('conversations').document(conversation_id)
-    conversation_ref.set({'history': [], 'created_at': firestore.SERVER_TIMESTAMP})
+    conversation_ref = get_client().collection('conversations').document(conversation_id)
+    conversation_ref.set({'history': [], 'created_at': _firestore().SERVER_TIMESTAMP, 'updated_at': _firestore().SERVER_TIMESTAMP})
     return conversation_id
 
 def get_conversation_history(conversation_id: str):
-    doc = db.collection('conversations').document(conversation_id).get()
+    doc = get_client().collection('conversations').document(conversation_id).get()
     return doc.to_dict().get('history', []) if doc.exists else []
 
 def update_conversation_history(conversation_id: str, new_entry: dict):
-    db.collection('conversations').document(conversation_id).update({
-        'history': firestore.ArrayUnion([new_entry])
+    get_client().collection('conversations').document(conversation_id).update({
+        'history': _firestore().ArrayUnion([new_entry]), 'updated_at': _firestore().SERVER_TIMESTAMP
+    })
+
+def append_conversation_history(conversation_id: str, new_entries: list):
+    """Append several history entries in one write."""
+    get_client().collection('conversations').document(conversation_id).update({
+        'history': _firestore().ArrayUnion(new_entries), 'updated_at': _firestore().SERVER_TIMESTAMP
     })
 
 def save_resume_version(conversation_id: str, original_text: str, modified_text: str = None, agent_reasoning: str = ""):
-    query = db.collection('resumes').where('conversationId', '==', conversation_id).order_by('version', direction=firestore.Query.DESCENDING).limit(1)
+    query = get_client().collection('resumes').where('conversationId', '==', conversation_id).order_by('version', direction=_firestore().Query.DESCENDING).limit(1)
     docs = list(query.stream())
     new_version = docs[0].to_dict().get('version', 0) + 1 if docs else 1
     
-    db.collection('resumes').document().set({
+    get_client().collection('resumes').document().set({
         'conversationId': conversation_id,
         'version': new_version,
         'original_text': original_text,
         'modified_text': modified_text if modified_text is not None else original_text,
         'agent_reasoning': agent_reasoning,
-        'timestamp': firestore.SERVER_TIMESTAMP
+        'timestamp': _firestore().SERVER_TIMESTAMP
     })
+    for listener in _resume_saved_listeners:
+        try: listener(conversation_id, new_version, modified_text if modified_text is not None else original_text)
+        except Exception as e: print(f"Resume saved listener failed for {conversation_id}: {e}")
     return new_version
 
 def get_latest_resume(conversation_id: str):
-    query = db.collection('resumes').where('conversationId', '==', conversation_id).order_by('version', direction=firestore.Query.DESCENDING).limit(1)
+    query = get_client().collection('resumes').where('conversationId', '==', conversation_id).order_by('version', direction=_firestore().Query.DESCENDING).limit(1)
     docs = list(query.stream())
     return docs[0].to_dict() if docs else None
 
+def stream_resumes():
+    """Every stored resume version (conversationId, version, modified_text), streamed."""
+    query = get_client().collection('resumes').select(['conversationId', 'version', 'modified_text'])
+    for doc in query.stream(): yield doc.to_dict()
+
+def stream_latest_resumes(batch_size: int = 200):
+    """Each conversation's latest resume version (conversationId, version, modified_text), streamed.
+    Only version numbers are read for every document; text is fetched for the latest ones alone."""
+    latest = {}
+    for doc in get_client().collection('resumes').select(['conversationId', 'version']).stream():
+        data = doc.to_dict()
+        cid, version = data.get('conversationId'), data.get('version', 0)
+        if cid not in latest or version > latest[cid][0]: latest[cid] = (version, doc.reference)
+    refs = [ref for _, ref in latest.values()]
+    for i in range(0, len(refs), batch_size):
+        for doc in get_client().get_all(refs[i:i + batch_size], field_paths=['conversationId', 'version', 'modified_text']):
+            if doc.exists: yield doc.to_dict()
+
+def stream_original_resumes(limit: int):
+    """The uploaded text of up to limit conversations (their version 1), streamed."""
+    query = get_client().collection('resumes').where('version', '==', 1).select(['original_text']).limit(limit)
+    for doc in query.stream(): yield doc.to_dict().get('original_text', '')
+
 # --- NEW FUNCTIONS TO FIX ERROR 1 ---
 def get_all_resume_versions(conversation_id: str):
-    query = db.collection('resumes').where('conversationId', '==', conversation_id).order_by('version')
+    query = get_client().collection('resumes').where('conversationId', '==', conversation_id).order_by('version')
     return [doc.to_dict() for doc in query.stream()]
 
 def revert_to_version(conversation_id: str, version: int):
-    query = db.collection('resumes').where('conversationId', '==', conversation_id).where('version', '==', version).limit(1)
+    query = get_client().collection('resumes').where('conversationId', '==', conversation_id).where('version', '==', version).limit(1)
     docs = list(query.stream())
     if not docs: return None
 
     version_to_revert = docs[0].to_dict()
-    first_version_query = db.collection('resumes').where('conversationId', '==', conversation_id).order_by('version').limit(1)
+    first_version_query = get_client().collection('resumes').where('conversationId', '==', conversation_id).order_by('version').limit(1)
     original_text = list(first_version_query.stream())[0].to_dict().get('original_text', '')
 
     save_resume_version(
@@ -60,3 +111,72 @@ def revert_to_version(conversation_id: str, version: int):
         agent_reasoning=f"Reverted to version {version}."
     )
     return get_latest_resume(conversation_id)
+
+# --- BATCH JOB CHECKPOINTS ---
+def get_batch_results(batch_id: str):
+    """Completed results of a batch job, keyed by pair key."""
+    results = get_client().collection('batch_jobs').document(batch_id).collection('results').stream()
+    return {doc.id: doc.to_dict() for doc in results}
+
+def save_batch_result(batch_id: str, pair_key: str, result: dict):
+    batch_ref = get_client().collection('batch_jobs').document(batch_id)
+    batch_ref.set({'updated_at': _firestore().SERVER_TIMESTAMP}, merge=True)
+    batch_ref.collection('results').document(pair_key).set(result)
+
+# --- RETENTION ---
+def stream_conversations():
+    """Every conversation as (conversation_id, data), streamed."""
+    for doc in get_client().collection('conversations').stream(): yield doc.id, doc.to_dict()
+
+def stream_resume_refs():
+    """(document id, conversationId, version) of every stored resume version, without the texts."""
+    for doc in get_client().collection('resumes').select(['conversationId', 'version']).stream():
+        data = doc.to_dict()
+        yield doc.id, data.get('conversationId'), data.get('version', 0)
+
+def get_resumes(doc_ids: list):
+    """Full resume documents by document id."""
+    refs = [get_client().collection('resumes').document(doc_id) for doc_id in doc_ids]
+    return {doc.id: doc.to_dict() for doc in get_client().get_all(refs) if doc.exists}
+
+def get_conversation_resumes(conversation_id: str):
+    """Every resume version of a conversation, keyed by document id."""
+    query = get_client().collection('resumes').where('conversationId', '==', conversation_id)
+    return {doc.id: doc.to_dict() for doc in query.stream()}
+
+def delete_resumes(doc_ids: list):
+    """Delete resume documents in batched writes (at most 500 per commit)."""
+    for start in range(0, len(doc_ids), 500):
+        batch = get_client().batch()
+        for doc_id in doc_ids[start:start + 500]: batch.delete(get_client().collection('resumes').document(doc_id))
+        batch.commit()
+
+def trim_conversation_history(conversation_id: str, keep: int):
+    """Keep only the last `keep` history entries, in a transaction so concurrent appends are not lost. Returns the dropped entries."""
+    client = get_client()
+    ref = client.collection('conversations').document(conversation_id)
+
+    @_firestore().transactional
+    def trim(transaction):
+        snapshot = ref.get(transaction=transaction)
+        history = snapshot.to_dict().get('history', []) if snapshot.exists else []
+        if len(history) <= keep: return []
+        transaction.update(ref, {'history': history[len(history) - keep:]})
+        return history[:len(history) - keep]
+    return trim(client.transaction())
+
+def delete_conversation_if_idle(conversation_id: str, idle_before):
+    """Delete a conversation unless it was active after idle_before (re-checked in a transaction). Returns whether it was deleted."""
+    client = get_client()
+    ref = client.collection('conversations').document(conversation_id)
+
+    @_firestore().transactional
+    def delete(transaction):
+        snapshot = ref.get(transaction=transaction)
+        if not snapshot.exists: return False
+        data = snapshot.to_dict()
+        last_active = data.get('updated_at') or data.get('created_at')
+        if last_active is None or last_active >= idle_before: return False
+        transaction.delete(ref)
+        return True
+    return delete(client.transaction())
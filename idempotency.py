@@ -0,0 +1,98 @@
+import time
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+import config
+from metrics import metrics
+
+# Idempotency keys for endpoints whose retries are expensive (/chat runs the agent chain and saves a
+# resume version; /upload creates a conversation). The first request with a key runs; a duplicate
+# that arrives while it is running waits for the same outcome (single-flight); one that arrives
+# after it finished gets the stored result until the key expires. Failures are not stored, so a
+# retry after an error runs again. Keys live in this worker's memory, like the session cache.
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyConflict(ValueError):
+    pass
+
+
+class IdempotencyInProgress(TimeoutError):
+    pass
+
+
+def fingerprint(*parts) -> str:
+    """Hash of the request payload, to detect a key reused for a different request."""
+    return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("fingerprint", "done", "result", "error", "expires_at")
+
+    def __init__(self, fingerprint):
+        self.fingerprint, self.done = fingerprint, threading.Event()
+        self.result = self.error = None
+        self.expires_at = float("inf")
+
+
+class IdempotencyStore:
+    def __init__(self, ttl_seconds=3600, max_entries=2000, wait_seconds=300):
+        self.ttl_seconds, self.max_entries, self.wait_seconds = ttl_seconds, max_entries, wait_seconds
+        self.entries = OrderedDict()    # (scope, key) -> _Flight, finished ones in completion order
+        self._lock = threading.Lock()
+
+    def run(self, scope: str, key: str, request_fingerprint: str, fn):
+        """Run fn() once per (scope, key). Returns (result, replayed)."""
+        if len(key) > MAX_KEY_LENGTH: raise IdempotencyConflict(f"Idempotency-Key longer than {MAX_KEY_LENGTH} characters.")
+        entry_key = (scope, key)
+        with self._lock:
+            self._expire(time.monotonic())
+            flight = self.entries.get(entry_key)
+            if flight is not None and flight.fingerprint != request_fingerprint:
+                metrics.incr("idempotency.conflict")
+                raise IdempotencyConflict("Idempotency-Key was already used for a different request.")
+            leader = flight is None
+            if leader: flight = self.entries[entry_key] = _Flight(request_fingerprint)
+
+        if not leader:
+            metrics.incr("idempotency.replayed" if flight.done.is_set() else "idempotency.joined")
+            if not flight.done.wait(self.wait_seconds): raise IdempotencyInProgress("The original request is still running.")
+            if flight.error is not None: raise flight.error
+            return flight.result, True
+
+        metrics.incr("idempotency.executed")
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                if self.entries.get(entry_key) is flight: del self.entries[entry_key]
+            raise
+        finally:
+            with self._lock:
+                flight.expires_at = time.monotonic() + self.ttl_seconds
+                if self.entries.get(entry_key) is flight: self.entries.move_to_end(entry_key)
+            flight.done.set()
+        return flight.result, False
+
+    def _expire(self, now):
+        # Finished entries are kept in completion order (running ones are skipped), so expired ones come first;
+        # also makes room for one new key
+        for entry_key, flight in list(self.entries.items()):
+            if not flight.done.is_set(): continue
+            if flight.expires_at > now and len(self.entries) < self.max_entries: break
+            del self.entries[entry_key]
+
+    def stats(self):
+        with self._lock:
+            running = sum(1 for f in self.entries.values() if not f.done.is_set())
+            return {"keys": len(self.entries), "in_flight": running}
+
+# Global idempotency store
+idempotency = IdempotencyStore(
+    ttl_seconds=config.IDEMPOTENCY_TTL_SECONDS, max_entries=config.IDEMPOTENCY_MAX_ENTRIES,
+    wait_seconds=config.IDEMPOTENCY_WAIT_SECONDS,
+)
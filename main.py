@@ -1,16 +1,86 @@
-import io, pypdf, docx, json, time
-from fastapi import FastAPI, UploadFile, File, HTTPException
+import io, json, time, uuid, hmac, hashlib, threading, contextvars, functools
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, HTTPException, Header, Response, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
 from pydantic import BaseModel
-from crewai import Crew
-from litellm.exceptions import RateLimitError
+from concurrent.futures import ThreadPoolExecutor
 
+import config
 import firebase_utils as db
-from agents import create_router_agent, create_company_researcher_agent, create_job_matcher_agent, create_section_enhancer_agent, create_translation_agent
-from tasks import create_routing_task, create_task
+from agents import create_router_agent, create_company_researcher_agent, create_job_matcher_agent, create_section_enhancer_agent, create_translation_agent, create_synthesizer_agent
+from tasks import create_routing_task, create_combined_routing_task, create_specialist_task, create_match_scoring_task, create_repair_task, create_chunk_translation_task, create_continuation_task
+from batch import build_pairs, run_batch
+from rate_limit_handler import rate_limiter, is_rate_limit_error
+from warmup import warmup
+from session_cache import session_cache
+from routing import parse_route_output, speculation_target, is_score_only, is_local_score_question, find_job_description
+from scoring import scoring_engine, keyword_gap_hint
+from semantic_cache import semantic_cache
+from admission import scheduler, run_as, current_tenant
+from metrics import metrics
+from prompts import record_usage, usage_report
+from cassette import cassette, ReplayStore
+from profiler import profiler
+from verifier import verifier, allowed_source, UNVERIFIED_AGENTS
+from translation import ChunkedTranslator, translation_memory, detect_language
+from search_index import search_index, QuerySyntaxError
+from retention import retention
+from idempotency import idempotency, fingerprint, IdempotencyConflict, IdempotencyInProgress
+from resume_patch import resume_delta
+from compression import CompressionMiddleware
+from precompute import precomputer
+from tools import web_search
+from budgets import budget_for, apply_budget, is_truncated, stitch, is_timeout_error, END_RESUME_TAG
 
-app = FastAPI(title="Conversational Resume Optimization System API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.WARMUP_ON_STARTUP: warmup.start()
+    if config.SEARCH_INDEX_BOOTSTRAP: start_search_bootstrap()
+    if config.SCORING_CORPUS_MAX_DOCS: start_scoring_corpus()
+    if config.RETENTION_ENABLED: retention.start(config.RETENTION_INTERVAL_HOURS * 3600)
+    yield
+    retention.stop()
+    session_cache.flush()
 
+app = FastAPI(title="Conversational Resume Optimization System API", lifespan=lifespan)
+
+_search_bootstrap_lock = threading.Lock()
+_search_bootstrap_thread = None
+
+def start_search_bootstrap():
+    """Build this worker's search index from the stored resumes in the background (once; again after a failure).
+    Saves meanwhile are indexed as they happen."""
+    global _search_bootstrap_thread
+    def run():
+        try:
+            resumes = db.stream_resumes() if config.SEARCH_INDEX_ALL_VERSIONS else db.stream_latest_resumes()
+            with metrics.timer("search_index.bootstrap_seconds"): search_index.bootstrap(resumes)
+        except Exception as e:
+            metrics.incr("search_index.bootstrap_failed")
+            print(f"Search index bootstrap failed: {e}")
+    with _search_bootstrap_lock:
+        if search_index.loaded or (_search_bootstrap_thread is not None and _search_bootstrap_thread.is_alive()): return
+        _search_bootstrap_thread = threading.Thread(target=run, name="search-bootstrap", daemon=True)
+        _search_bootstrap_thread.start()
+
+def start_scoring_corpus():
+    """Learn local scoring IDF weights from stored resumes in the background; until then terms weigh 1."""
+    def run():
+        try:
+            with metrics.timer("scoring.corpus_seconds"):
+                batch = []
+                for text in db.stream_original_resumes(config.SCORING_CORPUS_MAX_DOCS):
+                    batch.append(text)
+                    if len(batch) == 500: scoring_engine.add_documents(batch); batch = []
+                scoring_engine.add_documents(batch)
+        except Exception as e:
+            print(f"Scoring corpus load failed: {e}")
+    threading.Thread(target=run, name="scoring-corpus", daemon=True).start()
+
+if config.COMPRESSION_ENABLED: app.add_middleware(CompressionMiddleware, minimum_size=config.COMPRESSION_MIN_BYTES)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"],
@@ -19,19 +89,61 @@ app.add_middleware(
 class ChatRequest(BaseModel):
     conversation_id: str
     message: str
+    base_version: int | None = None  # resume version the client holds: the response then carries a patch against it
 
 class ChatResponse(BaseModel):
-    conversation_id: str; agent_response: str; reasoning: str; updated_resume: str
+    conversation_id: str; agent_response: str; reasoning: str | None = None; updated_resume: str | None = None
     match_score: float | None = None; skill_gaps: list[str] | None = None
+    resume_version: int | None = None; base_version: int | None = None; resume_patch: list | None = None
     
 class UploadResponse(BaseModel):
     conversation_id: str; resume_text: str; message: str
+    resume_version: int | None = None
+
+class BatchMatchRequest(BaseModel):
+    job_descriptions: list[str]
+    resumes: list[str] = []; conversation_ids: list[str] = []
+    batch_id: str | None = None
+    mode: str = "llm"  # 'llm' = score-only job_matcher, 'local' = deterministic keyword scoring
+
+class ProfileRequest(BaseModel):
+    method: str = "sample"  # 'sample' = stack sampling (collapsed stacks), 'cprofile' = deterministic, one request at a time
+    sample_rate: float = 0.1
+    seconds: float | None = None  # run for N seconds, profiling every request meanwhile
+    interval_ms: float = 5.0
+
+# Looked up at call time so the module-level factories stay patchable
+AGENT_CREATORS = {
+    "company_researcher": lambda: create_company_researcher_agent(),
+    "job_matcher": lambda: create_job_matcher_agent(),
+    "section_enhancer": lambda: create_section_enhancer_agent(),
+    "translation": lambda: create_translation_agent(),
+}
+
+# Conversation storage for /chat: the write-behind session cache, or Firestore directly. Replays read
+# Firestore but keep their writes in memory
+sessions = ReplayStore(db) if config.CASSETTE_MODE == "replay" else session_cache if config.SESSION_CACHE_ENABLED else db
+
+# Worker pool for specialist runs launched speculatively alongside the router
+speculation_pool = ThreadPoolExecutor(max_workers=config.SPECULATION_WORKERS)
+# Set in a speculative run's context; once the router disagrees, no further LLM call is started
+speculation_cancelled = contextvars.ContextVar("speculation_cancelled", default=None)
+
+class SpeculationCancelled(Exception):
+    pass
+
+def Crew(**kwargs):
+    """Build a crewai Crew, importing crewai on first use."""
+    from crewai import Crew as CrewAICrew
+    return CrewAICrew(**kwargs)
 
 def parse_resume(file: UploadFile) -> str:
     text, content_type, file_content = "", file.content_type, file.file.read()
     if content_type == 'application/pdf':
+        import pypdf
         for page in pypdf.PdfReader(io.BytesIO(file_content)).pages: text += page.extract_text()
     elif content_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
+        import docx
         for para in docx.Document(io.BytesIO(file_content)).paragraphs: text += para.text + '\n'
     else: raise HTTPException(status_code=400, detail="Unsupported file type.")
     return text
@@ -41,7 +153,7 @@ def parse_agent_output(result: str):
     if '###UPDATED_RESUME###' in result:
         parts = result.split('###UPDATED_RESUME###')
         reasoning = parts[0].strip()
-        updated_resume = parts[1].strip() if len(parts) > 1 else ""
+        updated_resume = parts[1].split(END_RESUME_TAG)[0].strip() if len(parts) > 1 else ""
     if '###SKILL_GAPS###' in reasoning:
         gap_parts = reasoning.split('###SKILL_GAPS###')
         reasoning = gap_parts[0].strip()
@@ -55,12 +167,29 @@ def parse_agent_output(result: str):
 # --- NEW HELPER FUNCTION FOR RATE LIMITING ---
 def run_crew_with_retry(crew, max_retries=3):
     """Run a crew with automatic retry on rate limit errors."""
+    return kickoff_with_retry(crew, max_retries)[0]
+
+def kickoff_with_retry(crew, max_retries=3):
+    """run_crew_with_retry, also returning the completion tokens the provider reported (0 if none)."""
     for attempt in range(max_retries):
         try:
-            result = crew.kickoff()
+            with scheduler.slot(), profiler.stage("llm"):
+                cancelled = speculation_cancelled.get()
+                if cancelled is not None and cancelled.is_set(): raise SpeculationCancelled()
+                result = cassette.kickoff(crew)
+            completion_tokens = record_usage(crew, result)
             # Handle new CrewAI output format
-            return str(result.raw) if hasattr(result, 'raw') else str(result)
-        except RateLimitError as e:
+            return (str(result.raw) if hasattr(result, 'raw') else str(result)), completion_tokens
+        except (HTTPException, SpeculationCancelled):
+            # Admission rejections (429 + Retry-After) pass through untouched
+            raise
+        except Exception as e:
+            if is_timeout_error(e):
+                metrics.incr("budget.deadline_exceeded")
+                raise HTTPException(status_code=504, detail="The agent did not finish within its time limit. Please try again.")
+            if not is_rate_limit_error(e):
+                # Catch any other unexpected errors during kickoff
+                raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {e}")
             if attempt < max_retries - 1:
                 wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
                 print(f"Rate limit hit. Waiting {wait_time}s before retry {attempt + 1}/{max_retries}...")
@@ -70,61 +199,385 @@ def run_crew_with_retry(crew, max_retries=3):
                     status_code=429,
                     detail="Rate limit exceeded after multiple retries. Please wait a moment and try again."
                 )
-        except Exception as e:
-            # Catch any other unexpected errors during kickoff
-            raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {e}")
 
+def run_budgeted(agent, task, input_chars: int) -> str:
+    """Run one agent's task under the output budget of its prompt. An answer cut off by the budget is
+    continued from where it stopped (up to OUTPUT_MAX_CONTINUATIONS times) instead of rerun."""
+    if not config.OUTPUT_BUDGETS_ENABLED: return run_crew_with_retry(Crew(agents=[agent], tasks=[task]))
+    budget = budget_for(task.name, input_chars)
+    apply_budget(agent, budget)
+    output, completion_tokens = kickoff_with_retry(Crew(agents=[agent], tasks=[task]))
+    for attempt in range(config.OUTPUT_MAX_CONTINUATIONS + 1):
+        if not is_truncated(output, completion_tokens, budget): break
+        metrics.incr(f"budget.{budget.name}.truncated")
+        if attempt == config.OUTPUT_MAX_CONTINUATIONS: break
+        metrics.incr(f"budget.{budget.name}.continued")
+        more, completion_tokens = kickoff_with_retry(Crew(agents=[agent], tasks=[create_continuation_task(agent, task, output)]))
+        output = stitch(output, more)
+    return output
+
+
+def run_agent(agent_type: str, message: str, current_resume: str) -> str:
+    """Run a single specialist agent on the current resume and return its raw output."""
+    if config.SEMANTIC_CACHE_ENABLED:
+        cached = semantic_cache.lookup(current_resume, agent_type, message)
+        if cached is not None: return cached
+    language = detect_language(message) if agent_type == "translation" and config.TRANSLATION_CHUNKED else None
+    if language:
+        with metrics.timer(f"agent.{agent_type}.seconds"):
+            result = run_chunked_translation(current_resume, language)
+    else:
+        with profiler.stage("prompt_assembly"):
+            agent = AGENT_CREATORS[agent_type]()
+            hint = resume_hint(agent_type, current_resume, message)
+            task = create_specialist_task(agent, agent_type, message, current_resume, hint)
+        with metrics.timer(f"agent.{agent_type}.seconds"):
+            result = run_budgeted(agent, task, len(current_resume))
+    if config.SEMANTIC_CACHE_ENABLED: semantic_cache.store(current_resume, agent_type, message, result)
+    return result
+
+def resume_hint(agent_type: str, current_resume: str, message: str) -> str:
+    """Deterministic analysis handed to the agent so it can skip rediscovering it."""
+    if agent_type == "job_matcher":
+        # Waits for (and counts) the upload precompute, which warmed the scoring caches for this resume
+        if config.PRECOMPUTE_ENABLED: precomputer.wait(current_resume, config.PRECOMPUTE_WAIT_SECONDS)
+        return keyword_gap_hint(current_resume, message)
+    if agent_type == "section_enhancer" and config.PRECOMPUTE_ENABLED: return precomputer.hint(current_resume)
+    return ""
+
+def translate_chunk(language: str, glossary: str, numbered_lines: str) -> str:
+    """One chunk of a chunked translation; input and output tokens are reserved up front."""
+    rate_limiter.acquire(estimated_tokens=len(numbered_lines) // 2 + len(glossary) // 4 + 400)
+    agent = create_translation_agent(with_search=False)
+    return run_budgeted(agent, create_chunk_translation_task(agent, language, glossary, numbered_lines), len(numbered_lines))
+
+def market_conventions(language: str) -> str:
+    """Resume conventions for the target market from one web search, shared by every chunk of the
+    request. A failed search only costs the notes; the chunks still translate."""
+    if not config.TRANSLATION_CONVENTIONS_SEARCH: return ""
+    try:
+        with metrics.timer("translation.conventions_seconds"):
+            found = web_search(f"{language} resume CV conventions: format, sections, personal details, dates")
+    except Exception as e:
+        metrics.incr("translation.conventions_failed")
+        print(f"Conventions search failed: {e}")
+        return ""
+    if isinstance(found, dict): found = "\n".join(r.get("content", "") for r in found.get("results", []))
+    return " ".join(str(found).split())[:config.TRANSLATION_CONVENTIONS_CHARS]
+
+translator = ChunkedTranslator(
+    lambda *args: translate_chunk(*args), translation_memory,
+    workers=config.TRANSLATION_WORKERS, chunk_chars=config.TRANSLATION_CHUNK_CHARS,
+    conventions_fn=lambda language: market_conventions(language),
+)
+
+def run_chunked_translation(current_resume: str, language: str) -> str:
+    """Translate section-aligned chunks in parallel; returns output in the agents' usual format."""
+    analysis = precomputer.analysis(current_resume) if config.PRECOMPUTE_ENABLED else None
+    skills = analysis["skills"] if analysis is not None else verifier.skill_index.extract(current_resume)
+    translated, stats = translator.translate(current_resume, language, skills, tenant=current_tenant.get())
+    summary = (f"Translated your resume into {language} section by section ({stats['chunks']} chunks), keeping technical terms, "
+               f"names and numbers unchanged ({stats['lines_reused']} lines reused from earlier translations).")
+    if stats['lines_missing']: summary += f" {stats['lines_missing']} lines could not be translated and were left as they were."
+    return f"{summary}\n###UPDATED_RESUME###\n{translated}"
+
+def verified_resume(agent_type: str, new_resume: str, allowed_text: str):
+    """Run the local hallucination check on a rewrite; only a flagged rewrite costs an LLM repair pass.
+    Returns (resume to keep or None, note for the reasoning)."""
+    if agent_type in UNVERIFIED_AGENTS: return new_resume, ""
+    report = verifier.verify(allowed_text, new_resume)
+    if report.ok: return new_resume, ""
+    violations = report.describe()
+    agent = create_synthesizer_agent()
+    with metrics.timer("verifier.repair_seconds"):
+        _, repaired, _, _ = parse_agent_output(run_budgeted(agent, create_repair_task(agent, new_resume, violations), len(new_resume)))
+    if repaired and verifier.verify(allowed_text, repaired).ok:
+        metrics.incr("verifier.repaired")
+        return repaired, f"(Removed unsupported claims: {violations}.)"
+    metrics.incr("verifier.rejected")
+    return None, f"(This change was not applied because it introduced {violations}.)"
+
+def _timed_run_agent(agent_type, message, current_resume, cancelled=None):
+    speculation_cancelled.set(cancelled)
+    start = time.perf_counter()
+    result = run_agent(agent_type, message, current_resume)
+    return result, time.perf_counter() - start
+
+def route_message(message: str, history: list, current_resume: str):
+    """Pick the agent sequence for a message according to config.ROUTING_MODE.
+
+    Returns (agent_sequence, first_output) where first_output is the raw output of the
+    first agent when it was already produced during routing, otherwise None."""
+    if config.ROUTING_MODE == "combined":
+        router = create_router_agent(combined=True)
+        with metrics.timer("routing.router.seconds"):
+            hint = precomputer.hint(current_resume) if config.PRECOMPUTE_ENABLED else ""
+            route_output = run_budgeted(router, create_combined_routing_task(router, message, history, current_resume, hint), len(current_resume))
+        agent_sequence, inline_result = parse_route_output(route_output)
+        # An inline result replaces the specialist call entirely
+        metrics.incr("routing.combined.inline" if inline_result else "routing.combined.routed_only")
+        return agent_sequence, inline_result
+
+    predicted = speculation_target(message) if config.ROUTING_MODE == "speculative" else None
+    cancelled = threading.Event()
+    speculation = speculation_pool.submit(contextvars.copy_context().run, _timed_run_agent, predicted, message, current_resume, cancelled) if predicted else None
+
+    router = create_router_agent()
+    route_start = time.perf_counter()
+    try: agent_sequence, _ = parse_route_output(run_budgeted(router, create_routing_task(router, message, history), 0))
+    except BaseException:
+        # The request has failed: the speculative run must not go on spending tokens for it
+        cancelled.set()
+        if speculation is not None: speculation.cancel()
+        raise
+    route_seconds = time.perf_counter() - route_start
+    metrics.observe("routing.router.seconds", route_seconds)
+    if speculation is None: return agent_sequence, None
+
+    if agent_sequence[0] != predicted:
+        # Wrong guess: drop the speculative run; a call already in flight finishes (its tokens are the
+        # price of speculation), but no further one starts
+        cancelled.set()
+        speculation.cancel()
+        metrics.incr("routing.speculation.miss")
+        return agent_sequence, None
+    try: result, agent_seconds = speculation.result()
+    except (HTTPException, SpeculationCancelled):
+        metrics.incr("routing.speculation.error")
+        return agent_sequence, None
+    metrics.incr("routing.speculation.hit")
+    # Sequentially the turn would have cost route + agent; in parallel it costs max(route, agent)
+    metrics.observe("routing.speculation.seconds_saved", min(route_seconds, agent_seconds))
+    return agent_sequence, result
+
+
+def score_match(resume_text: str, job_description: str) -> dict:
+    """Score-only job_matcher analysis for one resume/JD pair (no routing, no rewrite)."""
+    rate_limiter.acquire(estimated_tokens=1500)
+    agent = create_job_matcher_agent()
+    with metrics.timer("batch.score.seconds"):
+        result_str = run_budgeted(agent, create_match_scoring_task(agent, resume_text, job_description), 0)
+    analysis, _, score, gaps = parse_agent_output(result_str)
+    return {"match_score": score, "skill_gaps": gaps or [], "analysis": analysis}
+
+
+def score_match_local(resume_text: str, job_description: str) -> dict:
+    """Deterministic keyword score for one pair, answered without an LLM call."""
+    result = scoring_engine.score(resume_text, job_description)
+    metrics.incr("scoring.local")
+    return {
+        "match_score": result["match_score"], "skill_gaps": result["missing_keywords"],
+        "analysis": f"Keyword match {result['match_score']}% ({result['coverage']:.0%} of weighted job description terms found in the resume).",
+    }
+
+
+@app.get("/ready")
+async def readiness():
+    warmup.start()
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["state"] == "ready" else 503)
+
+@app.get("/metrics")
+async def get_metrics():
+    snapshot = metrics.snapshot()
+    snapshot["rates"] = {
+        "speculation_hit_rate": metrics.ratio("routing.speculation.hit", "routing.speculation.miss"),
+        "semantic_cache_hit_rate": metrics.ratio("semantic_cache.hit", "semantic_cache.miss"),
+        "verifier_flag_rate": metrics.ratio("verifier.flagged", "verifier.passed"),
+    }
+    snapshot["admission"] = scheduler.stats()
+    snapshot["session_cache"] = session_cache.stats()
+    snapshot["semantic_cache"] = semantic_cache.stats()
+    snapshot["translation_memory"] = translation_memory.stats()
+    snapshot["prompts"] = usage_report()
+    snapshot["search_index"] = search_index.stats()
+    snapshot["idempotency"] = idempotency.stats()
+    snapshot["precompute"] = precomputer.stats()
+    return snapshot
+
+def require_admin(x_admin_key: str | None):
+    if not config.ADMIN_API_KEY or not hmac.compare_digest(x_admin_key or "", config.ADMIN_API_KEY):
+        raise HTTPException(status_code=403, detail="Admin key required.")
+
+# Audit records hold other users' raw queries, and a false-hit report evicts entries: admin only
+@app.get("/cache/semantic/audit")
+async def get_semantic_cache_audit(limit: int = 100, x_admin_key: str | None = Header(default=None)):
+    require_admin(x_admin_key)
+    return {"hits": semantic_cache.audit(limit)}
+
+@app.post("/cache/semantic/audit/{audit_id}/false-hit")
+async def report_semantic_false_hit(audit_id: int, x_admin_key: str | None = Header(default=None)):
+    require_admin(x_admin_key)
+    record = semantic_cache.report_false_hit(audit_id)
+    if not record: raise HTTPException(status_code=404, detail="Audit record not found.")
+    return {"message": "False hit recorded and cache entry evicted.", "record": record}
+
+@app.post("/admin/profile/start")
+async def start_profiling(request: ProfileRequest, x_admin_key: str | None = Header(default=None)):
+    require_admin(x_admin_key)
+    if not 0 < request.sample_rate <= 1: raise HTTPException(status_code=400, detail="sample_rate must be in (0, 1].")
+    try:
+        profiler.start(request.method, request.sample_rate, request.seconds, max(request.interval_ms, 1.0) / 1000)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "Profiling started.", "method": request.method, "sample_rate": 1.0 if request.seconds else request.sample_rate, "seconds": request.seconds}
+
+@app.post("/admin/profile/stop")
+async def stop_profiling(x_admin_key: str | None = Header(default=None)):
+    require_admin(x_admin_key)
+    profiler.stop()
+    return profiler.report()
+
+@app.get("/admin/profile")
+async def get_profile(top: int = 20, x_admin_key: str | None = Header(default=None)):
+    require_admin(x_admin_key)
+    return profiler.report(top)
+
+@app.get("/admin/profile/collapsed", response_class=PlainTextResponse)
+async def get_profile_collapsed(x_admin_key: str | None = Header(default=None)):
+    require_admin(x_admin_key)
+    return profiler.collapsed()
+
+@app.post("/admin/retention/run")
+async def run_retention(dry_run: bool = True, x_admin_key: str | None = Header(default=None)):
+    require_admin(x_admin_key)
+    if not retention.trigger(dry_run=dry_run): raise HTTPException(status_code=409, detail="A retention run is already in progress.")
+    return {"message": "Retention run started.", "dry_run": dry_run}
+
+@app.get("/admin/retention")
+async def get_retention(x_admin_key: str | None = Header(default=None)):
+    require_admin(x_admin_key)
+    return retention.status()
+
+@app.get("/search")
+async def search_resumes(q: str, mode: str = "boolean", limit: int = 20, x_admin_key: str | None = Header(default=None)):
+    require_admin(x_admin_key)
+    if not search_index.loaded:
+        # The index is per worker: until this worker has read the resumes collection, results would be partial
+        start_search_bootstrap()
+        raise HTTPException(status_code=503, detail="Search index is loading, retry shortly.", headers={"Retry-After": "5"})
+    try:
+        result = search_index.search(q, mode=mode, limit=min(max(limit, 1), 100))
+    except QuerySyntaxError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result["complete"] = search_index.loaded
+    return result
+
+def conditional_json(request: Request, payload) -> Response:
+    """JSON response with a content ETag, or an empty 304 when If-None-Match already names it."""
+    body = json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in (tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")):
+        metrics.incr("http.not_modified")
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/resume/{conversation_id}")
+async def get_resume(conversation_id: str, request: Request):
+    latest = sessions.get_latest_resume(conversation_id)
+    if not latest: raise HTTPException(status_code=404, detail="No resume found.")
+    return conditional_json(request, {"conversation_id": conversation_id, "version": latest.get('version'), "resume": latest['modified_text']})
 
 @app.get("/versions/{conversation_id}")
-async def get_resume_versions(conversation_id: str):
-    return {"versions": db.get_all_resume_versions(conversation_id)}
+async def get_resume_versions(conversation_id: str, request: Request):
+    return conditional_json(request, {"versions": db.get_all_resume_versions(conversation_id)})
 
 @app.post("/revert/{conversation_id}/{version}")
-async def revert_resume_version(conversation_id: str, version: int):
+async def revert_resume_version(conversation_id: str, version: int, base_version: int | None = None):
+    previous = db.get_latest_resume(conversation_id) if base_version is not None else None
     reverted = db.revert_to_version(conversation_id, version)
+    session_cache.invalidate(conversation_id)
     if not reverted: raise HTTPException(status_code=404, detail="Version not found.")
-    return {"message": f"Reverted to version {version}", "resume": reverted['modified_text']}
+    if previous is None: return {"message": f"Reverted to version {version}", "resume": reverted['modified_text'], "resume_version": reverted.get('version')}
+    delta = resume_delta(previous['modified_text'], previous.get('version'), reverted['modified_text'], reverted.get('version'), base_version)
+    if "updated_resume" in delta: delta["resume"] = delta.pop("updated_resume")
+    return {"message": f"Reverted to version {version}", **delta}
+
+def idempotent(scope: str, key: str | None, request_fingerprint: str, response: Response, fn):
+    """Run fn once per Idempotency-Key: duplicates wait for the running request or get its stored result."""
+    if not key or not config.IDEMPOTENCY_ENABLED: return fn()
+    try:
+        result, replayed = idempotency.run(scope, key, request_fingerprint, fn)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Retry-After": "5"})
+    if replayed: response.headers["Idempotent-Replayed"] = "true"
+    return result
 
 @app.post("/upload", response_model=UploadResponse)
-async def upload_resume(file: UploadFile = File(...)):
-    text = parse_resume(file)
+async def upload_resume(response: Response, file: UploadFile = File(...), x_api_key: str | None = Header(default=None), idempotency_key: str | None = Header(default=None)):
+    def upload():
+        with profiler.request("/upload"):
+            return _upload_resume(file)
+    if not idempotency_key: return upload()
+    # Keyed uploads may wait on a duplicate, so they run off the event loop
+    request_fingerprint = fingerprint(file.filename, hashlib.sha256(await file.read()).hexdigest())
+    await file.seek(0)
+    # Scoped per tenant like /chat: another client reusing the key must not get this conversation back
+    return await run_in_threadpool(idempotent, f"/upload:{x_api_key or ''}", idempotency_key, request_fingerprint, response, upload)
+
+def _upload_resume(file: UploadFile) -> UploadResponse:
+    with profiler.stage("parse_resume"):
+        text = parse_resume(file)
     if not text: raise HTTPException(status_code=400, detail="Could not extract text.")
     convo_id = db.create_new_conversation()
-    db.save_resume_version(conversation_id=convo_id, original_text=text)
-    return UploadResponse(conversation_id=convo_id, resume_text=text, message="Resume uploaded.")
+    version = db.save_resume_version(conversation_id=convo_id, original_text=text)
+    if config.PRECOMPUTE_ENABLED: precomputer.schedule(text)
+    scoring_engine.add_documents([text])
+    if config.SESSION_CACHE_ENABLED:
+        session_cache.prime(convo_id, latest={'conversationId': convo_id, 'version': version, 'original_text': text, 'modified_text': text, 'agent_reasoning': ''})
+    return UploadResponse(conversation_id=convo_id, resume_text=text, message="Resume uploaded.", resume_version=version)
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat_with_agent(request: ChatRequest):
-    convo_id, message = request.conversation_id, request.message
-    history, latest_resume = db.get_conversation_history(convo_id), db.get_latest_resume(convo_id)
+def chat_with_agent(request: ChatRequest, response: Response, x_api_key: str | None = Header(default=None), idempotency_key: str | None = Header(default=None)):
+    # Sync handler: runs in the threadpool so queued LLM calls never block the event loop
+    def chat():
+        with scheduler.request(x_api_key or request.conversation_id, "interactive"), cassette.request("/chat", request.conversation_id, request.message), \
+             profiler.request("/chat"):
+            return handle_chat(request.conversation_id, request.message, request.base_version)
+    request_fingerprint = fingerprint(request.conversation_id, request.message, request.base_version)
+    return idempotent(f"/chat:{x_api_key or ''}", idempotency_key, request_fingerprint, response, chat)
+
+def handle_chat(convo_id: str, message: str, base_version: int | None = None) -> ChatResponse:
+    history, latest_resume = sessions.get_conversation_history(convo_id), sessions.get_latest_resume(convo_id)
     if not latest_resume: raise HTTPException(status_code=404, detail="No resume found.")
     
     current_resume = latest_resume['modified_text']
-    db.update_conversation_history(convo_id, {"role": "user", "content": message})
-    
-    router_crew = Crew(agents=[create_router_agent()], tasks=[create_routing_task(create_router_agent(), message, history)])
-    route_output = run_crew_with_retry(router_crew)
-    
-    try: agent_sequence = json.loads(route_output.strip())
-    except json.JSONDecodeError: agent_sequence = ['general_chitchat']
+    sessions.update_conversation_history(convo_id, {"role": "user", "content": message})
     
+    job_description = find_job_description(message, history)
+    if is_local_score_question(message, history):
+        # Nothing for the router to decide: the local engine answers
+        agent_sequence, first_output = ["job_matcher"], None
+        metrics.incr("routing.local_score")
+    else: agent_sequence, first_output = route_message(message, history, current_resume)
     reasoning, score, gaps = "", None, None
 
-    creators = {
-        "company_researcher": (create_company_researcher_agent, "An explanation of changes, followed by the full updated resume.", "A user wants to optimize their resume for a specific company based on this query: '{message}'.\n1. Research the company's culture, values, and tech stack.\n2. Analyze the user's resume:\n---RESUME---\n{current_resume}\n---\n3. Rewrite the resume to align with the company.\n4. Explain your changes, then provide the full updated resume inside '###UPDATED_RESUME###' tags."),
-        "job_matcher": (create_job_matcher_agent, "An explanation with a score, a list of skill gaps, and the full updated resume.", "A user wants to tailor their resume to a job description provided in their query: '{message}'.\n1. Analyze the job description and the resume:\n---RESUME---\n{current_resume}\n---\n2. Rewrite the resume to be a perfect match.\n3. Calculate a match score (0-100%) and list 3-5 skill gaps.\n4. Your output must contain your analysis, then a list of skill gaps inside '###SKILL_GAPS###' tags, and finally the full updated resume inside '###UPDATED_RESUME###' tags."),
-        "section_enhancer": (create_section_enhancer_agent, "An explanation of changes, followed by the full updated resume.", "A user wants to improve a specific resume section based on their query: '{message}'.\n1. Identify the target section.\n2. Analyze the section within the full resume:\n---RESUME---\n{current_resume}\n---\n3. Rewrite only the target section using action verbs, metrics, and the STAR method.\n4. Explain the improvements, then provide the full updated resume in '###UPDATED_RESUME###' tags."),
-        "translation": (create_translation_agent, "An explanation of localization choices, followed by the full updated resume.", "A user wants to translate their resume based on the query: '{message}'.\n1. Identify the target language and country.\n2. Research local hiring conventions for that country.\n3. Translate and adapt the resume:\n---RESUME---\n{current_resume}\n---\n4. Explain your localization choices, then provide the full translated resume in '###UPDATED_RESUME###' tags."),
-    }
-
-    for agent_type in agent_sequence:
-        if agent_type in creators:
-            agent_creator, expected_output, desc_template = creators[agent_type]
-            agent = agent_creator()
-            task = create_task(desc_template.format(message=message, current_resume=current_resume), agent, expected_output)
-            result_str = run_crew_with_retry(Crew(agents=[agent], tasks=[task]))
+    for step, agent_type in enumerate(agent_sequence):
+        if agent_type in AGENT_CREATORS:
+            inline = parse_agent_output(first_output) if agent_type == "job_matcher" and first_output else None
+            if agent_type == "job_matcher" and len(agent_sequence) == 1 and is_score_only(message) and \
+                    (job_description or (inline and inline[2] is not None)):
+                # Score-only question: keep the resume unchanged. The combined router's inline analysis is
+                # already paid for, so it is used when it has a score; otherwise the local engine answers.
+                # Without a job description to score against, the job matcher agent runs as usual
+                res, _, s, g = inline or ("", "", None, None)
+                if s is None:
+                    local = score_match_local(current_resume, job_description)
+                    res, s, g = local['analysis'], local['match_score'], local['skill_gaps']
+                reasoning += f"\n\nJob Matcher: {res}"
+                score, gaps = s, g
+                continue
+            result_str = first_output if step == 0 and first_output else run_agent(agent_type, message, current_resume)
             
-            res, new_resume, s, g = parse_agent_output(result_str)
+            with profiler.stage("parse_output"):
+                res, new_resume, s, g = parse_agent_output(result_str)
+            if new_resume and new_resume != current_resume and config.VERIFIER_ENABLED:
+                with profiler.stage("verify"):
+                    new_resume, note = verified_resume(agent_type, new_resume, allowed_source(latest_resume['original_text'], current_resume, message, agent_type))
+                if note: res += f"\n{note}"
             reasoning += f"\n\n{agent_type.replace('_', ' ').title()}: {res}"
             if new_resume: current_resume = new_resume
             if s: score = s
@@ -133,12 +586,41 @@ async def chat_with_agent(request: ChatRequest):
             reasoning += "\n\nI'm designed to help with resumes. How can I assist you with yours?"
 
     response = reasoning.strip()
+    version = latest_resume.get('version')
     if current_resume != latest_resume['modified_text']:
-        db.save_resume_version(conversation_id=convo_id, original_text=latest_resume['original_text'], modified_text=current_resume, agent_reasoning=response)
+        version = sessions.save_resume_version(conversation_id=convo_id, original_text=latest_resume['original_text'], modified_text=current_resume, agent_reasoning=response)
     
-    db.update_conversation_history(convo_id, {"role": "assistant", "content": response})
+    sessions.update_conversation_history(convo_id, {"role": "assistant", "content": response})
     
+    # Clients that send base_version get a patch (or the full text if that is smaller) and no duplicate reasoning
+    delta = resume_delta(latest_resume['modified_text'], latest_resume.get('version'), current_resume, version, base_version)
     return ChatResponse(
-        conversation_id=convo_id, agent_response=response, reasoning=response,
-        updated_resume=current_resume, match_score=score, skill_gaps=gaps
+        conversation_id=convo_id, agent_response=response, reasoning=response if base_version is None else None,
+        match_score=score, skill_gaps=gaps, **delta
     )
+
+@app.post("/batch/match")
+def batch_match(request: BatchMatchRequest, x_api_key: str | None = Header(default=None)):
+    resumes = list(request.resumes)
+    for convo_id in request.conversation_ids:
+        latest = db.get_latest_resume(convo_id)
+        if not latest: raise HTTPException(status_code=404, detail=f"No resume found for conversation {convo_id}.")
+        resumes.append(latest['modified_text'])
+    if not resumes or not request.job_descriptions: raise HTTPException(status_code=400, detail="Provide at least one resume and one job description.")
+    pairs = build_pairs(resumes, request.job_descriptions)
+    if len(pairs) > config.BATCH_MAX_PAIRS: raise HTTPException(status_code=400, detail=f"Batch too large ({len(pairs)} pairs, max {config.BATCH_MAX_PAIRS}).")
+    
+    batch_id = request.batch_id or str(uuid.uuid4())
+    # The batch's job descriptions join the IDF corpus (a resubmitted batch's are already counted), so their rare terms weigh more
+    scoring_engine.add_documents(request.job_descriptions)
+    if request.mode == "local":
+        # Local scores are cheaper to recompute than to checkpoint
+        lines = run_batch(batch_id, pairs, score_match_local, lambda _: {}, lambda *_: None, workers=1)
+    elif request.mode == "llm":
+        # Batch work runs in the low-priority lane under the caller's tenant
+        tenant = x_api_key or f"batch:{batch_id}"
+        scheduler.admit(tenant, "batch")
+        score_fn = functools.partial(run_as, tenant, "batch", score_match)
+        lines = run_batch(batch_id, pairs, score_fn, db.get_batch_results, db.save_batch_result, workers=config.BATCH_WORKERS)
+    else: raise HTTPException(status_code=400, detail="mode must be 'local' or 'llm'.")
+    return StreamingResponse(lines, media_type="application/x-ndjson", headers={"X-Batch-Id": batch_id})
@@ -0,0 +1,63 @@
+import time
+import threading
+from contextlib import contextmanager
+
+
+class MetricsRegistry:
+    """Thread-safe in-process counters and latency/size histograms"""
+
+    def __init__(self, max_samples=1000):
+        self.max_samples = max_samples
+        self.counters = {}
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name, amount=1):
+        """Increment a named counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, value):
+        """Record one sample for a histogram, keeping only the most recent max_samples"""
+        with self._lock:
+            values = self.samples.setdefault(name, [])
+            values.append(value)
+            if len(values) > self.max_samples:
+                del values[:len(values) - self.max_samples]
+
+    @contextmanager
+    def timer(self, name):
+        """Observe the wall-clock seconds spent inside the block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def ratio(self, hits, misses):
+        """Hit rate for a pair of counters, or None before any traffic"""
+        with self._lock:
+            h, m = self.counters.get(hits, 0), self.counters.get(misses, 0)
+        return h / (h + m) if h + m else None
+
+    def snapshot(self):
+        """Summarize counters and histograms (count, sum, avg, p50, p95, max)"""
+        with self._lock:
+            counters = dict(self.counters)
+            samples = {name: sorted(values) for name, values in self.samples.items()}
+        histograms = {}
+        for name, values in samples.items():
+            if not values: continue
+            pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+            histograms[name] = {
+                "count": len(values), "sum": round(sum(values), 4), "avg": round(sum(values) / len(values), 4),
+                "p50": round(pick(0.5), 4), "p95": round(pick(0.95), 4), "max": round(values[-1], 4),
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def reset(self):
+        with self._lock:
+            self.counters, self.samples = {}, {}
+
+# Global metrics registry
+metrics = MetricsRegistry()
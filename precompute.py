@@ -0,0 +1,175 @@
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import config
+from metrics import metrics
+from sections import cached_sections
+from scoring import resume_terms, scoring_engine
+from verifier import verifier
+
+# Local analysis of a resume, started in the background when it is uploaded: almost every session's
+# first turn is a section improvement or a job match, and both can start from this instead of an
+# empty page. The analysis (sections, per-bullet weak verbs and missing metrics, known skills) is
+# kept per resume hash; computing it also warms the scoring caches for that resume. The first
+# /chat turn reuses it as a prompt hint, and metrics count how often the precomputed work was used.
+
+WEAK_VERBS = frozenset("""
+responsible helped help assisted assist worked work participated involved handled supported tasked
+duties did made was were performed utilized used contributed collaborated tried
+""".split())
+
+BULLET_RE = re.compile(r"^\s*(?:[-*•▪◦‣–]|\d{1,2}[.)])\s+(.+?)\s*$")
+METRIC_RE = re.compile(r"\d")
+WORD_RE = re.compile(r"[A-Za-z][A-Za-z'-]*")
+# Sections whose bullets describe achievements (others, like Skills, are lists)
+ACHIEVEMENT_SECTIONS = ("experience", "employment", "projects", "leadership", "volunteer", "achievements", "summary")
+
+
+def resume_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def bullet_issues(bullet: str):
+    """Weaknesses of one achievement bullet: "weak verb" and/or "no metric"."""
+    words = WORD_RE.findall(bullet)
+    issues = []
+    if words and words[0].lower() in WEAK_VERBS: issues.append("weak verb")
+    if not METRIC_RE.search(bullet): issues.append("no metric")
+    return issues
+
+
+def analyze(text: str) -> dict:
+    """Sections, flagged achievement bullets and known skills of a resume."""
+    sections, bullets = cached_sections(text), []
+    for section in sections:
+        if not any(key in section["title"].lower() for key in ACHIEVEMENT_SECTIONS): continue
+        for line in section["text"].splitlines():
+            match = BULLET_RE.match(line)
+            if match: bullets.append({"section": section["title"], "text": match.group(1), "issues": bullet_issues(match.group(1))})
+    return {
+        "sections": [s["title"] for s in sections],
+        "bullets": bullets,
+        "skills": sorted(verifier.skill_index.extract(text)),
+    }
+
+
+def analysis_hint(analysis: dict, max_bullets=8) -> str:
+    """The analysis as a prompt hint, so the agent can go straight to rewriting."""
+    if not analysis["bullets"]: return ""
+    flagged = [b for b in analysis["bullets"] if b["issues"]]
+    weak = sum("weak verb" in b["issues"] for b in analysis["bullets"])
+    unmeasured = sum("no metric" in b["issues"] for b in analysis["bullets"])
+    lines = [
+        f"PRECOMPUTED RESUME ANALYSIS (deterministic, use it instead of re-analyzing the resume): "
+        f"sections: {', '.join(analysis['sections'])}; {len(analysis['bullets'])} achievement bullets, "
+        f"{weak} start with a weak verb, {unmeasured} have no metric."
+    ]
+    if flagged:
+        lines.append("Weakest bullets:")
+        lines += [f"- [{b['section']}] {b['text'][:120]} ({', '.join(b['issues'])})" for b in flagged[:max_bullets]]
+    return "\n".join(lines)
+
+
+class _Entry:
+    __slots__ = ("future", "analysis", "scheduled", "used")
+
+    def __init__(self, scheduled):
+        self.future, self.analysis, self.scheduled, self.used = None, None, scheduled, False
+
+
+class Precomputer:
+    """Background analysis per resume hash (LRU), reused by later turns on the same resume text."""
+
+    def __init__(self, workers=1, max_entries=1000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()    # resume hash -> _Entry
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="precompute")
+        self._lock = threading.Lock()
+
+    def _run(self, text):
+        start = time.perf_counter()
+        analysis = analyze(text)
+        resume_terms(text)
+        scoring_engine.resume_embedding(text)
+        metrics.observe("precompute.seconds", time.perf_counter() - start)
+        return analysis
+
+    def _put(self, key, entry):
+        self.entries[key] = entry
+        while len(self.entries) > self.max_entries:
+            _, evicted = self.entries.popitem(last=False)
+            if evicted.scheduled and not evicted.used: metrics.incr("precompute.unused")
+
+    def schedule(self, text: str):
+        """Start analyzing an uploaded resume in the background."""
+        key = resume_hash(text)
+        with self._lock:
+            if key in self.entries: return
+            entry = _Entry(scheduled=True)
+            entry.future = self.pool.submit(self._run, text)
+            self._put(key, entry)
+        metrics.incr("precompute.scheduled")
+
+    def _claim(self, key, timeout=None):
+        """The finished entry for key, waiting up to timeout for a scheduled run; None if nothing was computed
+        (a failed run is dropped, so the next turn analyzes the resume again)."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None: self.entries.move_to_end(key)
+        if entry is None: return None
+        if entry.analysis is None:
+            if not entry.future.done(): metrics.incr("precompute.waited")
+            try:
+                entry.analysis = entry.future.result(timeout)
+            except FutureTimeout:
+                metrics.incr("precompute.wait_timeout")
+                return None
+            except Exception as e:
+                print(f"Precompute failed for resume {key[:12]}: {e}")
+                metrics.incr("precompute.failed")
+                with self._lock:
+                    if self.entries.get(key) is entry: del self.entries[key]
+                return None
+        if entry.scheduled and not entry.used:
+            entry.used = True
+            metrics.incr("precompute.used")
+        return entry
+
+    def wait(self, text: str, timeout=None) -> bool:
+        """Let a scheduled run for this resume finish (its caches are then warm); True if it finished in time."""
+        return self._claim(resume_hash(text), timeout) is not None
+
+    def analysis(self, text: str):
+        """The resume's analysis: precomputed if an upload scheduled it, else computed now and kept.
+        None if the resume cannot be analyzed."""
+        key = resume_hash(text)
+        entry = self._claim(key)
+        if entry is None:
+            metrics.incr("precompute.miss")
+            entry = _Entry(scheduled=False)
+            try: entry.analysis = self._run(text)
+            except Exception as e:
+                print(f"Resume analysis failed for {key[:12]}: {e}")
+                metrics.incr("precompute.failed")
+                return None
+            with self._lock: self._put(key, entry)
+        return entry.analysis
+
+    def hint(self, text: str) -> str:
+        analysis = self.analysis(text)
+        return analysis_hint(analysis) if analysis is not None else ""
+
+    def stats(self):
+        with self._lock:
+            scheduled = [e for e in self.entries.values() if e.scheduled]
+            used = sum(e.used for e in scheduled)
+            # Share of recent uploads whose precomputed work a later turn picked up
+            return {"entries": len(self.entries), "scheduled": len(scheduled), "used": used,
+                    "use_rate": round(used / len(scheduled), 4) if scheduled else None}
+
+# Global precomputer
+precomputer = Precomputer(workers=config.PRECOMPUTE_WORKERS)
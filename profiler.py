@@ -0,0 +1,230 @@
+import os
+import sys
+import time
+import random
+import pstats
+import cProfile
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+
+# On-demand profiling of live requests. Off by default: request() and stage() cost one attribute
+# check until an admin starts a session. Two methods:
+# - "sample": a background thread snapshots the stacks of profiled request threads every
+#   interval (wall clock, so LLM waits show up under the "llm" stage); exports collapsed stacks.
+# - "cprofile": deterministic cProfile of the request thread, one request at a time.
+
+# The profiled request and its stage stack. A contextvar, so pool work submitted through
+# contextvars.copy_context() (speculation, translation chunks) is attributed to the request too.
+_current = contextvars.ContextVar("profiler_trace", default=None)
+
+# Frames of idle threads (pool workers waiting for work) are dropped when sampling every thread
+_IDLE_FUNCTIONS = frozenset({"wait", "select", "poll", "_wait_for_tstate_lock", "get", "accept", "epoll"})
+
+
+class _Session:
+    def __init__(self, method, sample_rate, seconds, interval):
+        self.method, self.sample_rate, self.interval = method, sample_rate, interval
+        self.started = time.time()
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.all_threads = bool(seconds)     # a timed window samples every thread, not just sampled requests
+        self.stacks = Counter()              # collapsed stack -> samples
+        self.requests = Counter()            # endpoint -> profiled requests
+        self.request_seconds = Counter()
+        self.stage_seconds = Counter()       # (endpoint, stage) -> seconds
+        self.stage_calls = Counter()
+        self.stats = {}                      # endpoint -> pstats.Stats (cprofile)
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.cprofile_busy = threading.Lock()
+
+
+class _Trace:
+    __slots__ = ("endpoint",)
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+
+
+class Profiler:
+    def __init__(self):
+        self.session = None
+        self.last = None                     # most recent finished session, kept for reports
+        self.threads = {}                    # thread id -> (_Trace, current stage) for threads working on profiled requests
+        self._lock = threading.Lock()
+
+    # --- control ---
+    def start(self, method="sample", sample_rate=0.1, seconds=None, interval=0.005):
+        """Start a profiling session; with seconds it stops by itself and profiles every request meanwhile."""
+        if method not in ("sample", "cprofile"): raise ValueError("method must be 'sample' or 'cprofile'")
+        session = _Session(method, 1.0 if seconds else sample_rate, seconds, interval)
+        with self._lock:
+            if self.session is not None: self.session.stopped.set()
+            self.session = session
+        if method == "sample":
+            threading.Thread(target=self._sample_loop, args=(session,), name="profiler-sampler", daemon=True).start()
+        elif seconds:
+            timer = threading.Timer(seconds, self.stop)
+            timer.daemon = True
+            timer.start()
+        return session
+
+    def stop(self):
+        with self._lock:
+            session, self.session = self.session, None
+        if session is not None:
+            session.stopped.set()
+            self.last = session
+        return session
+
+    @property
+    def active(self):
+        return self.session is not None
+
+    # --- instrumentation ---
+    @contextmanager
+    def request(self, endpoint):
+        """Profile this request if a session is running and the request is sampled."""
+        session = self.session
+        if session is None or random.random() >= session.sample_rate:
+            yield
+            return
+        profile = None
+        if session.method == "cprofile":
+            # One cProfile at a time: profilers cannot overlap on some Python versions
+            if not session.cprofile_busy.acquire(blocking=False):
+                yield
+                return
+            profile = cProfile.Profile()
+        trace, tid = _Trace(endpoint), threading.get_ident()
+        with self._lock: self.threads[tid] = (trace, "other")
+        token = _current.set((trace, ()))
+        start = time.perf_counter()
+        if profile is not None: profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                stats = pstats.Stats(profile)
+                with self._lock:
+                    if endpoint in session.stats: session.stats[endpoint].add(stats)
+                    else: session.stats[endpoint] = stats
+                session.cprofile_busy.release()
+            with self._lock:
+                self.threads.pop(tid, None)
+                session.requests[endpoint] += 1
+                session.request_seconds[endpoint] += time.perf_counter() - start
+            _current.reset(token)
+
+    @contextmanager
+    def stage(self, name):
+        """Label a pipeline stage of the current request (only costs anything when the request is profiled)."""
+        current = _current.get()
+        if current is None or self.session is None:
+            yield
+            return
+        trace, stages = current
+        token = _current.set((trace, stages + (name,)))
+        tid = threading.get_ident()
+        # A pool thread is sampled as part of the request only while it works inside a stage
+        with self._lock:
+            previous = self.threads.get(tid)
+            self.threads[tid] = (trace, name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            _current.reset(token)
+            with self._lock:
+                if previous is None: self.threads.pop(tid, None)
+                else: self.threads[tid] = previous
+            session = self.session
+            if session is not None:
+                with self._lock:
+                    session.stage_seconds[(trace.endpoint, name)] += time.perf_counter() - start
+                    session.stage_calls[(trace.endpoint, name)] += 1
+
+    # --- sampling ---
+    def _sample_loop(self, session):
+        own = threading.get_ident()
+        names = {}
+        while not session.stopped.wait(session.interval):
+            if session.deadline and time.monotonic() >= session.deadline:
+                if self.session is session: self.stop()
+                break
+            with self._lock: traces = dict(self.threads)
+            sampled = []
+            for tid, frame in sys._current_frames().items():
+                trace, stage = traces.get(tid, (None, None))
+                if tid == own or (trace is None and not session.all_threads): continue
+                if trace is None and frame.f_code.co_name in _IDLE_FUNCTIONS: continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                if trace is not None:
+                    root = [trace.endpoint, stage]
+                else:
+                    if tid not in names: names = {t.ident: t.name for t in threading.enumerate()}
+                    root = [f"thread:{names.get(tid, tid)}"]
+                sampled.append(";".join(root + stack))
+            # Reports read the counters from other threads: update them under the lock
+            with self._lock:
+                session.stacks.update(sampled)
+                session.samples += 1
+
+    # --- reports ---
+    def _current(self):
+        return self.session or self.last
+
+    def collapsed(self):
+        """Samples as collapsed stacks ("frame;frame;frame count"), the input format of flamegraph.pl and speedscope."""
+        session = self._current()
+        if session is None: return ""
+        with self._lock: stacks = session.stacks.copy()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    def report(self, top=20):
+        session = self._current()
+        if session is None: return {"active": False}
+        with self._lock:
+            stacks, requests, request_seconds = session.stacks.copy(), session.requests.copy(), session.request_seconds.copy()
+            stage_seconds, stage_calls, samples_taken = session.stage_seconds.copy(), session.stage_calls.copy(), session.samples
+            top_functions = {ep: _top_functions(stats, top) for ep, stats in session.stats.items()}
+        endpoints = {}
+        for endpoint in set(requests) | {k.split(";", 1)[0] for k in stacks}:
+            stages = {
+                stage: {"seconds": round(seconds, 4), "calls": stage_calls[(ep, stage)]}
+                for (ep, stage), seconds in stage_seconds.items() if ep == endpoint
+            }
+            samples = Counter()
+            for stack, count in stacks.items():
+                parts = stack.split(";")
+                if parts[0] != endpoint: continue
+                if not endpoint.startswith("thread:"):
+                    stage = stages.setdefault(parts[1], {"seconds": 0.0, "calls": 0})
+                    stage["samples"] = stage.get("samples", 0) + count
+                samples[parts[-1]] += count
+            entry = {
+                "requests": requests[endpoint], "seconds": round(request_seconds[endpoint], 4),
+                "stages": stages, "top_self_samples": samples.most_common(top),
+            }
+            if endpoint in top_functions: entry["top_functions"] = top_functions[endpoint]
+            endpoints[endpoint] = entry
+        return {
+            "active": session is self.session, "method": session.method, "sample_rate": session.sample_rate,
+            "started": session.started, "samples": samples_taken, "endpoints": endpoints,
+        }
+
+
+def _top_functions(stats, top):
+    """Functions with the most own time: [(file:line(function), calls, own seconds, cumulative seconds)]."""
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+    return [(f"{os.path.basename(f)}:{line}({name})", nc, round(tt, 6), round(ct, 6)) for (f, line, name), (cc, nc, tt, ct, _) in rows]
+
+# Global profiler (idle until an admin starts a session)
+profiler = Profiler()
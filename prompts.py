@@ -0,0 +1,230 @@
+import config
+from metrics import metrics
+from routing import INLINE_AGENTS, ROUTE_END_TAG
+from budgets import END_RESUME_TAG, RESUME_PROMPTS
+
+# Versioned task prompts. Each prompt is a static instruction prefix followed by a per-call body, so
+# a provider that caches prompt prefixes can reuse agent system prompt + instructions (and, within a
+# conversation, the resume) across calls. v1 keeps the original interleaved layout for comparison.
+
+CHARS_PER_TOKEN = 4
+
+AGENT_LIST = "Available agents: 'company_researcher', 'job_matcher', 'section_enhancer', 'translation', 'general_chitchat'."
+
+
+class PromptTemplate:
+    """A task description: static instructions first, then the formatted per-call body."""
+    __slots__ = ("name", "version", "instructions", "body", "expected_output")
+
+    def __init__(self, name, version, instructions, body, expected_output):
+        self.name, self.version = name, version
+        self.instructions, self.body, self.expected_output = instructions, body, expected_output
+
+    def render(self, **values):
+        return self.instructions + self.body.format(**values)
+
+
+PROMPTS = {}
+
+def register(version, name, instructions, body, expected_output):
+    PROMPTS.setdefault(version, {})[name] = PromptTemplate(name, version, instructions, body, expected_output)
+
+def get_prompt(name, version=None):
+    """The named prompt in the configured version (falling back to v1 for prompts a version doesn't define)."""
+    return PROMPTS.get(version or config.PROMPT_VERSION, {}).get(name) or PROMPTS["v1"][name]
+
+# Per-turn hints (scoring.keyword_gap_hint, precompute.analysis_hint) go after the rendered body on a line
+# starting with HINT_PREFIX, so the cassette can tell the end of the user's message from the hint
+HINT_PREFIX = "PRECOMPUTED "
+
+def append_hint(description, hint):
+    return description + (f"\n{hint}" if hint else "")
+
+def history_str(history):
+    return '\n'.join(f"{msg.get('role', 'unknown')}: {msg.get('content', '')}" for msg in history)
+
+
+# --- v1: original layout (user message before the resume and the instructions) ---
+register("v1", "company_researcher", "", "A user wants to optimize their resume for a specific company based on this query: '{message}'.\n1. Research the company's culture, values, and tech stack.\n2. Analyze the user's resume:\n---RESUME---\n{current_resume}\n---\n3. Rewrite the resume to align with the company.\n4. Explain your changes, then provide the full updated resume inside '###UPDATED_RESUME###' tags.",
+         "An explanation of changes, followed by the full updated resume.")
+register("v1", "job_matcher", "", "A user wants to tailor their resume to a job description provided in their query: '{message}'.\n1. Analyze the job description and the resume:\n---RESUME---\n{current_resume}\n---\n2. Rewrite the resume to be a perfect match.\n3. Calculate a match score (0-100%) and list 3-5 skill gaps.\n4. Your output must contain your analysis, then a list of skill gaps inside '###SKILL_GAPS###' tags, and finally the full updated resume inside '###UPDATED_RESUME###' tags.",
+         "An explanation with a score, a list of skill gaps, and the full updated resume.")
+register("v1", "section_enhancer", "", "A user wants to improve a specific resume section based on their query: '{message}'.\n1. Identify the target section.\n2. Analyze the section within the full resume:\n---RESUME---\n{current_resume}\n---\n3. Rewrite only the target section using action verbs, metrics, and the STAR method.\n4. Explain the improvements, then provide the full updated resume in '###UPDATED_RESUME###' tags.",
+         "An explanation of changes, followed by the full updated resume.")
+register("v1", "translation", "", "A user wants to translate their resume based on the query: '{message}'.\n1. Identify the target language and country.\n2. Research local hiring conventions for that country.\n3. Translate and adapt the resume:\n---RESUME---\n{current_resume}\n---\n4. Explain your localization choices, then provide the full translated resume in '###UPDATED_RESUME###' tags.",
+         "An explanation of localization choices, followed by the full updated resume.")
+register("v1", "routing", "",
+         "Analyze the user's query and conversation history to determine the right agent sequence. " + AGENT_LIST + "\n\n"
+         "USER QUERY: {message}\nCONVERSATION HISTORY: {history}\n\n"
+         "Your output MUST be a valid JSON array of agent keywords in the correct order. "
+         "Example: [\"company_researcher\", \"job_matcher\"]. For a single agent: [\"job_matcher\"].",
+         "A JSON array of agent keywords, like [\"job_matcher\"].")
+register("v1", "combined_routing", "",
+         "Analyze the user's query and conversation history to determine the right agent sequence. " + AGENT_LIST + "\n\n"
+         "USER QUERY: {message}\nCONVERSATION HISTORY: {history}\n\n"
+         "First output a valid JSON array of agent keywords in the correct order on its own line. "
+         f"If the array is exactly [\"job_matcher\"] or [\"section_enhancer\"], follow it with '{ROUTE_END_TAG}' "
+         "and then complete that agent's task yourself as described below. Otherwise output ONLY the JSON array.\n\n"
+         "{inline_instructions}",
+         f"A JSON array of agent keywords, optionally followed by '{ROUTE_END_TAG}' and the agent's full output.")
+register("v1", "match_scoring", "",
+         "Compare the resume against the job description.\n---JOB DESCRIPTION---\n{job_description}\n---\n---RESUME---\n{current_resume}\n---\n"
+         "1. Calculate a match score (0-100%) and write it as 'Match score: NN%'.\n2. Give a two-sentence analysis of the fit.\n"
+         "3. List 3-5 skill gaps, one per line, inside '###SKILL_GAPS###' tags.\nDo NOT rewrite the resume.",
+         "'Match score: NN%', a short analysis, and a list of skill gaps.")
+register("v1", "repair", "",
+         "The resume below was rewritten, but it now contains claims that are not in the candidate's original resume: {violations}.\n"
+         "---RESUME---\n{current_resume}\n---\n"
+         "1. Remove or rephrase every sentence that relies on those claims; do not replace them with other new skills or numbers.\n"
+         "2. Keep every other improvement exactly as it is.\n"
+         "3. Briefly list what you removed, then provide the full corrected resume in '###UPDATED_RESUME###' tags.",
+         "A short list of removed claims, followed by the full corrected resume.")
+register("v1", "chunk_translation", "",
+         "Translate these resume lines into professional {language}, using the conventions of resumes in that market.\n{glossary}\n"
+         "---LINES---\n{numbered_lines}\n---\nOutput every line once, in order, starting with its original [n] marker, and nothing else.",
+         "The translated lines, each starting with its original [n] marker.")
+
+
+# --- v2: static instructions -> resume (per conversation) -> user message (per turn) ---
+RESUME_THEN_REQUEST = "\n---RESUME---\n{current_resume}\n---\nUSER REQUEST: {message}"
+
+register("v2", "company_researcher",
+         "Optimize the resume below for the company named in the USER REQUEST at the end.\n"
+         "1. Research the company's culture, values, and tech stack.\n2. Analyze the resume.\n"
+         "3. Rewrite the resume to align with the company.\n"
+         "4. Explain your changes, then provide the full updated resume inside '###UPDATED_RESUME###' tags.",
+         RESUME_THEN_REQUEST, "An explanation of changes, followed by the full updated resume.")
+register("v2", "job_matcher",
+         "Tailor the resume below to the job description given in the USER REQUEST at the end.\n"
+         "1. Analyze the job description and the resume.\n2. Rewrite the resume to be a perfect match.\n"
+         "3. Calculate a match score (0-100%) and list 3-5 skill gaps.\n"
+         "4. Your output must contain your analysis, then a list of skill gaps inside '###SKILL_GAPS###' tags, "
+         "and finally the full updated resume inside '###UPDATED_RESUME###' tags.",
+         RESUME_THEN_REQUEST, "An explanation with a score, a list of skill gaps, and the full updated resume.")
+register("v2", "section_enhancer",
+         "Improve the resume section named in the USER REQUEST at the end.\n"
+         "1. Identify the target section.\n2. Analyze the section within the full resume below.\n"
+         "3. Rewrite only the target section using action verbs, metrics, and the STAR method.\n"
+         "4. Explain the improvements, then provide the full updated resume in '###UPDATED_RESUME###' tags.",
+         RESUME_THEN_REQUEST, "An explanation of changes, followed by the full updated resume.")
+register("v2", "translation",
+         "Translate the resume below as asked in the USER REQUEST at the end.\n"
+         "1. Identify the target language and country.\n2. Research local hiring conventions for that country.\n"
+         "3. Translate and adapt the resume.\n"
+         "4. Explain your localization choices, then provide the full translated resume in '###UPDATED_RESUME###' tags.",
+         RESUME_THEN_REQUEST, "An explanation of localization choices, followed by the full updated resume.")
+ROUTING_INTRO = "Analyze the user's request and conversation history below to determine the right agent sequence. " + AGENT_LIST + "\n"
+register("v2", "routing",
+         ROUTING_INTRO + "Your output MUST be a valid JSON array of agent keywords in the correct order. "
+         "Example: [\"company_researcher\", \"job_matcher\"]. For a single agent: [\"job_matcher\"].\n",
+         "\nCONVERSATION HISTORY: {history}\nUSER REQUEST: {message}",
+         "A JSON array of agent keywords, like [\"job_matcher\"].")
+register("v2", "match_scoring",
+         "Compare the resume against the job description below.\n"
+         "1. Calculate a match score (0-100%) and write it as 'Match score: NN%'.\n2. Give a two-sentence analysis of the fit.\n"
+         "3. List 3-5 skill gaps, one per line, inside '###SKILL_GAPS###' tags.\nDo NOT rewrite the resume.\n",
+         # Resume first: batch pairs are resume-major, so consecutive calls share the resume too
+         "\n---RESUME---\n{current_resume}\n---\n---JOB DESCRIPTION---\n{job_description}\n---",
+         "'Match score: NN%', a short analysis, and a list of skill gaps.")
+register("v2", "repair",
+         "The resume below was rewritten, but it now contains claims that are not in the candidate's original resume (listed at the end).\n"
+         "1. Remove or rephrase every sentence that relies on those claims; do not replace them with other new skills or numbers.\n"
+         "2. Keep every other improvement exactly as it is.\n"
+         "3. Briefly list what you removed, then provide the full corrected resume in '###UPDATED_RESUME###' tags.\n",
+         "\n---RESUME---\n{current_resume}\n---\nUNSUPPORTED CLAIMS: {violations}",
+         "A short list of removed claims, followed by the full corrected resume.")
+register("v2", "chunk_translation",
+         "Translate the numbered resume lines below into the target language, using the conventions of resumes in that market.\n"
+         "Output every line once, in order, starting with its original [n] marker, and nothing else.\n",
+         "\nTARGET LANGUAGE: {language}\n{glossary}\n---LINES---\n{numbered_lines}\n---",
+         "The translated lines, each starting with its original [n] marker.")
+register("v2", "combined_routing",
+         ROUTING_INTRO + "First output a valid JSON array of agent keywords in the correct order on its own line. "
+         f"If the array is exactly [\"job_matcher\"] or [\"section_enhancer\"], follow it with '{ROUTE_END_TAG}' "
+         "and then complete that agent's task yourself as described below, using the RESUME and USER REQUEST at the end. "
+         "Otherwise output ONLY the JSON array.\n\n"
+         + "\n\n".join(f"IF THE ROUTE IS [\"{agent_type}\"]:\n" + PROMPTS["v2"][agent_type].instructions for agent_type in INLINE_AGENTS) + "\n",
+         "\n---RESUME---\n{current_resume}\n---\nCONVERSATION HISTORY: {history}\nUSER REQUEST: {message}",
+         f"A JSON array of agent keywords, optionally followed by '{ROUTE_END_TAG}' and the agent's full output.")
+
+
+
+# --- v3: v2 with budgeted answers (see budgets.py): a brief explanation, and the resume closed by a tag ---
+# Closes the resume (and is its stop sequence), so nothing is generated past it
+END_RESUME = f" Close the resume with '{END_RESUME_TAG}' and write nothing after it."
+
+def _budgeted(instructions):
+    return (instructions.replace("4. Explain", "4. Briefly explain")
+            .replace("'###UPDATED_RESUME###' tags.", "'###UPDATED_RESUME###' tags." + END_RESUME))
+
+for name, prompt in list(PROMPTS["v2"].items()):
+    register("v3", name, _budgeted(prompt.instructions) if name in RESUME_PROMPTS else prompt.instructions, prompt.body, prompt.expected_output)
+
+
+def render_combined_routing(message, history, current_resume, version=None):
+    """The combined routing prompt; v1 embeds each inline agent's fully formatted task."""
+    prompt = get_prompt("combined_routing", version)
+    inline = "\n\n".join(
+        f"IF THE ROUTE IS [\"{agent_type}\"]:\n" + get_prompt(agent_type, prompt.version).render(message=message, current_resume=current_resume)
+        for agent_type in INLINE_AGENTS
+    ) if prompt.version == "v1" else ""
+    return prompt.render(message=message, history=history_str(history), current_resume=current_resume, inline_instructions=inline)
+
+
+# --- continuation of an answer cut off by its output budget (same in every version) ---
+# The original task comes first, so the continuation shares its prompt prefix with the call it continues
+for version in list(PROMPTS):
+    register(version, "continuation", "",
+             "{task}\n---YOUR ANSWER SO FAR (cut off by the length limit)---\n{partial}\n---\n"
+             "Continue the answer exactly where it stops above. Output ONLY the rest of it; do not repeat anything already written.",
+             "The rest of the answer, starting exactly where it stopped.")
+
+
+# --- prefix-cache accounting ---
+def cacheable_prefix_chars(agent, prompt):
+    """Characters identical on every call of this prompt: the agent's role/goal/backstory plus the static instructions."""
+    system = sum(len(value) for value in (getattr(agent, f, None) for f in ("role", "goal", "backstory")) if isinstance(value, str))
+    return system + len(prompt.instructions)
+
+def record_prompt(agent, prompt, description):
+    metrics.observe(f"prompt.{prompt.name}.cacheable_prefix_tokens", cacheable_prefix_chars(agent, prompt) // CHARS_PER_TOKEN)
+    metrics.observe(f"prompt.{prompt.name}.description_tokens", len(description) // CHARS_PER_TOKEN)
+
+def record_usage(crew, result):
+    """Add a crew run's LiteLLM usage (prompt, cached prompt and completion tokens) to the metrics,
+    under the name of the crew's first task, with a per-task histogram of output tokens.
+    Returns the completion tokens (0 when the provider reported none)."""
+    tasks = getattr(crew, "tasks", None)
+    name = getattr(tasks[0], "name", None) if isinstance(tasks, list) and tasks else None
+    name = name if isinstance(name, str) and name else "other"
+    usage = getattr(result, "token_usage", None)
+    for field in ("prompt_tokens", "cached_prompt_tokens", "completion_tokens"):
+        value = getattr(usage, field, 0)
+        if isinstance(value, int) and value > 0:
+            metrics.incr(f"llm.{name}.{field}", value)
+            metrics.incr(f"llm.total.{field}", value)
+    completion = getattr(usage, "completion_tokens", 0)
+    if not isinstance(completion, int) or completion <= 0: return 0
+    metrics.observe(f"llm.{name}.output_tokens", completion)
+    return completion
+
+def usage_report():
+    """Per prompt: version, estimated cacheable prefix, and provider-reported prompt/cached tokens."""
+    snapshot = metrics.snapshot()
+    counters, histograms = snapshot["counters"], snapshot["histograms"]
+    report = {}
+    names = set(PROMPTS["v1"]) | {key.split(".")[1] for key in counters if key.startswith("llm.")}
+    for name in sorted(names):
+        prompt_tokens = counters.get(f"llm.{name}.prompt_tokens", 0)
+        cached = counters.get(f"llm.{name}.cached_prompt_tokens", 0)
+        prefix = histograms.get(f"prompt.{name}.cacheable_prefix_tokens")
+        if not prompt_tokens and not prefix: continue
+        report[name] = {
+            "version": get_prompt(name).version if name in PROMPTS["v1"] else config.PROMPT_VERSION,
+            "cacheable_prefix_tokens": prefix["avg"] if prefix else None,
+            "prompt_tokens": prompt_tokens, "cached_prompt_tokens": cached,
+            "completion_tokens": counters.get(f"llm.{name}.completion_tokens", 0),
+            "output_tokens": histograms.get(f"llm.{name}.output_tokens"),
+            "cached_share": round(cached / prompt_tokens, 4) if prompt_tokens else None,
+        }
+    return report
@@ -1,6 +1,10 @@
 import time
 import functools
-from litellm.exceptions import RateLimitError
+import threading
+
+def is_rate_limit_error(exc):
+    """True for LiteLLM/Groq rate limit errors, checked without importing litellm up front."""
+    return type(exc).__name__ == "RateLimitError" or getattr(exc, "status_code", None) == 429
 
 class RateLimitManager:
     """Manages Groq API rate limits intelligently"""
@@ -11,9 +15,14 @@ class RateLimitManager:
         self.request_times = []
         self.token_usage = []
         self.last_reset = time.time()
+        self._lock = threading.RLock()
     
     def can_make_request(self, estimated_tokens=2000):
         """Check if we can make a request without hitting limits"""
+        with self._lock:
+            return self._check(estimated_tokens)
+    
+    def _check(self, estimated_tokens):
         now = time.time()
         
         if now - self.last_reset > 60:
@@ -39,8 +48,21 @@ class RateLimitManager:
     def record_request(self, tokens_used=2000):
         """Record a successful request"""
         now = time.time()
-        self.request_times.append(now)
-        self.token_usage.append((now, tokens_used))
+        with self._lock:
+            self.request_times.append(now)
+            self.token_usage.append((now, tokens_used))
+    
+    def acquire(self, estimated_tokens=2000):
+        """Block until a request fits the limits, then reserve it atomically (safe across threads)"""
+        estimated_tokens = min(estimated_tokens, self.tpm_limit)
+        while True:
+            with self._lock:
+                can_request, _ = self._check(estimated_tokens)
+                if can_request:
+                    self.record_request(estimated_tokens)
+                    return
+                oldest_request = min(self.request_times) if self.request_times else time.time()
+            time.sleep(max(0.5, 60 - (time.time() - oldest_request) + 1))
     
     def wait_if_needed(self, estimated_tokens=2000):
         """Wait until we can make a request"""
@@ -77,7 +99,8 @@ def with_rate_limit(estimated_tokens=2000, max_retries=3):
                     
                     return result
                     
-                except RateLimitError as e:
+                except Exception as e:
+                    if not is_rate_limit_error(e): raise
                     error_msg = str(e)
                     
                     # Extract wait time from error message
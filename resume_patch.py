@@ -0,0 +1,31 @@
+import re
+import json
+from difflib import SequenceMatcher
+
+import config
+
+# Line-level patches between resume versions, so a turn that edits three bullets sends three bullets
+# instead of the whole resume. A patch is a list of [start, end, text] operations against the old
+# text's lines (split on "\n" only, keeping it, exactly like the frontend): lines[start:end] are
+# replaced by text. Operations are in ascending order and do not overlap; apply them last to first.
+
+LINE_RE = re.compile(r"[^\n]*\n|[^\n]+\Z")
+
+
+def make_patch(old: str, new: str):
+    a, b = LINE_RE.findall(old), LINE_RE.findall(new)
+    return [[i1, i2, "".join(b[j1:j2])] for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes() if tag != "equal"]
+
+def apply_patch(old: str, patch) -> str:
+    lines = LINE_RE.findall(old)
+    for start, end, text in reversed(patch): lines[start:end] = [text]
+    return "".join(lines)
+
+def resume_delta(old: str, old_version, new: str, new_version, base_version=None) -> dict:
+    """Response fields for a resume change: a patch when the client holds old_version and the patch is
+    clearly smaller than the text, otherwise the full text."""
+    if base_version is not None and base_version == old_version:
+        patch = make_patch(old, new) if new != old else []
+        if len(json.dumps(patch, ensure_ascii=False)) < config.PATCH_MAX_RATIO * len(new):
+            return {"resume_version": new_version, "base_version": base_version, "resume_patch": patch}
+    return {"resume_version": new_version, "updated_resume": new}
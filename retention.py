@@ -0,0 +1,221 @@
+import os
+import json
+import gzip
+import time
+import datetime
+import threading
+
+import config
+import firebase_utils
+from metrics import metrics
+from session_cache import session_cache
+from search_index import search_index
+
+# Retention for the two collections that only ever grow: conversations.history (ArrayUnion on
+# every turn) and resumes (one full-text document per edit). A background job
+# - ages out conversations idle for longer than idle_days, with all their resume versions,
+# - prunes resume versions to the original plus the last keep_versions,
+# - trims conversation history to the last keep_history entries.
+# Everything removed is first appended to a gzipped JSON-lines archive and synced to disk, so an
+# interrupted run loses nothing (at worst an entry is archived twice). Deletes go out in small
+# batches with a pause in between, and every decision that races with live traffic (is the
+# conversation still idle? how long is the history now?) is re-checked inside a Firestore transaction.
+
+
+def firestore_size(value) -> int:
+    """Approximate Firestore storage size of a value (strings are UTF-8 bytes + 1, numbers and timestamps 8)."""
+    if value is None or isinstance(value, bool): return 1
+    if isinstance(value, (int, float, datetime.datetime)): return 8
+    if isinstance(value, str): return len(value.encode("utf-8")) + 1
+    if isinstance(value, bytes): return len(value)
+    if isinstance(value, (list, tuple)): return sum(firestore_size(v) for v in value)
+    if isinstance(value, dict): return sum(len(k.encode("utf-8")) + 1 + firestore_size(v) for k, v in value.items())
+    return len(str(value)) + 1
+
+def document_size(collection: str, doc_id: str, data: dict) -> int:
+    """Storage size of a whole document: name + fields + 32 bytes of overhead."""
+    return len(collection) + len(doc_id) + 18 + firestore_size(data) + 32
+
+
+class Archive:
+    """Append-only gzipped JSON lines, one file per run."""
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, f"retention-{time.strftime('%Y%m%d-%H%M%S')}.jsonl.gz")
+        self._raw = None
+        self._out = None
+
+    def write(self, kind, conversation_id, data):
+        if self._out is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._raw = open(self.path, "ab")
+            self._out = gzip.GzipFile(fileobj=self._raw, mode="ab")
+        line = json.dumps({"kind": kind, "conversation_id": conversation_id, "data": data}, ensure_ascii=False, default=str)
+        self._out.write(line.encode("utf-8") + b"\n")
+
+    def sync(self):
+        """Make everything written so far durable; called before each delete."""
+        if self._out is None: return
+        self._out.flush()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+
+    def close(self):
+        if self._out is None: return
+        self._out.close(); self._raw.close()
+        self._out = self._raw = None
+
+    @property
+    def size(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+
+class RetentionJob:
+    """Applies the retention policy to the store (firebase_utils, or anything with the same functions)."""
+
+    def __init__(self, store, archive_dir, keep_versions=10, keep_history=200, idle_days=180,
+                 batch_size=200, pause_seconds=0.1, is_active=None, on_removed=None):
+        self.store, self.archive_dir = store, archive_dir
+        self.keep_versions, self.keep_history = max(1, keep_versions), max(1, keep_history)
+        self.idle_days, self.batch_size, self.pause_seconds = idle_days, batch_size, pause_seconds
+        self.is_active = is_active or (lambda conversation_id: False)
+        self.on_removed = on_removed or (lambda conversation_id: None)
+        self.running = False
+        self.last_report = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- scheduling ---
+    def start(self, interval_seconds):
+        """Run every interval_seconds in a daemon thread (first run after one interval)."""
+        if self._thread is not None: return
+        def loop():
+            while not self._stop.wait(interval_seconds): self.run()
+        self._thread = threading.Thread(target=loop, name="retention", daemon=True)
+        self._thread.start()
+
+    def trigger(self, dry_run=False):
+        """Start one run in the background; False if a run is already in progress."""
+        if self.running: return False
+        threading.Thread(target=self.run, kwargs={"dry_run": dry_run}, name="retention-run", daemon=True).start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        return {"running": self.running, "last_report": self.last_report}
+
+    # --- the run ---
+    def run(self, dry_run=False):
+        """One full pass. Returns (and keeps) a report of what was, or in dry_run would be, removed."""
+        if not self._lock.acquire(blocking=False): return None
+        self.running = True
+        report = {
+            "dry_run": dry_run, "started": time.time(), "conversations_scanned": 0, "conversations_aged_out": 0,
+            "history_entries_trimmed": 0, "versions_pruned": 0, "reclaimed_bytes": 0, "archived_bytes": 0,
+            "archive_path": None, "errors": 0,
+        }
+        archive = Archive(self.archive_dir)
+        try:
+            aged_out = self._age_out_and_trim(report, archive, dry_run)
+            self._prune_versions(report, archive, dry_run, skip=aged_out)
+        finally:
+            archive.close()
+            if archive.size:
+                report["archive_path"], report["archived_bytes"] = archive.path, archive.size
+            report["seconds"] = round(time.time() - report["started"], 3)
+            self.last_report = report
+            self.running = False
+            self._lock.release()
+        if not dry_run:
+            metrics.incr("retention.reclaimed_bytes", report["reclaimed_bytes"])
+            metrics.incr("retention.versions_pruned", report["versions_pruned"])
+            metrics.incr("retention.conversations_aged_out", report["conversations_aged_out"])
+        return report
+
+    def _pause(self):
+        if self.pause_seconds: time.sleep(self.pause_seconds)
+
+    def _age_out_and_trim(self, report, archive, dry_run):
+        idle_before = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=self.idle_days)
+        aged_out = set()
+        for conversation_id, data in self.store.stream_conversations():
+            if self._stop.is_set(): break
+            report["conversations_scanned"] += 1
+            try:
+                last_active = data.get("updated_at") or data.get("created_at")
+                if self.idle_days and isinstance(last_active, datetime.datetime) and last_active < idle_before \
+                        and not self.is_active(conversation_id):
+                    if self._age_out(conversation_id, data, idle_before, report, archive, dry_run): aged_out.add(conversation_id)
+                elif len(data.get("history", [])) > self.keep_history:
+                    self._trim(conversation_id, data, report, archive, dry_run)
+            except Exception as e:
+                report["errors"] += 1
+                print(f"Retention failed for conversation {conversation_id}: {e}")
+        return aged_out
+
+    def _age_out(self, conversation_id, data, idle_before, report, archive, dry_run):
+        resumes = self.store.get_conversation_resumes(conversation_id)
+        size = document_size("conversations", conversation_id, data) + sum(document_size("resumes", i, d) for i, d in resumes.items())
+        if not dry_run:
+            archive.write("conversation", conversation_id, data)
+            for resume in resumes.values(): archive.write("resume_version", conversation_id, resume)
+            archive.sync()
+            if not self.store.delete_conversation_if_idle(conversation_id, idle_before): return False
+            self.store.delete_resumes(list(resumes))
+            self.on_removed(conversation_id)
+            self._pause()
+        report["conversations_aged_out"] += 1
+        report["versions_pruned"] += len(resumes)
+        report["reclaimed_bytes"] += size
+        return True
+
+    def _trim(self, conversation_id, data, report, archive, dry_run):
+        if dry_run:
+            dropped = data["history"][:len(data["history"]) - self.keep_history]
+        else:
+            # Archive the snapshot's overflow first; the transaction may drop slightly more if turns landed meanwhile
+            overflow = data["history"][:len(data["history"]) - self.keep_history]
+            archive.write("history", conversation_id, overflow)
+            archive.sync()
+            dropped = self.store.trim_conversation_history(conversation_id, self.keep_history)
+            if len(dropped) > len(overflow): archive.write("history", conversation_id, dropped[len(overflow):])
+            self._pause()
+        report["history_entries_trimmed"] += len(dropped)
+        report["reclaimed_bytes"] += firestore_size(dropped)
+
+    def _prune_versions(self, report, archive, dry_run, skip):
+        by_conversation = {}
+        for doc_id, conversation_id, version in self.store.stream_resume_refs():
+            if conversation_id not in skip: by_conversation.setdefault(conversation_id, []).append((version, doc_id))
+        doomed = []
+        for conversation_id, versions in by_conversation.items():
+            if len(versions) <= self.keep_versions + 1: continue
+            versions.sort()
+            # The original (lowest version) and the newest keep_versions stay
+            doomed.extend(doc_id for _, doc_id in versions[1:len(versions) - self.keep_versions])
+        for start in range(0, len(doomed), self.batch_size):
+            if self._stop.is_set(): break
+            try:
+                docs = self.store.get_resumes(doomed[start:start + self.batch_size])
+                if not dry_run:
+                    for resume in docs.values(): archive.write("resume_version", resume.get("conversationId"), resume)
+                    archive.sync()
+                    self.store.delete_resumes(list(docs))
+                    self._pause()
+                report["versions_pruned"] += len(docs)
+                report["reclaimed_bytes"] += sum(document_size("resumes", i, d) for i, d in docs.items())
+            except Exception as e:
+                report["errors"] += 1
+                print(f"Retention failed pruning resume versions: {e}")
+
+# Global retention job over Firestore
+retention = RetentionJob(
+    firebase_utils, config.RETENTION_ARCHIVE_DIR, keep_versions=config.RETENTION_KEEP_VERSIONS,
+    keep_history=config.RETENTION_KEEP_HISTORY, idle_days=config.RETENTION_IDLE_DAYS,
+    batch_size=config.RETENTION_BATCH_SIZE, pause_seconds=config.RETENTION_PAUSE_SECONDS,
+    is_active=lambda conversation_id: conversation_id in session_cache.sessions,
+    on_removed=lambda conversation_id: (session_cache.invalidate(conversation_id), search_index.remove(conversation_id)),
+)
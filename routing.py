@@ -0,0 +1,77 @@
+import re
+import json
+
+from scoring import tokenize
+
+# Agents the router can execute inline in combined mode (no tools required)
+INLINE_AGENTS = ('job_matcher', 'section_enhancer')
+
+ROUTE_END_TAG = '###ROUTE_END###'
+
+JOB_MATCH_RE = re.compile(r"job description|\bjd\b|\bmatch|\bscore\b|\bfit\b|requirements|responsibilities|qualifications", re.I)
+
+# Cheap keyword heuristics used to guess the specialist before the router answers.
+AGENT_PATTERNS = [
+    (re.compile(r"\btranslat|\blocali[sz]|\bin (?:german|french|spanish|japanese|hindi|chinese|portuguese|italian|dutch|korean)\b", re.I), "translation"),
+    (JOB_MATCH_RE, "job_matcher"),
+    (re.compile(r"\bcompany\b|\bculture\b|\bresearch\b|\bvalues\b|\bfor (?:google|amazon|meta|microsoft|apple|netflix|anthropic|openai)\b", re.I), "company_researcher"),
+    (re.compile(r"\bsection\b|\bimprove\b|\benhance\b|\bbullet|\brewrite\b|\bsummary\b|\bexperience\b|\bprojects?\b|\bstar\b", re.I), "section_enhancer"),
+]
+
+
+def parse_route_output(output: str):
+    """Split router output into (agent_sequence, inline_result).
+
+    inline_result is the specialist output the router produced in combined mode,
+    or None when the router only returned a route."""
+    route_part, inline_result = output, None
+    if ROUTE_END_TAG in output:
+        route_part, rest = output.split(ROUTE_END_TAG, 1)
+        inline_result = rest.strip() or None
+    match = re.search(r"\[[^\[\]]*\]", route_part)
+    try: sequence = json.loads(match.group(0)) if match else json.loads(route_part.strip())
+    except json.JSONDecodeError: return ['general_chitchat'], None
+    if not isinstance(sequence, list) or not sequence: return ['general_chitchat'], None
+    sequence = [str(agent) for agent in sequence]
+    # Only trust an inline result when the route really is a single inline-capable agent
+    if len(sequence) != 1 or sequence[0] not in INLINE_AGENTS: inline_result = None
+    return sequence, inline_result
+
+
+# Only explicit score phrases count: bare "score"/"fit" also appear in rewrite requests ("a great fit for startups")
+SCORE_ONLY_RE = re.compile(r"\b(?:match(?:ing)? score|fit score|how (?:well|closely|good)\b[^.?!]*\b(?:match|fit)|how good a fit|"
+                           r"score (?:my resume |me |it )?against)", re.I)
+REWRITE_RE = re.compile(r"\b(?:rewrite|tailor|optimi[sz]e|update|improve|enhance|adapt|edit|change|make|align|customi[sz]e|revise|adjust)\b", re.I)
+# "JD:", "job description:", "job posting:", "role:" etc. introduce a pasted job description
+JD_MARKER_RE = re.compile(r"(?:job description|\bjd|job posting|\bposting|\bjob|\brole|\bposition)\s*[:\n]", re.I)
+# Distinct content terms a job description needs: a few after an explicit marker, many without one
+JD_MIN_TERMS_MARKED, JD_MIN_TERMS_UNMARKED = 2, 20
+
+def is_score_only(message: str) -> bool:
+    """True when the user only asks how well the resume matches, without asking for a rewrite."""
+    return bool(SCORE_ONLY_RE.search(message)) and not REWRITE_RE.search(message)
+
+def job_description_in(text: str):
+    """The job description pasted into text, or None when there is none (a question alone is not one)."""
+    marker = JD_MARKER_RE.search(text)
+    description = text[marker.end():] if marker else text
+    needed = JD_MIN_TERMS_MARKED if marker else JD_MIN_TERMS_UNMARKED
+    return description.strip() if len(set(tokenize(description))) >= needed else None
+
+def find_job_description(message: str, history=()):
+    """The job description in the message, else the most recent one the user sent earlier in the conversation."""
+    for text in [message] + [entry.get("content", "") for entry in reversed(history or []) if entry.get("role") == "user"]:
+        description = job_description_in(text)
+        if description: return description
+    return None
+
+def is_local_score_question(message: str, history=()) -> bool:
+    """A score-only question with a job description to score against: answered by the local engine without routing."""
+    return is_score_only(message) and find_job_description(message, history) is not None
+
+def speculation_target(message: str):
+    """The specialist worth starting before the router answers, or None. Only a message that exactly one
+    pattern matches qualifies, and never a score-only question (answered locally, without a rewrite)."""
+    matches = {agent_type for pattern, agent_type in AGENT_PATTERNS if pattern.search(message)}
+    if len(matches) != 1 or is_score_only(message): return None
+    return matches.pop()
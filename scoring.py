@@ -0,0 +1,208 @@
+import re
+import math
+import hashlib
+import threading
+import functools
+from collections import OrderedDict
+import numpy as np
+
+import config
+
+# Local, deterministic resume vs job description scoring (TF-IDF coverage + BM25 + optional embeddings).
+# Runs in milliseconds and gives the same answer every time, unlike a score scraped from LLM prose.
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+STOPWORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can could did do does doing
+during each either etc for from further had has have having he her here hers him his how i if in into is it its
+itself just least less like may me might more most must my no nor not now of off on once only or other our ours out
+over own per plus same she should so some such than that the their theirs them then there these they this those
+through to too under until up upon us very was we well were what when where which while who whom why will with
+within without would you your yours able ability across experience experienced year years strong excellent good
+great work working team teams role candidate candidates ideal including include includes preferred required
+requirements responsibilities qualifications skills skill knowledge understanding using use used new etc join
+looking seeking plus bonus nice must-have will job position company opportunity environment need needs needed
+hiring hire want wants
+""".split())
+
+
+def tokenize(text: str):
+    """Lowercase word tokens with stopwords removed; keeps tech tokens like c++, c#, node.js."""
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS and not t.isdigit() and len(t) > 1]
+
+PHRASE_SPLIT_RE = re.compile(r"[\n,;:()|/•]+|\.\s")
+
+def terms(text: str):
+    """Unigrams plus bigrams of adjacent tokens within a phrase ("machine learning", "distributed systems")."""
+    unigrams, bigrams = [], []
+    for phrase in PHRASE_SPLIT_RE.split(text):
+        tokens = tokenize(phrase)
+        unigrams += tokens
+        bigrams += [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return unigrams + bigrams
+
+@functools.lru_cache(maxsize=256)
+def resume_terms(resume_text: str):
+    """terms() of a resume, cached: a conversation scores the same resume against many messages."""
+    return tuple(terms(resume_text))
+
+
+class ScoringEngine:
+    """Vectorized keyword scoring of resumes against job descriptions.
+
+    IDF weights come from document frequencies over a corpus: fit() sets it, add_documents() grows it
+    (stored resumes at startup, then uploads and batch job descriptions). Each distinct document counts
+    once, and only the max_docs most recently added ones count, so the weights follow recent traffic and
+    memory stays bounded. Until the corpus has min_corpus documents every term weighs 1, which still
+    gives reproducible scores for one-off pairs."""
+
+    def __init__(self, k1=1.5, b=0.75, embedding_model=None, min_corpus=1, max_docs=5000):
+        self.k1, self.b, self.min_corpus, self.max_docs = k1, b, min_corpus, max_docs
+        self.df, self.n_docs, self.total_len = {}, 0, 0
+        self._documents = OrderedDict()   # document hash -> (distinct terms, length), oldest first
+        self._corpus_lock = threading.Lock()
+        self.embedding_model_name = embedding_model if embedding_model is not None else config.EMBEDDING_MODEL
+        self._embedder = None
+        self._resume_vectors = OrderedDict()   # resume text -> normalized embedding (LRU)
+        self._vectors_lock = threading.Lock()
+
+    def fit(self, documents):
+        """Learn IDF weights and the average document length for BM25 from a corpus, replacing any earlier one."""
+        with self._corpus_lock: self.df, self.n_docs, self.total_len, self._documents = {}, 0, 0, OrderedDict()
+        return self.add_documents(documents)
+
+    def add_documents(self, documents):
+        """Add documents to the IDF corpus; ones already counted are skipped, and past max_docs the oldest drop out."""
+        hashed = {hashlib.sha256(doc.encode('utf-8')).digest(): doc for doc in documents}
+        with self._corpus_lock: hashed = {h: doc for h, doc in hashed.items() if h not in self._documents}
+        counted = [(h, terms(doc)) for h, doc in hashed.items()]
+        with self._corpus_lock:
+            for doc_hash, doc_terms in counted:
+                if doc_hash in self._documents: continue
+                distinct = frozenset(doc_terms)
+                for term in distinct: self.df[term] = self.df.get(term, 0) + 1
+                self._documents[doc_hash] = (distinct, len(doc_terms))
+                self.n_docs += 1
+                self.total_len += len(doc_terms)
+            while len(self._documents) > self.max_docs: self._forget_oldest()
+        return self
+
+    def _forget_oldest(self):
+        _, (distinct, length) = self._documents.popitem(last=False)
+        for term in distinct:
+            count = self.df[term] - 1
+            if count: self.df[term] = count
+            else: del self.df[term]
+        self.n_docs -= 1
+        self.total_len -= length
+
+    @property
+    def avg_doc_len(self):
+        return self.total_len / self.n_docs if self.n_docs >= self.min_corpus and self.n_docs else None
+
+    def _weight(self, term):
+        n = self.n_docs
+        if n < self.min_corpus or not n: return 1.0
+        count = self.df.get(term, 0)
+        return math.log(1 + (n - count + 0.5) / (count + 0.5))
+
+    def _embedder_or_none(self):
+        if not self.embedding_model_name: return None
+        if self._embedder is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                self.embedding_model_name = None
+                return None
+            self._embedder = SentenceTransformer(self.embedding_model_name, device="cpu")
+        return self._embedder
+
+    def resume_embedding(self, resume_text: str):
+        """Normalized embedding of a resume, cached per text; None without an embedding model."""
+        embedder = self._embedder_or_none()
+        if embedder is None: return None
+        with self._vectors_lock:
+            vector = self._resume_vectors.get(resume_text)
+            if vector is not None:
+                self._resume_vectors.move_to_end(resume_text)
+                return vector
+        vector = np.asarray(embedder.encode([resume_text], normalize_embeddings=True)[0])
+        with self._vectors_lock:
+            self._resume_vectors[resume_text] = vector
+            if len(self._resume_vectors) > 256: self._resume_vectors.popitem(last=False)
+        return vector
+
+    def score_many(self, resume_text: str, job_descriptions: list, top_missing=10):
+        """Score one resume against many job descriptions in one vectorized pass.
+
+        Returns a list of dicts with 'match_score' (0-100), 'missing_keywords', 'bm25' and 'coverage'."""
+        jd_terms = [terms(jd) for jd in job_descriptions]
+        resume_term_list = resume_terms(resume_text)
+        vocab = {}
+        for term in resume_term_list:
+            vocab.setdefault(term, len(vocab))
+        for t_list in jd_terms:
+            for term in t_list: vocab.setdefault(term, len(vocab))
+        if not vocab: return [{"match_score": 0.0, "missing_keywords": [], "bm25": 0.0, "coverage": 0.0} for _ in job_descriptions]
+
+        idf = np.array([self._weight(term) for term in vocab], dtype=np.float64)
+        resume_tf = np.zeros(len(vocab)); jd_tf = np.zeros((len(job_descriptions), len(vocab)))
+        for term in resume_term_list: resume_tf[vocab[term]] += 1
+        for row, t_list in enumerate(jd_terms):
+            for term in t_list: jd_tf[row, vocab[term]] += 1
+
+        # Coverage: IDF-weighted share of JD terms (each counted once) that also appear in the resume
+        jd_present = (jd_tf > 0).astype(np.float64) * idf
+        in_resume = (resume_tf > 0).astype(np.float64)
+        jd_mass = jd_present.sum(axis=1)
+        coverage = np.divide(jd_present @ in_resume, jd_mass, out=np.zeros(len(job_descriptions)), where=jd_mass > 0)
+
+        # Cosine similarity of TF-IDF vectors
+        resume_vec = resume_tf * idf; jd_vecs = jd_tf * idf
+        norms = np.linalg.norm(jd_vecs, axis=1) * (np.linalg.norm(resume_vec) or 1.0)
+        cosine = np.divide(jd_vecs @ resume_vec, norms, out=np.zeros(len(job_descriptions)), where=norms > 0)
+
+        # BM25 of the resume treated as the document and each JD as the query
+        doc_len = len(resume_term_list)
+        avg_len = self.avg_doc_len or doc_len or 1
+        tf_part = resume_tf * (self.k1 + 1) / (resume_tf + self.k1 * (1 - self.b + self.b * doc_len / avg_len))
+        bm25 = (jd_tf > 0).astype(np.float64) @ (idf * tf_part)
+
+        blended = 0.7 * coverage + 0.3 * cosine
+        resume_vector = self.resume_embedding(resume_text)
+        if resume_vector is not None:
+            vectors = self._embedder.encode(list(job_descriptions), normalize_embeddings=True)
+            semantic = np.clip(np.asarray(vectors) @ resume_vector, 0, 1)
+            blended = 0.5 * coverage + 0.2 * cosine + 0.3 * semantic
+
+        inv_vocab = list(vocab)
+        results = []
+        for row in range(len(job_descriptions)):
+            missing_idx = np.nonzero((jd_tf[row] > 0) & (resume_tf == 0))[0]
+            # Most important gaps first: IDF x JD frequency, ties broken alphabetically for stable output
+            ranked = sorted(missing_idx, key=lambda i: (-idf[i] * jd_tf[row, i], inv_vocab[i]))
+            results.append({
+                "match_score": round(float(blended[row]) * 100, 1),
+                "missing_keywords": [inv_vocab[i] for i in ranked if ' ' not in inv_vocab[i]][:top_missing],
+                "bm25": round(float(bm25[row]), 4),
+                "coverage": round(float(coverage[row]), 4),
+            })
+        return results
+
+    def score(self, resume_text: str, job_description: str, top_missing=10):
+        """Score a single resume/JD pair."""
+        return self.score_many(resume_text, [job_description], top_missing)[0]
+
+# Global scoring engine
+scoring_engine = ScoringEngine(min_corpus=config.SCORING_MIN_CORPUS, max_docs=config.SCORING_CORPUS_WINDOW)
+
+
+def keyword_gap_hint(resume_text: str, job_description: str) -> str:
+    """Precomputed score and gap list to hand the job_matcher LLM instead of making it rediscover them."""
+    result = scoring_engine.score(resume_text, job_description)
+    missing = ', '.join(result['missing_keywords']) or 'none'
+    return (
+        f"PRECOMPUTED KEYWORD ANALYSIS (deterministic): keyword match {result['match_score']}%, "
+        f"JD keywords missing from the resume: {missing}. Use this as your starting point for the skill gaps."
+    )
@@ -0,0 +1,227 @@
+import re
+import math
+import threading
+from array import array
+from collections import Counter
+import numpy as np
+
+import config
+import firebase_utils
+from metrics import metrics
+from scoring import tokenize
+from verifier import verifier
+
+# In-process inverted index over stored resumes, so "Kubernetes AND Go" is a postings intersection
+# instead of a scan of every version in Firestore.
+#
+# Documents get increasing integer ids, so every postings list (array of doc ids + array of term
+# frequencies) stays sorted by appending. Replacing a conversation's latest version appends a new
+# document and tombstones the old one; compaction drops tombstoned postings once they pile up.
+# Skills from the taxonomy are indexed as "skill:<canonical>" terms, so aliases ("k8s", "golang")
+# and case-sensitive names ("Go", "R") match exactly.
+
+SKILL_PREFIX = "skill:"
+QUERY_TOKEN_RE = re.compile(r'\(|\)|"[^"]*"|[^\s()"]+')
+OPERATORS = {"and": "AND", "or": "OR", "not": "NOT", "&&": "AND", "||": "OR"}
+
+
+def document_terms(text: str):
+    """Term frequencies of a resume: word tokens plus one skill:<name> term per taxonomy skill."""
+    counts = Counter(tokenize(text))
+    for skill in verifier.skill_index.extract(text): counts[SKILL_PREFIX + skill.lower()] = 1
+    return counts
+
+def query_terms(atom: str):
+    """Index terms an atom of a query must all match: the skill term for a known skill, else its tokens."""
+    skill = verifier.skill_index.names.get(atom.lower().strip())
+    if skill: return [SKILL_PREFIX + skill.lower()]
+    return list(dict.fromkeys(tokenize(atom)))
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+class ResumeIndex:
+    """Inverted index of resumes, keyed by conversation (latest version only) or by (conversation, version)."""
+
+    def __init__(self, all_versions=False, k1=1.5, b=0.75, compact_ratio=0.3):
+        self.all_versions, self.k1, self.b, self.compact_ratio = all_versions, k1, b, compact_ratio
+        self.postings = {}          # term -> (array of doc ids, array of term frequencies)
+        self.docs = []              # doc id -> (conversation_id, version)
+        self.doc_len = array("I")
+        self.alive = bytearray()
+        self.by_key = {}            # conversation_id (or (conversation_id, version)) -> doc id
+        self.latest_version = {}    # conversation_id -> highest version seen
+        self.live_docs = self.live_len = self.dead_docs = 0
+        self.loaded = False
+        self._lock = threading.RLock()
+
+    # --- updates ---
+    def add(self, conversation_id: str, version: int, text: str):
+        """Index one saved version; in latest-only mode an older version than the indexed one is ignored."""
+        with self._lock:
+            if version < self.latest_version.get(conversation_id, 0) and not self.all_versions: return False
+            self.latest_version[conversation_id] = max(version, self.latest_version.get(conversation_id, 0))
+            key = (conversation_id, version) if self.all_versions else conversation_id
+            if key in self.by_key: self._remove(self.by_key.pop(key))
+            counts = document_terms(text)
+            doc = len(self.docs)
+            self.docs.append((conversation_id, version))
+            length = sum(counts.values())
+            self.doc_len.append(length); self.alive.append(1)
+            for term, tf in counts.items():
+                entry = self.postings.get(term)
+                if entry is None: entry = self.postings[term] = (array("I"), array("H"))
+                entry[0].append(doc); entry[1].append(min(tf, 65535))
+            self.by_key[key] = doc
+            self.live_docs += 1; self.live_len += length
+            if self.dead_docs > 1000 and self.dead_docs > self.compact_ratio * len(self.docs): self.compact()
+        metrics.incr("search_index.indexed")
+        return True
+
+    def remove(self, conversation_id: str):
+        """Drop every indexed version of a conversation."""
+        with self._lock:
+            for key in [k for k in self.by_key if k == conversation_id or (isinstance(k, tuple) and k[0] == conversation_id)]:
+                self._remove(self.by_key.pop(key))
+            self.latest_version.pop(conversation_id, None)
+
+    def _remove(self, doc):
+        if not self.alive[doc]: return
+        self.alive[doc] = 0
+        self.live_docs -= 1; self.live_len -= self.doc_len[doc]; self.dead_docs += 1
+
+    def compact(self):
+        """Rewrite postings without tombstoned documents and renumber the survivors."""
+        with self._lock:
+            remap = np.full(len(self.docs), -1, dtype=np.int64)
+            keep = np.flatnonzero(np.frombuffer(bytes(self.alive), dtype=np.uint8))
+            remap[keep] = np.arange(len(keep))
+            postings = {}
+            for term, (docs, tfs) in self.postings.items():
+                d = np.array(docs, dtype=np.int64)
+                mask = remap[d] >= 0
+                if mask.any():
+                    postings[term] = (array("I", remap[d[mask]].astype(np.uint32).tobytes()), array("H", np.array(tfs, dtype=np.uint16)[mask].tobytes()))
+            self.postings = postings
+            self.docs = [self.docs[i] for i in keep]
+            self.doc_len = array("I", np.array(self.doc_len, dtype=np.uint32)[keep].tobytes())
+            self.alive = bytearray(b"\x01" * len(keep))
+            self.by_key = {key: int(remap[doc]) for key, doc in self.by_key.items()}
+            self.dead_docs = 0
+        metrics.incr("search_index.compactions")
+
+    def bootstrap(self, documents):
+        """Index an initial stream of {"conversationId", "version", "modified_text"} dicts (any order)."""
+        count = 0
+        for doc in documents:
+            count += self.add(doc["conversationId"], doc.get("version", 1), doc.get("modified_text") or doc.get("original_text", ""))
+        self.loaded = True
+        return count
+
+    # --- queries ---
+    def _docs(self, term):
+        entry = self.postings.get(term)
+        return np.array(entry[0], dtype=np.int64) if entry else np.zeros(0, dtype=np.int64)
+
+    def _parse(self, query):
+        tokens = QUERY_TOKEN_RE.findall(query)
+        pos = 0
+        def peek(): return tokens[pos] if pos < len(tokens) else None
+        def op(token): return OPERATORS.get(token.lower()) if token else None
+        def parse_or():
+            nonlocal pos
+            node = parse_and()
+            while op(peek()) == "OR":
+                pos += 1
+                node = ("or", node, parse_and())
+            return node
+        def parse_and():
+            nonlocal pos
+            node = parse_unary()
+            while peek() is not None and peek() != ")" and op(peek()) != "OR":
+                if op(peek()) == "AND": pos += 1
+                node = ("and", node, parse_unary())
+            return node
+        def parse_unary():
+            nonlocal pos
+            token = peek()
+            if token is None: raise QuerySyntaxError("Unexpected end of query.")
+            pos += 1
+            if op(token) == "NOT": return ("not", parse_unary())
+            if token == "(":
+                node = parse_or()
+                if peek() != ")": raise QuerySyntaxError("Missing ')'.")
+                pos += 1
+                return node
+            if token == ")" or op(token): raise QuerySyntaxError(f"Unexpected '{token}'.")
+            return ("terms", query_terms(token.strip('"')))
+        if not tokens: raise QuerySyntaxError("Empty query.")
+        node = parse_or()
+        if pos != len(tokens): raise QuerySyntaxError(f"Unexpected '{tokens[pos]}'.")
+        return node
+
+    def _evaluate(self, node, universe):
+        kind = node[0]
+        if kind == "terms":
+            if not node[1]: return universe        # only stopwords: no constraint
+            result = self._docs(node[1][0])
+            for term in node[1][1:]: result = np.intersect1d(result, self._docs(term), assume_unique=True)
+            return result
+        if kind == "and": return np.intersect1d(self._evaluate(node[1], universe), self._evaluate(node[2], universe), assume_unique=True)
+        if kind == "or": return np.union1d(self._evaluate(node[1], universe), self._evaluate(node[2], universe))
+        return np.setdiff1d(universe, self._evaluate(node[1], universe), assume_unique=True)
+
+    @staticmethod
+    def _positive_terms(node):
+        if node[0] == "terms": return list(node[1])
+        if node[0] == "not": return []
+        return ResumeIndex._positive_terms(node[1]) + ResumeIndex._positive_terms(node[2])
+
+    def search(self, query: str, mode="boolean", limit=20):
+        """Boolean (AND/OR/NOT, parentheses, implicit AND, "quoted" multi-word skills) or ranked BM25 search.
+
+        Boolean results are ranked by BM25 of their positive terms; bm25 mode matches any term."""
+        limit = max(1, limit)
+        node = self._parse(query)
+        with self._lock, metrics.timer(f"search_index.query_seconds.{mode}"):
+            n = len(self.docs)
+            alive = np.frombuffer(bytes(self.alive), dtype=np.uint8).astype(bool)
+            terms = list(dict.fromkeys(self._positive_terms(node)))
+            if mode == "boolean":
+                candidates = self._evaluate(node, np.flatnonzero(alive))
+                candidates = candidates[alive[candidates]]
+            elif mode == "bm25":
+                candidates = None
+            else: raise QuerySyntaxError("mode must be 'boolean' or 'bm25'.")
+            scores = np.zeros(n, dtype=np.float64)
+            doc_len = np.array(self.doc_len, dtype=np.float64)
+            avgdl = self.live_len / self.live_docs if self.live_docs else 1.0
+            for term in terms:
+                entry = self.postings.get(term)
+                if not entry: continue
+                docs, tfs = np.array(entry[0], dtype=np.int64), np.array(entry[1], dtype=np.float64)
+                live = alive[docs]
+                docs, tfs = docs[live], tfs[live]
+                idf = math.log(1 + (self.live_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + self.k1 * (1 - self.b + self.b * doc_len[docs] / avgdl))
+            if candidates is None: candidates = np.flatnonzero((scores > 0) & alive[:n])
+            total = len(candidates)
+            if total > limit:
+                top = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+            else:
+                top = candidates
+            top = top[np.lexsort((top, -scores[top]))]
+            results = [{"conversation_id": self.docs[d][0], "version": self.docs[d][1], "score": round(float(scores[d]), 4)} for d in top]
+        return {"total": total, "results": results}
+
+    def stats(self):
+        with self._lock:
+            return {"documents": self.live_docs, "tombstones": self.dead_docs, "terms": len(self.postings),
+                    "postings": sum(len(docs) for docs, _ in self.postings.values()), "loaded": self.loaded}
+
+
+# Global index, kept current by every firebase_utils.save_resume_version call in this process
+search_index = ResumeIndex(all_versions=config.SEARCH_INDEX_ALL_VERSIONS)
+firebase_utils.on_resume_saved(lambda conversation_id, version, text: search_index.add(conversation_id, version, text))
@@ -0,0 +1,52 @@
+import re
+import functools
+
+# Resume section parsing shared by translation and upload precomputation.
+
+KNOWN_HEADINGS = {
+    "summary", "professional summary", "profile", "objective", "about", "about me", "experience",
+    "work experience", "professional experience", "employment", "employment history", "education",
+    "skills", "technical skills", "core skills", "key skills", "projects", "personal projects",
+    "certifications", "certificates", "awards", "achievements", "publications", "languages",
+    "interests", "volunteering", "volunteer experience", "leadership", "activities", "contact",
+}
+
+_MARKUP_RE = re.compile(r"^[#*=_\-\s]+|[#*=_:\-\s]+$")
+
+
+def heading_title(line: str):
+    """Normalized section title if the line looks like a heading, else None."""
+    stripped = line.strip()
+    if not stripped or len(stripped) > 50: return None
+    title = _MARKUP_RE.sub("", stripped)
+    if not title or not any(c.isalpha() for c in title): return None
+    if title.lower() in KNOWN_HEADINGS: return title.title()
+    # ALL-CAPS short lines ("PROFESSIONAL EXPERIENCE") are headings too
+    letters = [c for c in title if c.isalpha()]
+    if len(letters) >= 4 and all(c.isupper() for c in letters) and len(title.split()) <= 4: return title.title()
+    return None
+
+
+def split_sections(text: str):
+    """Split a resume into ordered sections.
+
+    Returns a list of {"title", "text"} dicts; the text of each section includes its heading line,
+    and "".join(s["text"] for s in sections) == text. Content before the first heading is the
+    "Header" section (name, contact details)."""
+    sections, current = [], {"title": "Header", "text": ""}
+    for line in text.splitlines(keepends=True):
+        title = heading_title(line)
+        if title is not None and current["text"].strip():
+            sections.append(current)
+            current = {"title": title, "text": ""}
+        elif title is not None:
+            current["title"] = title
+        current["text"] += line
+    if current["text"]: sections.append(current)
+    return sections
+
+
+@functools.lru_cache(maxsize=256)
+def cached_sections(text: str):
+    """split_sections() of a resume, parsed once per text for every caller (read-only: a tuple of shared dicts)."""
+    return tuple(split_sections(text))
@@ -0,0 +1,210 @@
+import re
+import time
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict, deque
+import numpy as np
+
+import config
+from metrics import metrics
+
+# Cache for paraphrased requests. A query is normalized (filler dropped, intent verbs and synonyms folded),
+# role words bind the terms after them ("from german", "to english", "add python", "remove java"), and the
+# result is embedded locally. A lookup is a nearest-neighbour search within one resume version and agent;
+# a neighbour above the similarity threshold is used only if every term of the two queries pairs up with
+# a near-identical term in the same role, so spelling variants hit but another company, language direction
+# or skill never does.
+
+# Filler words carry no meaning for cache purposes and are dropped.
+FILLER_WORDS = frozenset("""
+a an the my me i you your it its this that these please can could would will should kindly just help want need
+for of in on at and or by about resume make get give do more most really very some bit little so
+""".split())
+
+# Paraphrased intent verbs fold onto one canonical token.
+SYNONYMS = {
+    "optimise": "optimize", "improve": "optimize", "better": "optimize", "enhance": "optimize", "tailor": "optimize",
+    "polish": "optimize", "stronger": "optimize", "upgrade": "optimize", "tweak": "optimize", "best": "optimize",
+    "rewrite": "optimize", "update": "optimize", "fix": "optimize", "adapt": "optimize",
+    "cv": "resume", "translate": "translation", "translated": "translation",
+}
+INTENT_WORDS = frozenset({"optimize"})
+# Requests like these take their meaning from what follows them; they end the current role.
+ACTION_WORDS = INTENT_WORDS | {"translation"}
+# Role words and the role they give the terms that follow, up to the next role or action word
+ROLE_WORDS = {
+    "from": "from", "to": "to", "into": "to", "with": "with",
+    "add": "add", "include": "add", "remove": "remove", "drop": "remove", "delete": "remove", "without": "remove",
+    "replace": "replace",
+}
+
+WORD_RE = re.compile(r"[a-z0-9+#.]+")
+
+# Two terms pair up when their character trigrams overlap this much ("section"/"sections", not "google"/"meta")
+TERM_MATCH_MIN = 0.6
+
+
+def normalize_query(query: str):
+    """Lowercased, synonym-folded tokens of a query with filler words removed (role words are kept)."""
+    tokens = (SYNONYMS.get(t, t) for t in (w.strip('.') for w in WORD_RE.findall(query.lower())) if t)
+    return [t for t in tokens if t not in FILLER_WORDS]
+
+def bind_roles(tokens):
+    """Content terms in query order, prefixed with the role word governing them ("to:german").
+
+    Intent words are dropped, so "optimize for Google" and "Make it better for Google" give the same terms."""
+    role, bound = None, []
+    for token in tokens:
+        if token in ROLE_WORDS: role = ROLE_WORDS[token]
+        elif token in ACTION_WORDS:
+            role = None
+            if token not in INTENT_WORDS: bound.append(token)
+        else: bound.append(f"{role}:{token}" if role else token)
+    return bound
+
+def key_terms(tokens):
+    """The set of role-bound content terms of a query.
+
+    "translate from German to English" and "translate from English to German" have different key terms,
+    as do "add Python, remove Java" and "add Java, remove Python"."""
+    return frozenset(bind_roles(tokens))
+
+def _trigrams(word):
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _same_term(a, b):
+    if a == b: return True
+    role_a, _, word_a = a.rpartition(':'); role_b, _, word_b = b.rpartition(':')
+    if role_a != role_b or any(c.isdigit() for c in word_a + word_b): return False
+    ta, tb = _trigrams(word_a), _trigrams(word_b)
+    return len(ta & tb) / len(ta | tb) >= TERM_MATCH_MIN
+
+def terms_align(a, b):
+    """True when every term of each query has a near-identical counterpart, in the same role, in the other."""
+    a, b = set(a), set(b)
+    return all(any(_same_term(t, u) for u in b) for t in a) and all(any(_same_term(u, t) for t in a) for u in b)
+
+def resume_hash(resume_text: str) -> str:
+    return hashlib.sha256(resume_text.encode('utf-8')).hexdigest()[:32]
+
+
+class HashingEmbedder:
+    """Local query embedding: hashed terms, character trigrams and ordered term bigrams, L2-normalized."""
+
+    def __init__(self, dim=512):
+        self.dim = dim
+
+    def _bucket(self, feature):
+        return int(hashlib.md5(feature.encode()).hexdigest()[:8], 16) % self.dim
+
+    def encode(self, terms):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for term in terms:
+            vec[self._bucket(term)] += 2.0
+            for trigram in _trigrams(term.rpartition(':')[2]): vec[self._bucket(trigram)] += 1.0
+        for first, second in zip(terms, terms[1:]): vec[self._bucket(f"{first}>{second}")] += 1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+
+class SemanticCache:
+    """Near-duplicate query cache scoped per (resume hash, agent type).
+
+    Each scope keeps a small matrix of query embeddings; a lookup is one matrix-vector product.
+    Scopes are evicted LRU, past max_scopes or once all cached results exceed max_bytes;
+    entries expire after ttl_seconds."""
+
+    def __init__(self, threshold=0.75, ttl_seconds=3600, max_entries_per_scope=50, max_scopes=2000, max_bytes=64 * 2**20, audit_size=500):
+        self.threshold, self.ttl_seconds, self.max_bytes = threshold, ttl_seconds, max_bytes
+        self.max_entries_per_scope, self.max_scopes = max_entries_per_scope, max_scopes
+        self.embedder = HashingEmbedder()
+        self.scopes = OrderedDict()   # scope -> {"vectors": ndarray, "entries": [dict], "bytes": int}
+        self.bytes = 0
+        self.audit_log = deque(maxlen=audit_size)
+        self._audit_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _scope(self, resume_text, agent_type):
+        return (resume_hash(resume_text), agent_type)
+
+    def lookup(self, resume_text: str, agent_type: str, query: str):
+        """Cached result for a near-duplicate query, or None."""
+        terms = bind_roles(normalize_query(query))
+        vec = self.embedder.encode(terms)
+        scope = self._scope(resume_text, agent_type)
+        now = time.time()
+        with self._lock:
+            bucket = self.scopes.get(scope)
+            if bucket is not None: self.scopes.move_to_end(scope)
+            best, best_sim = None, -1.0
+            if bucket is not None and bucket["entries"]:
+                sims = bucket["vectors"] @ vec
+                for i in np.argsort(-sims):
+                    if sims[i] < self.threshold: break
+                    entry = bucket["entries"][i]
+                    if now - entry["created_at"] <= self.ttl_seconds and terms_align(entry["terms"], terms):
+                        best, best_sim = entry, float(sims[i])
+                        break
+            if best is None:
+                metrics.incr("semantic_cache.miss")
+                return None
+            audit_id = next(self._audit_ids)
+            self.audit_log.append({
+                "id": audit_id, "timestamp": now, "agent_type": agent_type, "resume_hash": scope[0],
+                "query": query, "matched_query": best["query"], "similarity": round(best_sim, 4),
+            })
+        metrics.incr("semantic_cache.hit")
+        metrics.observe("semantic_cache.hit_similarity", best_sim)
+        return best["result"]
+
+    def store(self, resume_text: str, agent_type: str, query: str, result: str):
+        terms = bind_roles(normalize_query(query))
+        entry = {"query": query, "terms": terms, "result": result, "created_at": time.time()}
+        entry["bytes"] = len(query.encode("utf-8")) + len(result.encode("utf-8"))
+        if entry["bytes"] > self.max_bytes: return
+        vec = self.embedder.encode(terms)
+        scope = self._scope(resume_text, agent_type)
+        with self._lock:
+            bucket = self.scopes.setdefault(scope, {"vectors": np.zeros((0, self.embedder.dim), dtype=np.float32), "entries": [], "bytes": 0})
+            self.scopes.move_to_end(scope)
+            self._add(bucket, entry, vec)
+            if len(bucket["entries"]) > self.max_entries_per_scope: self._remove(bucket, 0)
+            while len(self.scopes) > self.max_scopes or self.bytes > self.max_bytes:
+                _, evicted = self.scopes.popitem(last=False)
+                self.bytes -= evicted["bytes"]
+
+    def _add(self, bucket, entry, vec):
+        bucket["entries"].append(entry)
+        bucket["vectors"] = np.vstack([bucket["vectors"], vec])
+        bucket["bytes"] += entry["bytes"]; self.bytes += entry["bytes"]
+
+    def _remove(self, bucket, index):
+        entry = bucket["entries"].pop(index)
+        bucket["vectors"] = np.delete(bucket["vectors"], index, axis=0)
+        bucket["bytes"] -= entry["bytes"]; self.bytes -= entry["bytes"]
+
+    def report_false_hit(self, audit_id: int):
+        """Mark an audited hit as wrong and evict the entry that produced it. Returns the audit record or None."""
+        with self._lock:
+            record = next((r for r in self.audit_log if r["id"] == audit_id), None)
+            if record is None: return None
+            record["false_hit"] = True
+            bucket = self.scopes.get((record["resume_hash"], record["agent_type"]))
+            if bucket is not None:
+                for i in reversed(range(len(bucket["entries"]))):
+                    if bucket["entries"][i]["query"] == record["matched_query"]: self._remove(bucket, i)
+        metrics.incr("semantic_cache.false_hit")
+        return record
+
+    def audit(self, limit=100):
+        with self._lock:
+            return list(self.audit_log)[-limit:]
+
+    def stats(self):
+        with self._lock:
+            return {"scopes": len(self.scopes), "entries": sum(len(b["entries"]) for b in self.scopes.values()), "bytes": self.bytes}
+
+# Global semantic cache
+semantic_cache = SemanticCache(threshold=config.SEMANTIC_CACHE_THRESHOLD, ttl_seconds=config.SEMANTIC_CACHE_TTL_SECONDS, max_bytes=config.SEMANTIC_CACHE_MAX_BYTES)
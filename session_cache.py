@@ -0,0 +1,209 @@
+import sys
+import time
+import atexit
+import threading
+from collections import OrderedDict
+
+import config
+import firebase_utils
+from metrics import metrics
+
+
+class Session:
+    __slots__ = ("history", "latest", "expires_at", "size")
+
+    def __init__(self, history, latest, ttl_seconds):
+        self.history, self.latest = history, latest
+        self.expires_at = time.monotonic() + ttl_seconds
+        self.size = _estimate_size(history, latest)
+
+
+def _estimate_size(history, latest):
+    size = sum(sys.getsizeof(e.get('content', '')) + 200 for e in history)
+    if latest:
+        size += sum(sys.getsizeof(v) for v in latest.values() if isinstance(v, str)) + 200
+    return size
+
+
+class SessionCache:
+    """In-process cache of active conversations with write-behind history flushing.
+
+    Holds each conversation's history and latest resume version (LRU with TTL and a memory cap),
+    so a hot conversation's turn costs no Firestore reads. History entries are appended in memory
+    immediately and flushed to Firestore in batches by a background thread; resume versions are
+    written through. A miss reads through to Firestore and merges any entries still waiting to be
+    flushed. A write that keeps failing is dropped after max_flush_attempts, and at once when the
+    conversation no longer exists (deleted by retention).
+
+    Each worker has its own cache, and a worker whose cached latest version is stale builds the next
+    version on old text, losing edits made through another worker. Enable it only with a single worker
+    or conversations pinned to one worker (sticky sessions)."""
+
+    def __init__(self, store, ttl_seconds=900, max_bytes=64 * 1024 * 1024, max_sessions=5000,
+                 flush_interval=1.0, flush_batch=100, max_flush_attempts=30):
+        self.store = store
+        self.ttl_seconds, self.max_bytes, self.max_sessions = ttl_seconds, max_bytes, max_sessions
+        self.flush_interval, self.flush_batch, self.max_flush_attempts = flush_interval, flush_batch, max_flush_attempts
+        self.sessions = OrderedDict()
+        self.total_bytes = 0
+        self.pending = []             # [(conversation_id, entry, failed attempts)] not yet written to Firestore
+        self.flushing = []            # the batch flush() is writing right now
+        self.flushed = {}             # conversation_id -> number of completed flushes that wrote to it
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher = None
+
+    # --- reads ---
+    def _get(self, conversation_id):
+        with self._lock:
+            session = self.sessions.get(conversation_id)
+            if session is not None and session.expires_at > time.monotonic():
+                self.sessions.move_to_end(conversation_id)
+                metrics.incr("session_cache.hit")
+                return session
+            if session is not None: self._evict(conversation_id)
+        metrics.incr("session_cache.miss")
+        # Firestore is read without the flush lock. A flush that finishes writing this conversation
+        # during the read may have landed before or after it, so the read is retried; the last try
+        # holds the flush lock, as the rare fallback.
+        for attempt in range(3):
+            with self._lock: flushed = self.flushed.get(conversation_id, 0)
+            if attempt == 2: self._flush_lock.acquire()
+            try:
+                history = self.store.get_conversation_history(conversation_id)
+                latest = self.store.get_latest_resume(conversation_id)
+                with self._lock:
+                    if attempt < 2 and self.flushed.get(conversation_id, 0) != flushed: continue
+                    # Entries appended but not flushed yet are missing from what Firestore returned; a
+                    # batch being written may or may not be in it
+                    history = list(history)
+                    history += [e for c, e, _ in self.flushing if c == conversation_id and e not in history]
+                    history += [e for c, e, _ in self.pending if c == conversation_id]
+                    session = Session(history, latest, self.ttl_seconds)
+                    # Nothing worth caching until a resume exists
+                    if latest: self._put(conversation_id, session)
+                    return session
+            finally:
+                if attempt == 2: self._flush_lock.release()
+
+    def get_conversation_history(self, conversation_id: str):
+        return list(self._get(conversation_id).history)
+
+    def get_latest_resume(self, conversation_id: str):
+        latest = self._get(conversation_id).latest
+        return dict(latest) if latest else None
+
+    # --- writes ---
+    def prime(self, conversation_id: str, history=None, latest=None):
+        """Seed the cache for a conversation this worker just created."""
+        with self._lock:
+            self._put(conversation_id, Session(list(history or []), latest, self.ttl_seconds))
+
+    def update_conversation_history(self, conversation_id: str, new_entry: dict):
+        """Append to history now; persist in the next write-behind batch."""
+        with self._lock:
+            session = self.sessions.get(conversation_id)
+            if session is not None:
+                session.history.append(new_entry)
+                session.size += sys.getsizeof(new_entry.get('content', '')) + 200
+                self.total_bytes += sys.getsizeof(new_entry.get('content', '')) + 200
+            self.pending.append((conversation_id, new_entry, 0))
+            backlog = len(self.pending)
+        self._ensure_flusher()
+        if backlog >= self.flush_batch: self._wakeup.set()
+
+    def save_resume_version(self, conversation_id: str, original_text: str, modified_text: str = None, agent_reasoning: str = ""):
+        """Write-through: persist the version, then make it the cached latest."""
+        version = self.store.save_resume_version(conversation_id=conversation_id, original_text=original_text, modified_text=modified_text, agent_reasoning=agent_reasoning)
+        latest = {
+            'conversationId': conversation_id, 'version': version, 'original_text': original_text,
+            'modified_text': modified_text if modified_text is not None else original_text, 'agent_reasoning': agent_reasoning,
+        }
+        with self._lock:
+            session = self.sessions.get(conversation_id)
+            if session is not None:
+                self.total_bytes -= session.size
+                session.latest = latest
+                session.size = _estimate_size(session.history, latest)
+                self.total_bytes += session.size
+        return version
+
+    def invalidate(self, conversation_id: str):
+        with self._lock:
+            if conversation_id in self.sessions: self._evict(conversation_id)
+
+    # --- internals ---
+    def _put(self, conversation_id, session):
+        if conversation_id in self.sessions: self._evict(conversation_id)
+        self.sessions[conversation_id] = session
+        self.total_bytes += session.size
+        while self.sessions and (len(self.sessions) > self.max_sessions or self.total_bytes > self.max_bytes):
+            oldest = next(iter(self.sessions))
+            if oldest == conversation_id: break
+            self._evict(oldest)
+            metrics.incr("session_cache.evicted")
+
+    def _evict(self, conversation_id):
+        self.total_bytes -= self.sessions.pop(conversation_id).size
+
+    def _ensure_flusher(self):
+        if self._flusher is not None: return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="session-cache-flush", daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Write all pending history entries, one ArrayUnion per conversation."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self.pending = self.pending, []
+                self.flushing = batch
+            if not batch: return 0
+            by_conversation = OrderedDict()
+            for item in batch: by_conversation.setdefault(item[0], []).append(item)
+            written, retry, dropped = [], [], 0
+            for conversation_id, items in by_conversation.items():
+                try:
+                    self.store.append_conversation_history(conversation_id, [entry for _, entry, _ in items])
+                    written.append(conversation_id)
+                except Exception as e:
+                    if is_not_found(e) or items[0][2] + 1 >= self.max_flush_attempts:
+                        # The conversation is gone (or the write keeps failing): retrying cannot help
+                        print(f"Session cache dropped {len(items)} history entries for {conversation_id}: {e}")
+                        dropped += len(items)
+                        continue
+                    print(f"Session cache flush failed for {conversation_id}: {e}")
+                    retry += [(c, entry, attempts + 1) for c, entry, attempts in items]
+            with self._lock:
+                # Keep failed entries (ahead of newer ones) for the next flush
+                self.pending, self.flushing = retry + self.pending, []
+                for conversation_id in written: self.flushed[conversation_id] = self.flushed.get(conversation_id, 0) + 1
+                if len(self.flushed) > 10 * self.max_sessions: self.flushed.clear()
+            flushed = len(batch) - len(retry) - dropped
+            metrics.incr("session_cache.flushed_entries", flushed)
+            metrics.incr("session_cache.flush_writes", len(by_conversation))
+            if dropped: metrics.incr("session_cache.dropped_entries", dropped)
+            return flushed
+
+    def stats(self):
+        with self._lock:
+            return {"sessions": len(self.sessions), "bytes": self.total_bytes, "pending_writes": len(self.pending)}
+
+def is_not_found(exc):
+    """True for Firestore's NotFound (the document was deleted), checked without importing google.api_core."""
+    return type(exc).__name__ == "NotFound" or getattr(exc, "code", None) == 404
+
+# Global session cache
+session_cache = SessionCache(
+    firebase_utils, ttl_seconds=config.SESSION_CACHE_TTL_SECONDS, max_bytes=config.SESSION_CACHE_MAX_BYTES,
+    flush_interval=config.SESSION_CACHE_FLUSH_INTERVAL, max_flush_attempts=config.SESSION_CACHE_FLUSH_MAX_ATTEMPTS,
+)
+atexit.register(session_cache.flush)
@@ -1,22 +1,30 @@
-from crewai import Task
-import json
+from prompts import get_prompt, render_combined_routing, record_prompt, history_str, append_hint
+
+def Task(**kwargs):
+    """Build a crewai Task, importing crewai on first use."""
+    from crewai import Task as CrewTask
+    return CrewTask(**kwargs)
+
+def create_prompt_task(agent, name, description=None, **values):
+    """Task for a versioned prompt from prompts.py; the task is named after the prompt for usage accounting."""
+    prompt = get_prompt(name)
+    description = description if description is not None else prompt.render(**values)
+    record_prompt(agent, prompt, description)
+    return Task(name=name, description=description, agent=agent, expected_output=prompt.expected_output)
+
+def create_specialist_task(agent, agent_type, message, current_resume, hint=""):
+    """Task for one specialist agent; a per-turn hint goes last so it never breaks the shared prefix."""
+    description = get_prompt(agent_type).render(message=message, current_resume=current_resume)
+    return create_prompt_task(agent, agent_type, append_hint(description, hint))
 
 
 def create_routing_task(agent, user_query, history):
     """Creates the task for the router agent to classify the user's query."""
-    history_str = '\n'.join([f"{msg.get('role', 'unknown')}: {msg.get('content', '')}" for msg in history])
-    return Task(
-        description=(
-            f"Analyze the user's query and conversation history to determine the right agent sequence. "
-            "Available agents: 'company_researcher', 'job_matcher', 'section_enhancer', 'translation', 'general_chitchat'.\n\n"
-            f"USER QUERY: {user_query}\n"
-            f"CONVERSATION HISTORY: {history_str}\n\n"
-            "Your output MUST be a valid JSON array of agent keywords in the correct order. "
-            "Example: [\"company_researcher\", \"job_matcher\"]. For a single agent: [\"job_matcher\"]."
-        ),
-        agent=agent,
-        expected_output="A JSON array of agent keywords, like [\"job_matcher\"]."
-    )
+    return create_prompt_task(agent, "routing", message=user_query, history=history_str(history))
+
+def create_combined_routing_task(agent, user_query, history, resume_text, hint=""):
+    """Creates a routing task that also executes the specialist inline when a single agent suffices."""
+    return create_prompt_task(agent, "combined_routing", append_hint(render_combined_routing(user_query, history, resume_text), hint))
 
 # --- MISSING FUNCTION TO ADD ---
 def create_task(description: str, agent, expected_output: str):
@@ -81,3 +89,19 @@ def create_translation_task(agent, resume_text, user_query):
         agent=agent,
         expected_output="An explanation of localization choices, followed by the full updated resume."
     )
+
+def create_chunk_translation_task(agent, language, glossary, numbered_lines):
+    """One chunk of a chunked translation: numbered lines in, the same numbered lines out."""
+    return create_prompt_task(agent, "chunk_translation", language=language, glossary=glossary, numbered_lines=numbered_lines)
+
+def create_match_scoring_task(agent, resume_text, job_description):
+    """Score-only job matching: no resume rewrite, just a score and the skill gaps."""
+    return create_prompt_task(agent, "match_scoring", current_resume=resume_text, job_description=job_description)
+
+def create_repair_task(agent, resume_text, violations):
+    """Targeted fix for a rewrite the local verifier flagged: remove only the unsupported claims."""
+    return create_prompt_task(agent, "repair", current_resume=resume_text, violations=violations)
+
+def create_continuation_task(agent, task, partial):
+    """Continue an answer that was cut off by its output budget, instead of running the task again."""
+    return create_prompt_task(agent, "continuation", task=task.description, partial=partial)
@@ -0,0 +1,100 @@
+import time
+import threading
+import pytest
+from fastapi import HTTPException
+from admission import FairScheduler, current_tenant, run_as
+
+
+def test_tenant_concurrency_cap_and_fair_order():
+    """
+    Test that a heavy tenant cannot hold every slot and a light tenant is served next.
+    """
+    sched = FairScheduler(max_concurrent=2, tenant_concurrency=2, max_wait_seconds=5)
+    order, release = [], threading.Event()
+
+    def call(tenant, done):
+        with sched.slot(tenant, "interactive"):
+            order.append(tenant)
+            done.wait(2)
+
+    first_done = threading.Event()
+    threads = [threading.Thread(target=call, args=("heavy", first_done))]
+    threads += [threading.Thread(target=call, args=("heavy", release)) for _ in range(3)]
+    for t in threads: t.start(); time.sleep(0.02)
+    threads.append(threading.Thread(target=call, args=("light", release))); threads[-1].start()
+    time.sleep(0.05)
+    assert order == ["heavy", "heavy"]
+    # Freeing one slot must go to the light tenant, not the heavy tenant's third call
+    first_done.set(); time.sleep(0.05)
+    assert order == ["heavy", "heavy", "light"]
+    release.set()
+    for t in threads: t.join(3)
+    assert order.count("heavy") == 4
+
+def test_interactive_lane_beats_batch():
+    """
+    Test priority lanes: queued interactive work is granted before batch work.
+    """
+    sched = FairScheduler(max_concurrent=1, tenant_concurrency=1, max_wait_seconds=5)
+    order, release = [], threading.Event()
+
+    def call(tenant, lane):
+        with sched.slot(tenant, lane):
+            order.append(lane)
+            release.wait(2)
+
+    first = threading.Thread(target=call, args=("a", "batch")); first.start(); time.sleep(0.05)
+    batch = threading.Thread(target=call, args=("b", "batch")); batch.start(); time.sleep(0.05)
+    chat = threading.Thread(target=call, args=("c", "interactive")); chat.start(); time.sleep(0.05)
+    release.set()
+    for t in (first, batch, chat): t.join(3)
+    assert order == ["batch", "interactive", "batch"]
+
+def test_fast_429_when_wait_exceeds_budget():
+    """
+    Test that admission rejects with Retry-After instead of queueing past the budget.
+    """
+    sched = FairScheduler(max_concurrent=1, max_wait_seconds=1)
+    sched.avg_service_seconds = 10
+    with sched.slot("a"):
+        with pytest.raises(HTTPException) as exc:
+            sched.admit("b")
+    assert exc.value.status_code == 429
+    assert int(exc.value.headers["Retry-After"]) >= 1
+
+def test_per_tenant_request_cap():
+    """
+    Test that one tenant cannot have more than tenant_max_requests requests in flight.
+    """
+    sched = FairScheduler(tenant_max_requests=1)
+    with sched.request("a"):
+        assert current_tenant.get() == "a"
+        with pytest.raises(HTTPException):
+            with sched.request("a"): pass
+        with sched.request("b"): pass
+
+def test_run_as_binds_tenant():
+    """
+    Test binding a tenant for work done on another thread.
+    """
+    assert run_as("t1", "batch", current_tenant.get) == "t1"
+    assert current_tenant.get() == "anonymous"
+
+def test_aged_batch_call_is_not_starved():
+    """
+    Test that a batch call which waited past batch_aging_seconds is served before newer interactive calls.
+    """
+    sched = FairScheduler(max_concurrent=1, tenant_concurrency=1, max_wait_seconds=5, batch_aging_seconds=0.1)
+    order, release = [], threading.Event()
+
+    def call(tenant, lane):
+        with sched.slot(tenant, lane):
+            order.append(lane)
+            release.wait(2)
+
+    first = threading.Thread(target=call, args=("a", "interactive")); first.start(); time.sleep(0.05)
+    batch = threading.Thread(target=call, args=("b", "batch")); batch.start(); time.sleep(0.2)
+    chat = threading.Thread(target=call, args=("c", "interactive")); chat.start(); time.sleep(0.05)
+    release.set()
+    for t in (first, batch, chat): t.join(3)
+    assert order == ["interactive", "batch", "interactive"]
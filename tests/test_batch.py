@@ -0,0 +1,65 @@
+import json
+import time
+from batch import build_pairs, pair_key, run_batch
+
+
+def _fake_score(resume, jd):
+    return {"match_score": 50.0, "skill_gaps": [jd], "analysis": resume}
+
+def test_build_pairs_cross_product():
+    """
+    Test one resume against many job descriptions.
+    """
+    pairs = build_pairs(["r"], ["jd1", "jd2", "jd3"])
+    assert [p[0] for p in pairs] == [0, 1, 2]
+    assert [p[4] for p in pairs] == ["jd1", "jd2", "jd3"]
+
+def test_run_batch_streams_and_checkpoints():
+    """
+    Test that every pair is scored once and checkpointed.
+    """
+    store = {}
+    lines = list(run_batch("b1", build_pairs(["r1", "r2"], ["jd"]), _fake_score,
+                           lambda b: dict(store), lambda b, k, r: store.__setitem__(k, r)))
+    results = [json.loads(line) for line in lines]
+    assert results[-1] == {"done": True, "batch_id": "b1", "total": 2, "completed": 2, "failed": 0}
+    assert sorted(r["resume_index"] for r in results[:-1]) == [0, 1]
+    assert pair_key("r1", "jd") in store
+
+def test_run_batch_resumes_from_checkpoint():
+    """
+    Test that completed pairs are replayed without calling the scorer.
+    """
+    store = {pair_key("r1", "jd"): {"match_score": 90.0, "skill_gaps": [], "analysis": "old"}}
+    calls = []
+    def score(resume, jd):
+        calls.append(resume)
+        return _fake_score(resume, jd)
+    results = [json.loads(line) for line in run_batch("b2", build_pairs(["r1", "r2"], ["jd"]), score, lambda b: store, lambda b, k, r: None)]
+    assert calls == ["r2"]
+    assert results[0]["cached"] and results[0]["match_score"] == 90.0
+
+def test_run_batch_reports_errors():
+    """
+    Test that a failing pair produces an error line instead of aborting the batch.
+    """
+    def score(resume, jd): raise RuntimeError("boom")
+    results = [json.loads(line) for line in run_batch("b3", build_pairs(["r"], ["jd"]), score, lambda b: {}, lambda b, k, r: None)]
+    assert results[0]["error"] == "boom"
+    assert results[-1]["failed"] == 1
+
+def test_run_batch_disconnect_stops_scoring_and_keeps_finished_work():
+    """
+    Test that closing the stream starts no further pairs and that finished pairs are checkpointed by the worker.
+    """
+    store, calls = {}, []
+    def score(resume, jd):
+        calls.append(resume)
+        return _fake_score(resume, jd)
+    lines = run_batch("b4", build_pairs([f"r{i}" for i in range(20)], ["jd"]), score,
+                      lambda b: {}, lambda b, k, r: store.__setitem__(k, r), workers=2)
+    next(lines)
+    lines.close()
+    time.sleep(0.1)  # a call still running at close finishes in the background
+    assert len(calls) <= 4
+    assert all(pair_key(resume, "jd") in store for resume in calls)
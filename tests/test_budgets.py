@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+from budgets import Budget, budget_for, apply_budget, is_truncated, stitch, END_RESUME_TAG, OUTPUT_BUDGETS, REACT_SCAFFOLD_TOKENS
+from prompts import get_prompt, record_usage
+from metrics import metrics
+
+
+def test_budget_grows_with_input_and_is_capped(monkeypatch):
+    """
+    Test that rewrite budgets scale with the resume, routing stays fixed, and both limits are capped.
+    """
+    small, large = budget_for("section_enhancer", 2000), budget_for("section_enhancer", 8000)
+    assert small.max_tokens < large.max_tokens and small.max_tokens % 64 == 0
+    assert small.stop == (END_RESUME_TAG,) and budget_for("routing", 0).stop == ()
+    assert budget_for("routing", 0).max_tokens == budget_for("routing", 50000).max_tokens
+    # Room for CrewAI's "Thought: ... Final Answer:" before the answer itself
+    assert budget_for("routing", 0).max_tokens >= REACT_SCAFFOLD_TOKENS + OUTPUT_BUDGETS["routing"][0]
+    monkeypatch.setattr("budgets.config.OUTPUT_MAX_TOKENS", 1024)
+    monkeypatch.setattr("budgets.config.AGENT_DEADLINE_MAX_SECONDS", 30)
+    huge = budget_for("translation", 200000)
+    assert huge.max_tokens == 1024 and huge.deadline_seconds == 30
+
+
+def test_apply_budget_sets_a_private_llm_copy():
+    """
+    Test that the budget goes on a copy of the agent's LLM, keeping the LLM's own stop words.
+    """
+    shared = SimpleNamespace(max_tokens=None, stop=["\nObservation:"], timeout=None)
+    agent = SimpleNamespace(llm=shared, max_execution_time=None)
+    apply_budget(agent, Budget("repair", 1024, 30.5, (END_RESUME_TAG,)))
+    assert agent.llm is not shared and shared.max_tokens is None and shared.stop == ["\nObservation:"]
+    assert agent.llm.max_tokens == 1024 and agent.llm.timeout == 30.5
+    assert agent.llm.stop == ["\nObservation:", END_RESUME_TAG]
+    assert agent.max_execution_time == 31
+
+
+def test_truncation_detection():
+    """
+    Test that only answers ending at their budget count as truncated.
+    """
+    budget = Budget("section_enhancer", 1000, 30, (END_RESUME_TAG,))
+    long_answer = "x" * 3900
+    assert is_truncated(long_answer, 1000, budget)
+    assert not is_truncated(long_answer, 600, budget)
+    # The stop sequence is not in the returned text: a filled resume block below the budget is complete
+    assert not is_truncated("Tightened bullets\n###UPDATED_RESUME###\n" + "x" * 2000, 600, budget)
+    assert is_truncated("Tightened bullets\n###UPDATED_RESUME###\n", 100, budget)
+    # A tool-using agent spent its usage on earlier calls; its short final answer is complete
+    assert not is_truncated("x" * 400, 1200, budget)
+    # Without provider usage the length of the answer decides
+    assert is_truncated(long_answer, 0, budget) and not is_truncated("x" * 2000, 0, budget)
+
+
+def test_stitch_drops_repeated_text():
+    """
+    Test that a continuation is joined without the text it repeats, and mid-word cuts are joined as is.
+    """
+    partial = "Summary\n- Led the migration of 40 services to Kube"
+    assert stitch(partial, "rnetes in 6 months") == partial + "rnetes in 6 months"
+    assert stitch(partial, "services to Kubernetes in 6 months") == "Summary\n- Led the migration of 40 services to Kubernetes in 6 months"
+    assert stitch(partial, "- Led the migration of 40 services to Kubernetes") == "Summary\n- Led the migration of 40 services to Kubernetes"
+
+
+def test_continuation_prompt_and_output_token_histogram():
+    """
+    Test that a continuation starts with the original task and that output tokens are observed per task.
+    """
+    continuation = get_prompt("continuation").render(task="ORIGINAL TASK", partial="PARTIAL")
+    assert continuation.startswith("ORIGINAL TASK") and "PARTIAL" in continuation
+    metrics.reset()
+    crew = SimpleNamespace(tasks=[SimpleNamespace(name="section_enhancer")])
+    assert record_usage(crew, SimpleNamespace(token_usage=SimpleNamespace(prompt_tokens=900, completion_tokens=700))) == 700
+    assert record_usage(crew, SimpleNamespace(raw="no usage")) == 0
+    assert metrics.snapshot()["histograms"]["llm.section_enhancer.output_tokens"]["count"] == 1
+    metrics.reset()
@@ -0,0 +1,144 @@
+import gzip
+import hashlib
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from cassette import Cassette, CassetteMiss, ReplayStore, redact_prompt, redact_response
+from prompts import get_prompt
+
+RESUME = "Jane Doe\njane@example.com\nPython engineer"
+
+
+def fake_crew(description, output="Done\n###UPDATED_RESUME###\nJane Doe, Python engineer", name="section_enhancer"):
+    usage = SimpleNamespace(prompt_tokens=500, cached_prompt_tokens=200, completion_tokens=80)
+    crew = SimpleNamespace(tasks=[SimpleNamespace(name=name, description=description)], calls=0)
+    def kickoff():
+        crew.calls += 1
+        return SimpleNamespace(raw=output, token_usage=usage)
+    crew.kickoff = kickoff
+    return crew
+
+def read(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f: return [json.loads(line) for line in f]
+
+def test_redaction_hides_resume_text():
+    """
+    Test that resume blocks, contacts and rewritten resumes never reach the cassette.
+    """
+    prompt = redact_prompt("section_enhancer", f"Improve it.\n---RESUME---\n{RESUME}\n---\nUSER REQUEST: call +1 415 555 0100")
+    assert "Jane" not in prompt and "[resume redacted: 41 chars" in prompt and "[phone]" in prompt
+    response = redact_response("section_enhancer", "Changed bullets\n###UPDATED_RESUME###\nJane Doe")
+    assert response == "Changed bullets\n###UPDATED_RESUME###\nxxxx xxx"
+    assert redact_response("chunk_translation", "[0] Ingenieurin\n[1] Python") == "[0] xxxxxxxxxxx\n[1] xxxxxx"
+
+def test_redaction_covers_every_prompt_layout():
+    """
+    Test that "---" lines inside a resume do not end its block in any registered prompt, that digests
+    survive the phone regex, and that a continuation's partial answer is masked.
+    """
+    from prompts import PROMPTS
+    resume = "Jane Doe\n---\nEXPERIENCE\n---\n1. Rewrite of Jane's payroll system\nPhone 415 555 0100"
+    for version, prompts in PROMPTS.items():
+        for name, prompt in prompts.items():
+            if "{current_resume}" not in prompt.instructions + prompt.body: continue
+            fields = dict(message="m", current_resume=resume, history="h", job_description="jd", violations="v", inline_instructions="")
+            redacted = redact_prompt(name, prompt.render(**fields))
+            assert "Jane" not in redacted and "EXPERIENCE" not in redacted, (version, name)
+    # "sha256 " + a digest starting with digits reads like a phone number
+    digest = next(d for d in (hashlib.sha256(str(i).encode()).hexdigest()[:12] for i in range(10000)) if d[:6].isdigit())
+    text = next(str(i) for i in range(10000) if hashlib.sha256(str(i).encode()).hexdigest()[:12] == digest)
+    assert f"sha256 {digest}]" in redact_prompt("repair", f"---RESUME---\n{text}\n---\nUNSUPPORTED CLAIMS: x")
+    continuation = get_prompt("continuation").render(
+        task=f"Improve it.\n---RESUME---\n{RESUME}\n---\nUSER REQUEST: x",
+        partial="Tightened bullets\n###UPDATED_RESUME###\nJane Doe, Python engineer")
+    redacted = redact_prompt("continuation", continuation)
+    assert "Jane" not in redacted and "Tightened" not in redacted and "Continue the answer" in redacted
+
+def test_redaction_masks_every_resume_field_and_hint():
+    """
+    Test that no resume text survives in any registered prompt, including glossaries, history and appended hints.
+    """
+    from prompts import PROMPTS, append_hint, render_combined_routing
+    from precompute import analyze, analysis_hint
+    from translation import ChunkedTranslator
+    resume = ("Jane Zorblax\nEXPERIENCE\n- Helped build the Quuxcorp secret billing platform\n"
+              "- Worked on Frobnitz pipelines\nSKILLS\nPython, Kubernetes\n")
+    hint = analysis_hint(analyze(resume))
+    history = [{"role": "assistant", "content": "Rewrote the Quuxcorp bullets"}]
+    fields = dict(message="Tailor it please", current_resume=resume, history="assistant: Rewrote the Quuxcorp bullets",
+                  job_description="Frobnitz engineer", violations="Zorblax certification", language="German",
+                  glossary=ChunkedTranslator.glossary({"Quuxcorp"}, [("Helped build the Quuxcorp secret billing platform", "Zorblax DE")]),
+                  numbered_lines="[0] Jane Zorblax\n[1] Worked on Frobnitz pipelines", inline_instructions="",
+                  task=append_hint(PROMPTS["v3"]["section_enhancer"].render(message="m", current_resume=resume), hint),
+                  partial="Tightened\n###UPDATED_RESUME###\nJane Zorblax")
+    for version, prompts in PROMPTS.items():
+        for name, prompt in prompts.items():
+            rendered = render_combined_routing("Tailor it please", history, resume, version) if name == "combined_routing" \
+                else prompt.render(**fields)
+            redacted = redact_prompt(name, append_hint(rendered, hint))
+            for secret in ("Zorblax", "Quuxcorp", "Frobnitz", "billing"):
+                assert secret not in redacted, (version, name, secret)
+            if "{message}" in prompt.instructions + prompt.body: assert "Tailor it please" in redacted, (version, name)
+
+def test_record_then_replay(tmp_path):
+    """
+    Test that a recorded kickoff is replayed without calling the crew, with its output and usage.
+    """
+    path = str(tmp_path / "run.jsonl.gz")
+    recorder = Cassette("record", path)
+    with recorder.request("/chat", "c1", "improve it"):
+        assert recorder.kickoff(fake_crew(f"---RESUME---\n{RESUME}\n---")).raw.startswith("Done")
+        assert recorder.call("search", "web_search", "acme culture", lambda: {"results": ["acme"]}) == {"results": ["acme"]}
+    recorder.close()
+    entries = read(path)
+    assert [e["kind"] for e in entries] == ["llm", "search", "request"]
+    assert entries[2]["usage"] == {"prompt_tokens": 500, "cached_prompt_tokens": 200, "completion_tokens": 80}
+    assert "Jane" not in json.dumps(entries)
+
+    replayer = Cassette("replay", path, latency_scale=0)
+    crew = fake_crew(f"---RESUME---\n{RESUME}\n---")
+    result = replayer.kickoff(crew)
+    assert crew.calls == 0 and result.raw.startswith("Done") and result.token_usage.cached_prompt_tokens == 200
+    assert replayer.call("search", "web_search", "acme culture", lambda: pytest.fail("went live")) == {"results": ["acme"]}
+
+def test_replay_falls_back_to_call_order_and_misses(tmp_path):
+    """
+    Test that an edited prompt still replays by task name, and that an extra call is a miss.
+    """
+    path = str(tmp_path / "run.jsonl.gz")
+    recorder = Cassette("record", path)
+    recorder.kickoff(fake_crew("old prompt"))
+    recorder.close()
+    replayer = Cassette("replay", path, latency_scale=0)
+    assert replayer.kickoff(fake_crew("new prompt wording")).raw.startswith("Done")
+    with pytest.raises(CassetteMiss): replayer.kickoff(fake_crew("new prompt wording"))
+    live = Cassette("replay", path, latency_scale=0, on_miss="live")
+    live.kickoff(fake_crew("x"))
+    crew = fake_crew("y")
+    live.kickoff(crew)
+    assert crew.calls == 1
+
+def test_off_mode_is_a_pass_through(tmp_path):
+    """
+    Test that a disabled cassette calls straight through and writes nothing.
+    """
+    cassette = Cassette("off", str(tmp_path / "none.jsonl.gz"))
+    crew = fake_crew("anything")
+    with cassette.request("/chat"): cassette.kickoff(crew)
+    assert crew.calls == 1 and not (tmp_path / "none.jsonl.gz").exists()
+
+def test_replay_store_keeps_writes_in_memory():
+    """
+    Test that replayed turns read the stored conversation once and never write back to it.
+    """
+    store = MagicMock()
+    store.get_conversation_history.return_value = [{"role": "user", "content": "hi"}]
+    store.get_latest_resume.return_value = {"conversationId": "c1", "version": 3, "original_text": RESUME, "modified_text": RESUME}
+    replay = ReplayStore(store)
+    replay.update_conversation_history("c1", {"role": "assistant", "content": "hello"})
+    assert replay.save_resume_version("c1", RESUME, "xxxx xxx", "masked") == 4
+    assert replay.get_latest_resume("c1")["modified_text"] == "xxxx xxx"
+    assert [e["content"] for e in replay.get_conversation_history("c1")] == ["hi", "hello"]
+    assert store.get_latest_resume.call_count == store.get_conversation_history.call_count == 1
+    store.save_resume_version.assert_not_called(); store.update_conversation_history.assert_not_called()
@@ -0,0 +1,77 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from idempotency import IdempotencyStore, IdempotencyConflict, IdempotencyInProgress, fingerprint
+
+
+def test_concurrent_duplicates_share_one_execution():
+    """
+    Test that duplicates arriving while the first request runs wait for and share its result.
+    """
+    store, calls, release = IdempotencyStore(), [], threading.Event()
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return {"version": 2}
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(store.run, "/chat", "k", fingerprint("c", "hi"), work) for _ in range(4)]
+        time.sleep(0.1)
+        release.set()
+        results = [f.result() for f in futures]
+    assert len(calls) == 1
+    assert sorted(replayed for _, replayed in results) == [False, True, True, True]
+    assert all(result == {"version": 2} for result, _ in results)
+
+def test_completed_result_is_replayed_until_ttl():
+    """
+    Test that a finished key returns the stored result, and runs again once it expires.
+    """
+    store, calls = IdempotencyStore(ttl_seconds=0.05), []
+    fn = lambda: calls.append(1) or len(calls)
+    assert store.run("/upload", "k", "fp", fn) == (1, False)
+    assert store.run("/upload", "k", "fp", fn) == (1, True)
+    time.sleep(0.06)
+    assert store.run("/upload", "k", "fp", fn) == (2, False)
+
+def test_key_reused_for_different_request_conflicts():
+    """
+    Test that the same key with a different payload is rejected, while other scopes are independent.
+    """
+    store = IdempotencyStore()
+    store.run("/chat", "k", fingerprint("c", "hi"), lambda: 1)
+    with pytest.raises(IdempotencyConflict): store.run("/chat", "k", fingerprint("c", "bye"), lambda: 2)
+    assert store.run("/upload", "k", fingerprint("c", "bye"), lambda: 2) == (2, False)
+
+def test_failures_are_shared_but_not_stored():
+    """
+    Test that waiters see the in-flight failure and a later retry runs again.
+    """
+    store, release = IdempotencyStore(), threading.Event()
+    def fail():
+        release.wait(5)
+        raise RuntimeError("llm down")
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(store.run, "/chat", "k", "fp", fail)
+        time.sleep(0.05)
+        second = pool.submit(store.run, "/chat", "k", "fp", lambda: "unused")
+        time.sleep(0.05)
+        release.set()
+        for future in (first, second):
+            with pytest.raises(RuntimeError): future.result()
+    assert store.run("/chat", "k", "fp", lambda: "ok") == ("ok", False)
+
+def test_waiter_times_out_and_capacity_evicts_oldest():
+    """
+    Test that a duplicate gives up after wait_seconds, and finished keys beyond max_entries are evicted.
+    """
+    store, release = IdempotencyStore(wait_seconds=0.05, max_entries=2), threading.Event()
+    with ThreadPoolExecutor(1) as pool:
+        pool.submit(store.run, "/chat", "slow", "fp", lambda: release.wait(5))
+        time.sleep(0.05)
+        with pytest.raises(IdempotencyInProgress): store.run("/chat", "slow", "fp", lambda: None)
+        release.set()
+    for key in "abc": store.run("/chat", key, "fp", lambda: key)
+    assert store.stats() == {"keys": 2, "in_flight": 0}
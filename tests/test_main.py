@@ -2,8 +2,9 @@ import pytest
 import json
 from unittest.mock import MagicMock, patch
 from fastapi.testclient import TestClient
-from fastapi import UploadFile, File, Form
+from fastapi import UploadFile, File, Form, HTTPException
 from io import BytesIO
+import main
 from main import app, parse_resume, ChatRequest, ChatResponse
 import firebase_utils as db 
 client = TestClient(app)
@@ -275,4 +276,122 @@ def test_revert_version_not_found(mock_collection):
     response = client.post(f"/revert/{MOCK_CONVERSATION_ID}/999")
 
     assert response.status_code == 404
-    assert "Version not found." in response.json()["detail"]
\ No newline at end of file
+    assert "Version not found." in response.json()["detail"]
+@patch('main.run_budgeted', side_effect=HTTPException(status_code=429, detail="Too many requests"))
+@patch('main.create_routing_task')
+@patch('main.create_router_agent')
+@patch('main.speculation_pool')
+def test_router_failure_cancels_speculation(mock_pool, mock_router_agent, mock_routing_task, mock_run_budgeted):
+    """
+    Test that a failing router call stops the speculative specialist run it started.
+    """
+    with patch.object(main.config, 'ROUTING_MODE', 'speculative'):
+        with pytest.raises(HTTPException):
+            main.route_message("Translate my resume to German", [], MOCK_RESUME_TEXT)
+    cancelled = mock_pool.submit.call_args.args[-1]
+    assert cancelled.is_set()
+    mock_pool.submit.return_value.cancel.assert_called_once()
+
+@patch('main.route_message')
+@patch('main.sessions')
+def test_score_question_skips_router(mock_sessions, mock_route):
+    """
+    Test that a score-only question about a JD is answered locally without a router call.
+    """
+    mock_sessions.get_conversation_history.return_value = []
+    mock_sessions.get_latest_resume.return_value = {'modified_text': MOCK_RESUME_TEXT, 'original_text': MOCK_RESUME_TEXT, 'version': 1}
+    result = main.handle_chat(MOCK_CONVERSATION_ID, "What's my match score for this JD: Python, AI agents, Go")
+    mock_route.assert_not_called()
+    assert result.match_score is not None
+    mock_sessions.save_resume_version.assert_not_called()
+
+@patch('main.route_message', return_value=(["job_matcher"], "Match Score: 72%\n###SKILL_GAPS###\nGo\n###UPDATED_RESUME###\nRewritten"))
+@patch('main.sessions')
+def test_score_question_uses_inline_answer(mock_sessions, mock_route):
+    """
+    Test that a combined-mode inline analysis answers a score-only question instead of being discarded.
+    """
+    mock_sessions.get_conversation_history.return_value = []
+    mock_sessions.get_latest_resume.return_value = {'modified_text': MOCK_RESUME_TEXT, 'original_text': MOCK_RESUME_TEXT, 'version': 1}
+    result = main.handle_chat(MOCK_CONVERSATION_ID, "How well does my resume match?")
+    assert result.match_score == 72 and result.skill_gaps == ["Go"]
+    mock_sessions.save_resume_version.assert_not_called()
+
+@patch.object(main.config, 'VERIFIER_ENABLED', False)
+@patch('main.run_agent', return_value="Match score: 60%\n###UPDATED_RESUME###\nRewritten resume")
+@patch('main.route_message', return_value=(["job_matcher"], None))
+@patch('main.sessions')
+def test_rewrite_request_mentioning_fit_is_routed(mock_sessions, mock_route, mock_run):
+    """
+    Test that a rewrite request that mentions "fit for" is routed and rewritten, not answered by a local score.
+    """
+    mock_sessions.get_conversation_history.return_value = []
+    mock_sessions.get_latest_resume.return_value = {'modified_text': MOCK_RESUME_TEXT, 'original_text': MOCK_RESUME_TEXT, 'version': 1}
+    mock_sessions.save_resume_version.return_value = 2
+    main.handle_chat(MOCK_CONVERSATION_ID, "Make my resume match this job: Senior Python dev, a great fit for startups")
+    mock_route.assert_called_once()
+    mock_run.assert_called_once()
+    assert mock_sessions.save_resume_version.call_args.kwargs["modified_text"] == "Rewritten resume"
+
+@patch('main.run_agent', return_value="Match score: 64%\nAnalysis.")
+@patch('main.route_message', return_value=(["job_matcher"], None))
+@patch('main.sessions')
+def test_score_question_without_job_description_is_not_scored_locally(mock_sessions, mock_route, mock_run):
+    """
+    Test that a score question with no job description goes to the job matcher instead of scoring the question text.
+    """
+    mock_sessions.get_conversation_history.return_value = []
+    mock_sessions.get_latest_resume.return_value = {'modified_text': MOCK_RESUME_TEXT, 'original_text': MOCK_RESUME_TEXT, 'version': 1}
+    result = main.handle_chat(MOCK_CONVERSATION_ID, "What is my score?")
+    mock_route.assert_called_once()
+    mock_run.assert_called_once()
+    assert result.match_score == 64 and "Keyword match" not in result.reasoning
+
+@patch('main.create_synthesizer_agent')
+def test_translations_skip_the_verifier(mock_synthesizer):
+    """
+    Test that a French translation is kept as is, even though the English taxonomy sees "Tableau" in it.
+    """
+    french = "Création d'un tableau de bord de suivi pour l'équipe."
+    assert main.verified_resume("translation", french, "Built reporting dashboards for the team.") == (french, "")
+    mock_synthesizer.assert_not_called()
+
+@patch.object(main.config, 'ADMIN_API_KEY', 'admin')
+@patch('main.start_search_bootstrap')
+@patch('main.search_index')
+def test_search_waits_for_the_index_to_load(mock_index, mock_bootstrap):
+    """
+    Test that /search starts this worker's index build and answers 503 until it is loaded, instead of partial results.
+    """
+    mock_index.loaded = False
+    response = client.get("/search", params={"q": "python"}, headers={"X-Admin-Key": "admin"})
+    assert response.status_code == 503 and response.headers["Retry-After"] == "5"
+    mock_bootstrap.assert_called_once()
+    mock_index.loaded, mock_index.search.return_value = True, {"results": []}
+    response = client.get("/search", params={"q": "python"}, headers={"X-Admin-Key": "admin"})
+    assert response.status_code == 200 and response.json()["complete"] is True
+
+@patch('main._upload_resume')
+def test_upload_idempotency_is_scoped_per_api_key(mock_upload):
+    """
+    Test that two clients sending the same Idempotency-Key and file get separate conversations.
+    """
+    mock_upload.side_effect = lambda _: main.UploadResponse(conversation_id=str(mock_upload.call_count), resume_text=MOCK_RESUME_TEXT, message="Resume uploaded.")
+    files = {"file": ("resume.pdf", b"%PDF-1.4 same file", "application/pdf")}
+    first = client.post("/upload", files=files, headers={"Idempotency-Key": "shared", "X-API-Key": "tenant-a"})
+    again = client.post("/upload", files=files, headers={"Idempotency-Key": "shared", "X-API-Key": "tenant-a"})
+    other = client.post("/upload", files=files, headers={"Idempotency-Key": "shared", "X-API-Key": "tenant-b"})
+    assert first.json()["conversation_id"] == again.json()["conversation_id"] == "1"
+    assert again.headers["Idempotent-Replayed"] == "true"
+    assert other.json()["conversation_id"] == "2"
+
+@patch('main.web_search')
+def test_market_conventions_trims_results_and_survives_search_errors(mock_search):
+    """
+    Test that the conventions lookup joins the search results, trims them, and returns nothing when the search fails.
+    """
+    mock_search.return_value = {"results": [{"content": "Include a photo."}, {"content": "Dates as  MM/YYYY." * 200}]}
+    notes = main.market_conventions("German")
+    assert notes.startswith("Include a photo. Dates as MM/YYYY.") and len(notes) == main.config.TRANSLATION_CONVENTIONS_CHARS
+    mock_search.side_effect = RuntimeError("no TAVILY_API_KEY")
+    assert main.market_conventions("German") == ""
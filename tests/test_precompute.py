@@ -0,0 +1,71 @@
+from metrics import metrics
+from precompute import Precomputer, analyze, analysis_hint, bullet_issues
+
+RESUME = """Jane Doe
+EXPERIENCE
+- Responsible for maintaining the billing service
+- Cut p99 latency by 40% by rewriting the Kafka consumer in Go
+- Helped onboard 3 new engineers
+SKILLS
+- Python, Kubernetes
+"""
+
+
+def test_bullet_issues():
+    """
+    Test weak-verb and missing-metric detection on single bullets.
+    """
+    assert bullet_issues("Responsible for maintaining the billing service") == ["weak verb", "no metric"]
+    assert bullet_issues("Helped onboard 3 new engineers") == ["weak verb"]
+    assert bullet_issues("Cut p99 latency by 40%") == []
+
+def test_analyze_flags_achievement_bullets_only():
+    """
+    Test that only bullets in achievement sections are analyzed and skills come from the taxonomy.
+    """
+    analysis = analyze(RESUME)
+    assert analysis["sections"] == ["Header", "Experience", "Skills"]
+    assert [b["issues"] for b in analysis["bullets"]] == [["weak verb", "no metric"], [], ["weak verb"]]
+    assert {"Apache Kafka", "Go", "Python", "Kubernetes"} <= set(analysis["skills"])
+    hint = analysis_hint(analysis)
+    assert "3 achievement bullets, 2 start with a weak verb, 1 have no metric" in hint and "Cut p99" not in hint
+
+def test_scheduled_work_is_reused_once_and_counted():
+    """
+    Test that a scheduled analysis is returned to the first turn and counted as used exactly once.
+    """
+    metrics.reset()
+    precomputer = Precomputer()
+    precomputer.schedule(RESUME)
+    assert precomputer.analysis(RESUME) == analyze(RESUME)
+    assert precomputer.wait(RESUME)
+    assert metrics.counters.get("precompute.used") == 1 and "precompute.miss" not in metrics.counters
+    assert precomputer.stats() == {"entries": 1, "scheduled": 1, "used": 1, "use_rate": 1.0}
+
+def test_unscheduled_text_is_a_miss_and_eviction_counts_unused():
+    """
+    Test that a resume never uploaded is computed inline, and evicting unused precomputed work is recorded.
+    """
+    metrics.reset()
+    precomputer = Precomputer(max_entries=1)
+    assert not precomputer.wait("edited resume")
+    precomputer.analysis("edited resume")
+    precomputer.schedule(RESUME)
+    precomputer.schedule(RESUME + "\n")
+    assert metrics.counters.get("precompute.miss") == 1 and metrics.counters.get("precompute.unused") == 1
+
+def test_failed_or_slow_precompute_falls_back_to_no_hint(monkeypatch):
+    """
+    Test that a failed background run is dropped instead of re-raised, and that wait() gives up on time.
+    """
+    import threading
+    precomputer = Precomputer(workers=1)
+    monkeypatch.setattr("precompute.analyze", lambda text: 1 / 0)
+    precomputer.schedule(RESUME)
+    assert precomputer.hint(RESUME) == "" and not precomputer.entries
+    monkeypatch.setattr("precompute.analyze", lambda text: release.wait() and {})
+    release = threading.Event()
+    precomputer.schedule(RESUME)
+    assert not precomputer.wait(RESUME, timeout=0.01)
+    release.set()
+    assert precomputer.wait(RESUME, timeout=5)
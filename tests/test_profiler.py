@@ -0,0 +1,84 @@
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from profiler import Profiler
+
+
+def busy_parse(seconds=0.15):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end: total += sum(range(200))
+    return total
+
+def test_disabled_profiler_is_a_no_op():
+    """
+    Test that nothing is registered or recorded without a session.
+    """
+    profiler = Profiler()
+    with profiler.request("/chat"):
+        with profiler.stage("parse_output"): assert not profiler.threads
+    assert profiler.report() == {"active": False} and profiler.collapsed() == ""
+
+def test_sampling_attributes_stacks_to_endpoint_and_stage():
+    """
+    Test that sampled stacks are rooted at endpoint;stage and exported as collapsed stacks.
+    """
+    profiler = Profiler()
+    profiler.start("sample", sample_rate=1.0, interval=0.002)
+    with profiler.request("/chat"):
+        with profiler.stage("parse_output"): busy_parse()
+    profiler.stop()
+    collapsed = profiler.collapsed()
+    assert any(line.startswith("/chat;parse_output;") and "busy_parse" in line for line in collapsed.splitlines())
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.splitlines())
+    report = profiler.report()
+    chat = report["endpoints"]["/chat"]
+    assert chat["requests"] == 1 and chat["stages"]["parse_output"]["calls"] == 1
+    assert chat["stages"]["parse_output"]["seconds"] >= 0.15 and chat["stages"]["parse_output"]["samples"] > 0
+    assert not report["active"]
+
+def test_cprofile_reports_top_functions():
+    """
+    Test that cProfile mode aggregates function timings per endpoint.
+    """
+    profiler = Profiler()
+    profiler.start("cprofile", sample_rate=1.0)
+    with profiler.request("/upload"): busy_parse(0.05)
+    top = profiler.stop() and profiler.report()["endpoints"]["/upload"]["top_functions"]
+    assert any("busy_parse" in row[0] for row in top)
+
+def test_sample_rate_and_timed_window():
+    """
+    Test that unsampled requests are skipped and a timed session stops itself.
+    """
+    profiler = Profiler()
+    profiler.start("sample", sample_rate=1e-9)
+    with profiler.request("/chat"): assert not profiler.threads
+    profiler.start("sample", seconds=0.05, interval=0.005)
+    assert profiler.session.sample_rate == 1.0
+    time.sleep(0.2)
+    assert not profiler.active and profiler.report()["samples"] > 0
+
+def test_pool_work_is_attributed_to_the_request():
+    """
+    Test that a stage run in a pool thread from a copied context is sampled under the request.
+    """
+    profiler = Profiler()
+    profiler.start("sample", sample_rate=1.0, interval=0.002)
+    with profiler.request("/chat"), ThreadPoolExecutor(max_workers=1) as pool:
+        def work():
+            with profiler.stage("llm"): busy_parse()
+        pool.submit(contextvars.copy_context().run, work).result()
+        assert list(profiler.threads) == [threading.get_ident()]
+    profiler.stop()
+    assert profiler.report()["endpoints"]["/chat"]["stages"]["llm"]["samples"] > 0
+
+def test_timed_cprofile_window_does_not_hold_the_process():
+    """
+    Test that the timer ending a timed cProfile session is a daemon thread.
+    """
+    profiler = Profiler()
+    profiler.start("cprofile", seconds=60)
+    assert all(t.daemon for t in threading.enumerate() if isinstance(t, threading.Timer))
+    profiler.stop()
@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+import prompts
+from prompts import get_prompt, render_combined_routing, record_usage, usage_report, PROMPTS
+from metrics import metrics
+from budgets import END_RESUME_TAG, RESUME_PROMPTS
+
+SPECIALISTS = ["company_researcher", "job_matcher", "section_enhancer", "translation"]
+
+
+def test_v2_orders_static_then_resume_then_message():
+    """
+    Test that v2 prompts start with static instructions and end with the per-turn message.
+    """
+    for name in SPECIALISTS:
+        prompt = get_prompt(name, "v2")
+        text = prompt.render(message="MSG", current_resume="RES")
+        assert text.startswith(prompt.instructions) and "{" not in prompt.instructions
+        assert text.index("RES") < text.index("MSG") and text.endswith("MSG")
+
+def test_v2_shares_prefix_across_turns_and_v1_does_not():
+    """
+    Test that two turns on the same resume share everything up to the message in v2 only.
+    """
+    first = get_prompt("section_enhancer", "v2").render(message="fix my summary", current_resume="RESUME TEXT")
+    second = get_prompt("section_enhancer", "v2").render(message="improve experience", current_resume="RESUME TEXT")
+    assert first[:first.index("USER REQUEST")] == second[:second.index("USER REQUEST")]
+    legacy = [get_prompt("section_enhancer", "v1").render(message=m, current_resume="RESUME TEXT") for m in ("a", "b")]
+    assert legacy[0][:legacy[0].index("RESUME TEXT")] != legacy[1][:legacy[1].index("RESUME TEXT")]
+
+def test_every_version_defines_the_same_prompts():
+    """
+    Test that every version covers all v1 prompts and keeps their expected outputs.
+    """
+    for version in ("v2", "v3"):
+        assert set(PROMPTS["v1"]) == set(PROMPTS[version])
+        for name, prompt in PROMPTS["v1"].items(): assert PROMPTS[version][name].expected_output == prompt.expected_output
+
+def test_v3_closes_resumes_and_leaves_v2_unchanged():
+    """
+    Test that only v3 asks for the end-of-resume tag, on exactly the prompts that produce a resume.
+    """
+    for name in PROMPTS["v1"]:
+        assert END_RESUME_TAG not in PROMPTS["v2"][name].instructions
+        assert (END_RESUME_TAG in PROMPTS["v3"][name].instructions) == (name in RESUME_PROMPTS)
+        assert PROMPTS["v3"][name].body == PROMPTS["v2"][name].body
+
+def test_combined_routing_versions():
+    """
+    Test that v1 inlines formatted agent tasks while v2 keeps them in the static prefix.
+    """
+    history = [{"role": "user", "content": "hi"}]
+    v2 = render_combined_routing("MSG", history, "RES", "v2")
+    assert v2.startswith(get_prompt("combined_routing", "v2").instructions) and v2.endswith("USER REQUEST: MSG")
+    assert v2.count("RES\n") == 1
+    assert render_combined_routing("MSG", history, "RES", "v1").count("RES\n") == 2
+
+def test_v2_prompts_use_one_request_label():
+    """
+    Test that the inline instructions and the body of every v2/v3 prompt name the user's message USER REQUEST.
+    """
+    for version in ("v2", "v3"):
+        for name, prompt in PROMPTS[version].items():
+            assert "USER QUERY" not in prompt.instructions + prompt.body, (version, name)
+        assert get_prompt("combined_routing", version).body.endswith("USER REQUEST: {message}")
+
+def test_usage_recorded_per_task_name(monkeypatch):
+    """
+    Test that provider usage (including cached tokens) is accumulated under the crew's task name.
+    """
+    metrics.reset()
+    monkeypatch.setattr(prompts.config, "PROMPT_VERSION", "v2")
+    crew = SimpleNamespace(tasks=[SimpleNamespace(name="job_matcher")])
+    usage = SimpleNamespace(prompt_tokens=1000, cached_prompt_tokens=600, completion_tokens=200)
+    record_usage(crew, SimpleNamespace(token_usage=usage))
+    record_usage(crew, SimpleNamespace(raw="no usage"))
+    report = usage_report()
+    assert report["job_matcher"]["cached_share"] == 0.6 and report["job_matcher"]["version"] == "v2"
+    assert report["total"]["prompt_tokens"] == 1000
+    metrics.reset()
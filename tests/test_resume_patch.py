@@ -0,0 +1,60 @@
+import random
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from fastapi.responses import PlainTextResponse
+
+from compression import CompressionMiddleware
+from resume_patch import make_patch, apply_patch, resume_delta
+
+RESUME = "".join(f"- Bullet {i}: built service {i} with Python\n" for i in range(40))
+
+
+def test_patch_round_trips_random_edits():
+    """
+    Test that applying a patch to the old text reproduces the new text for inserts, deletes and rewrites.
+    """
+    rng = random.Random(3)
+    for _ in range(50):
+        lines = RESUME.splitlines(keepends=True)
+        for _ in range(rng.randint(1, 6)):
+            i = rng.randrange(len(lines))
+            choice = rng.random()
+            if choice < 0.3: del lines[i]
+            elif choice < 0.6: lines.insert(i, f"- New line {rng.random()}\n")
+            else: lines[i] = lines[i].replace("built", "shipped")
+        new = "".join(lines).rstrip("\n") if rng.random() < 0.3 else "".join(lines)
+        assert apply_patch(RESUME, make_patch(RESUME, new)) == new
+
+def test_small_edit_sends_patch_against_known_version():
+    """
+    Test that a one-line change is sent as a patch only when the client holds the base version.
+    """
+    new = RESUME.replace("Bullet 7: built", "Bullet 7: designed and built")
+    delta = resume_delta(RESUME, 3, new, 4, base_version=3)
+    assert delta["resume_patch"] == [[7, 8, new.splitlines(keepends=True)[7]]] and "updated_resume" not in delta
+    assert resume_delta(RESUME, 3, new, 4, base_version=2) == {"resume_version": 4, "updated_resume": new}
+    assert resume_delta(RESUME, 3, new, 4) == {"resume_version": 4, "updated_resume": new}
+    assert resume_delta(RESUME, 3, RESUME, 3, base_version=3)["resume_patch"] == []
+
+def test_rewrite_falls_back_to_full_text():
+    """
+    Test that a patch not clearly smaller than the resume is replaced by the full text.
+    """
+    rewritten = RESUME.upper()
+    assert resume_delta(RESUME, 1, rewritten, 2, base_version=1) == {"resume_version": 2, "updated_resume": rewritten}
+
+def test_compression_middleware():
+    """
+    Test that large responses are gzip-compressed for clients that accept it and small ones are left alone.
+    """
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1000)
+    app.get("/big", response_class=PlainTextResponse)(lambda: RESUME * 5)
+    app.get("/small", response_class=PlainTextResponse)(lambda: "ok")
+    client = TestClient(app)
+    big = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert big.headers["content-encoding"] == "gzip" and big.text == RESUME * 5
+    assert int(big.headers["content-length"]) < len(RESUME)
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
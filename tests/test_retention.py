@@ -0,0 +1,96 @@
+import gzip
+import json
+import datetime
+
+from retention import RetentionJob, firestore_size
+
+NOW = datetime.datetime.now(datetime.timezone.utc)
+
+
+class FakeStore:
+    """In-memory stand-in for the firebase_utils retention functions."""
+
+    def __init__(self):
+        self.conversations, self.resumes = {}, {}
+
+    def add(self, conversation_id, versions, history=0, idle_days=0):
+        self.conversations[conversation_id] = {
+            "history": [{"role": "user", "content": f"turn {i}"} for i in range(history)],
+            "updated_at": NOW - datetime.timedelta(days=idle_days),
+        }
+        for v in range(1, versions + 1):
+            self.resumes[f"{conversation_id}-{v}"] = {"conversationId": conversation_id, "version": v, "modified_text": f"resume v{v}"}
+
+    def stream_conversations(self): return list(self.conversations.items())
+    def stream_resume_refs(self): return [(i, d["conversationId"], d["version"]) for i, d in self.resumes.items()]
+    def get_resumes(self, ids): return {i: self.resumes[i] for i in ids if i in self.resumes}
+    def get_conversation_resumes(self, cid): return {i: d for i, d in self.resumes.items() if d["conversationId"] == cid}
+    def delete_resumes(self, ids):
+        for i in ids: self.resumes.pop(i, None)
+    def trim_conversation_history(self, cid, keep):
+        history = self.conversations[cid]["history"]
+        self.conversations[cid]["history"] = history[-keep:]
+        return history[:-keep]
+    def delete_conversation_if_idle(self, cid, idle_before):
+        if self.conversations[cid]["updated_at"] >= idle_before: return False
+        del self.conversations[cid]
+        return True
+
+def versions(store, cid):
+    return sorted(d["version"] for d in store.resumes.values() if d["conversationId"] == cid)
+
+def job(store, tmp_path, **kwargs):
+    return RetentionJob(store, str(tmp_path), keep_versions=3, keep_history=5, idle_days=30, pause_seconds=0, **kwargs)
+
+
+def test_prunes_to_original_plus_last_versions(tmp_path):
+    """
+    Test that a conversation keeps version 1 and its newest keep_versions, and short ones are untouched.
+    """
+    store = FakeStore()
+    store.add("a", 8); store.add("b", 3)
+    report = job(store, tmp_path).run()
+    assert versions(store, "a") == [1, 6, 7, 8] and versions(store, "b") == [1, 2, 3]
+    assert report["versions_pruned"] == 4 and report["reclaimed_bytes"] > 0
+
+def test_ages_out_idle_conversations_unless_active(tmp_path):
+    """
+    Test that idle conversations are deleted with all their versions, but not ones active in this process.
+    """
+    store = FakeStore()
+    store.add("idle", 2, idle_days=90); store.add("hot", 2, idle_days=90); store.add("fresh", 2, idle_days=1)
+    removed = []
+    report = job(store, tmp_path, is_active=lambda cid: cid == "hot", on_removed=removed.append).run()
+    assert set(store.conversations) == {"hot", "fresh"} and versions(store, "idle") == []
+    assert removed == ["idle"] and report["conversations_aged_out"] == 1
+
+def test_trims_history_and_archives_everything_removed(tmp_path):
+    """
+    Test that history is cut to the last keep_history entries and every removed record is in the archive.
+    """
+    store = FakeStore()
+    store.add("a", 6, history=12)
+    report = job(store, tmp_path).run()
+    assert [e["content"] for e in store.conversations["a"]["history"]] == [f"turn {i}" for i in range(7, 12)]
+    with gzip.open(report["archive_path"], "rt") as f: entries = [json.loads(line) for line in f]
+    assert sorted(e["kind"] for e in entries) == ["history", "resume_version", "resume_version"]
+    assert len(next(e for e in entries if e["kind"] == "history")["data"]) == 7
+    assert report["history_entries_trimmed"] == 7 and report["archived_bytes"] > 0
+
+def test_dry_run_changes_nothing(tmp_path):
+    """
+    Test that a dry run reports what it would reclaim without deleting or archiving.
+    """
+    store = FakeStore()
+    store.add("a", 8, history=12); store.add("idle", 2, idle_days=90)
+    before = (dict(store.conversations), dict(store.resumes))
+    report = job(store, tmp_path).run(dry_run=True)
+    assert (store.conversations, store.resumes) == before and report["archive_path"] is None
+    assert report["versions_pruned"] == 6 and report["conversations_aged_out"] == 1 and report["reclaimed_bytes"] > 0
+
+def test_firestore_size():
+    """
+    Test the storage size estimate for strings, numbers and nested values.
+    """
+    assert firestore_size("héllo") == 7 and firestore_size(3) == 8 and firestore_size(None) == 1
+    assert firestore_size({"ab": ["x", 1]}) == 3 + 2 + 8
@@ -0,0 +1,57 @@
+from routing import parse_route_output, speculation_target, ROUTE_END_TAG
+from metrics import MetricsRegistry
+
+
+def test_parse_route_plain_array():
+    """
+    Test a router output that only contains the route.
+    """
+    sequence, inline = parse_route_output('["company_researcher", "section_enhancer"]')
+    assert sequence == ["company_researcher", "section_enhancer"]
+    assert inline is None
+
+def test_parse_route_with_inline_result():
+    """
+    Test combined mode output for a single inline-capable agent.
+    """
+    output = f'["section_enhancer"]\n{ROUTE_END_TAG}\nImproved bullets.\n###UPDATED_RESUME###\nNew resume'
+    sequence, inline = parse_route_output(output)
+    assert sequence == ["section_enhancer"]
+    assert inline.startswith("Improved bullets.")
+
+def test_parse_route_ignores_inline_for_chains():
+    """
+    Test that an inline result is discarded when more than one agent is routed.
+    """
+    sequence, inline = parse_route_output(f'["company_researcher", "job_matcher"]\n{ROUTE_END_TAG}\nsomething')
+    assert sequence == ["company_researcher", "job_matcher"]
+    assert inline is None
+
+def test_parse_route_invalid_json_falls_back():
+    """
+    Test fallback to general chit-chat on unparseable router output.
+    """
+    assert parse_route_output("I think the job matcher") == (["general_chitchat"], None)
+
+def test_metrics_snapshot_and_ratio():
+    """
+    Test counters, histograms and hit-rate helpers.
+    """
+    registry = MetricsRegistry(max_samples=3)
+    registry.incr("hit", 3); registry.incr("miss")
+    for value in [1, 2, 3, 4]: registry.observe("latency", value)
+    snapshot = registry.snapshot()
+    assert registry.ratio("hit", "miss") == 0.75
+    assert snapshot["histograms"]["latency"]["count"] == 3
+    assert snapshot["histograms"]["latency"]["max"] == 4
+
+def test_speculation_target_skips_ambiguous_and_score_only():
+    """
+    Test that speculation only starts for an unambiguous, rewrite-producing message.
+    """
+    assert speculation_target("Translate my resume to German") == "translation"
+    assert speculation_target("Improve my projects section") == "section_enhancer"
+    assert speculation_target("Match this JD: Senior AI Engineer") == "job_matcher"
+    assert speculation_target("What is my match score for this JD?") is None
+    assert speculation_target("Improve my summary for the Google culture") is None
+    assert speculation_target("Hello, how are you?") is None
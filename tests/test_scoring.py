@@ -0,0 +1,90 @@
+from scoring import ScoringEngine, tokenize, keyword_gap_hint
+from routing import is_score_only, is_local_score_question, find_job_description
+
+RESUME = """
+Jane Roe
+Backend Engineer
+- Built REST APIs in Python and FastAPI on AWS
+- Ran PostgreSQL and Redis in production
+Skills: Python, FastAPI, Docker, PostgreSQL, Redis
+"""
+JD = "Senior Backend Engineer. Requirements: Python, Kubernetes, Go, PostgreSQL, Kafka."
+
+
+def test_tokenize_keeps_tech_tokens():
+    """
+    Test that tokens like c++ and node.js survive tokenization.
+    """
+    assert tokenize("Expert in C++, C# and Node.js with the team") == ["expert", "c++", "c#", "node.js"]
+
+def test_score_is_reproducible_and_lists_gaps():
+    """
+    Test deterministic scoring and the missing keyword list.
+    """
+    engine = ScoringEngine(embedding_model="")
+    first, second = engine.score(RESUME, JD), engine.score(RESUME, JD)
+    assert first == second
+    assert 0 < first["match_score"] < 100
+    assert {"kubernetes", "go", "kafka"} <= set(first["missing_keywords"])
+    assert "python" not in first["missing_keywords"]
+
+def test_score_many_ranks_better_match_higher():
+    """
+    Test the vectorized path ranks a closer job description higher.
+    """
+    engine = ScoringEngine(embedding_model="").fit([RESUME, JD])
+    close, far = engine.score_many(RESUME, ["Python FastAPI PostgreSQL Redis engineer", "Java Spring Oracle mainframe"])
+    assert close["match_score"] > far["match_score"]
+    assert close["bm25"] > far["bm25"]
+
+def test_keyword_gap_hint():
+    """
+    Test the precomputed hint handed to the job matcher.
+    """
+    assert "kubernetes" in keyword_gap_hint(RESUME, JD)
+
+def test_is_score_only():
+    """
+    Test detection of score-only job matching requests.
+    """
+    assert is_score_only("What's my match score for this JD: Python, Go")
+    assert not is_score_only("Tailor my resume and give me a match score")
+    assert is_local_score_question("What's my match score for this JD: Python, Go")
+    assert not is_local_score_question("How well does my resume read?")
+
+def test_score_questions_need_an_explicit_phrase_and_a_job_description():
+    """
+    Test that rewrite requests and questions without a job description are not answered by a local score.
+    """
+    assert not is_score_only("Make my resume match this job: Senior Python dev, a great fit for startups")
+    assert not is_score_only("Is this a good fit for me?")
+    assert is_score_only("How well do I match this role?")
+    assert not is_local_score_question("What is my score?")
+    assert not is_local_score_question("What's my match score?")
+    history = [{"role": "user", "content": "Job description:\nBackend engineer, Python, Kubernetes, Postgres"},
+               {"role": "assistant", "content": "Noted."}]
+    assert is_local_score_question("What's my match score?", history)
+    assert find_job_description("What's my match score?", history) == "Backend engineer, Python, Kubernetes, Postgres"
+
+def test_idf_needs_min_corpus_and_grows_incrementally():
+    """
+    Test that terms weigh 1 below min_corpus and that added documents make common terms weigh less than rare ones.
+    """
+    engine = ScoringEngine(embedding_model="", min_corpus=3)
+    engine.add_documents(["Python developer", "Python and Go"])
+    assert engine._weight("python") == engine._weight("kafka") == 1.0
+    engine.add_documents(["Python, Kafka"])
+    assert engine._weight("python") < engine._weight("go") < engine._weight("rust")
+    assert engine.fit([JD]).n_docs == 1
+
+def test_corpus_counts_each_document_once_and_is_bounded():
+    """
+    Test that a resubmitted document is not counted again and that the oldest documents drop out past max_docs.
+    """
+    engine = ScoringEngine(embedding_model="", max_docs=2)
+    engine.add_documents(["Python developer", "Python developer"])
+    engine.add_documents(["Python developer"])
+    assert engine.n_docs == 1 and engine.df["python"] == 1
+    engine.add_documents(["Go and Kafka", "Rust engineer"])
+    assert engine.n_docs == 2 and "python" not in engine.df and "python developer" not in engine.df
+    assert engine.total_len == len(["go", "kafka", "go kafka"]) + len(["rust", "engineer", "rust engineer"])
@@ -0,0 +1,98 @@
+import pytest
+
+from search_index import ResumeIndex, QuerySyntaxError
+
+RESUMES = {
+    "a": "Backend engineer. Built services in Go on k8s with PostgreSQL.",
+    "b": "Data engineer. Python, Spark and Kubernetes pipelines.",
+    "c": "Frontend developer. React and TypeScript, ready to go to market fast.",
+}
+
+
+def build(**kwargs):
+    index = ResumeIndex(**kwargs)
+    for conversation_id, text in RESUMES.items(): index.add(conversation_id, 1, text)
+    return index
+
+def ids(result):
+    return sorted(r["conversation_id"] for r in result["results"])
+
+
+def test_boolean_operators_and_skill_aliases():
+    """
+    Test AND/OR/NOT and parentheses, with aliases ("k8s") and case-sensitive skills ("Go") matched via the taxonomy.
+    """
+    index = build()
+    assert ids(index.search("Kubernetes AND Go")) == ["a"]
+    assert ids(index.search("kubernetes go")) == ["a"]
+    assert ids(index.search("Kubernetes NOT Go")) == ["b"]
+    assert ids(index.search("(Go OR React) AND NOT PostgreSQL")) == ["c"]
+    assert ids(index.search("Go OR React")) == ["a", "c"]
+    assert ids(index.search('"data engineer" or react')) == ["b", "c"]
+
+def test_latest_version_replaces_previous():
+    """
+    Test that only the latest saved version of a conversation is searchable, and stale versions are ignored.
+    """
+    index = build()
+    index.add("b", 2, "Data engineer. Rust and Kafka.")
+    index.add("b", 1, "Data engineer. Python only.")
+    assert ids(index.search("Kubernetes")) == ["a"]
+    assert [(r["conversation_id"], r["version"]) for r in index.search("Rust")["results"]] == [("b", 2)]
+    assert index.stats()["documents"] == 3 and index.stats()["tombstones"] == 1
+
+def test_all_versions_mode_keeps_history():
+    """
+    Test that all_versions indexes every (conversation, version) pair.
+    """
+    index = build(all_versions=True)
+    index.add("b", 2, "Data engineer. Rust and Kafka.")
+    assert sorted((r["conversation_id"], r["version"]) for r in index.search("engineer")["results"]) == [("a", 1), ("b", 1), ("b", 2)]
+
+def test_bm25_ranks_by_relevance():
+    """
+    Test that bm25 mode matches any term and ranks documents with more matching terms first.
+    """
+    index = build()
+    result = index.search("python spark kubernetes", mode="bm25")
+    assert result["results"][0]["conversation_id"] == "b" and result["total"] == 2
+    limited = index.search("engineer", mode="bm25", limit=1)
+    assert limited["total"] == 2 and len(limited["results"]) == 1
+
+def test_compaction_preserves_results():
+    """
+    Test that dropping tombstoned postings renumbers documents without changing answers.
+    """
+    index = build()
+    for version in range(2, 6): index.add("a", version, f"Backend engineer v{version}. Go and Kafka.")
+    before = index.search("engineer", mode="bm25")
+    index.compact()
+    assert index.search("engineer", mode="bm25") == before
+    assert index.stats()["tombstones"] == 0 and index.stats()["documents"] == 3
+    assert index.search("Kafka")["results"][0]["version"] == 5
+
+def test_syntax_errors():
+    """
+    Test that malformed queries raise QuerySyntaxError.
+    """
+    index = build()
+    for query in ("", "(Go AND", "Go AND", "OR Go", "Go)"):
+        with pytest.raises(QuerySyntaxError): index.search(query)
+    with pytest.raises(QuerySyntaxError): index.search("Go", mode="fuzzy")
+
+def test_bootstrap_stream_reads_text_of_latest_versions_only(monkeypatch):
+    """
+    Test that the latest-only bootstrap fetches modified_text for one version per conversation.
+    """
+    import firebase_utils
+    from types import SimpleNamespace
+    rows = [("a", 1), ("a", 3), ("a", 2), ("b", 1)]
+    docs = [SimpleNamespace(reference=i, to_dict=lambda c=c, v=v: {"conversationId": c, "version": v}) for i, (c, v) in enumerate(rows)]
+    fetched = []
+    def get_all(refs, field_paths):
+        fetched.extend(refs)
+        return [SimpleNamespace(exists=True, to_dict=lambda r=r: {"conversationId": rows[r][0], "version": rows[r][1], "modified_text": "x"}) for r in refs]
+    client = SimpleNamespace(collection=lambda name: SimpleNamespace(select=lambda fields: SimpleNamespace(stream=lambda: iter(docs))), get_all=get_all)
+    monkeypatch.setattr(firebase_utils, "_client", client)
+    assert sorted((d["conversationId"], d["version"]) for d in firebase_utils.stream_latest_resumes(batch_size=1)) == [("a", 3), ("b", 1)]
+    assert sorted(fetched) == [1, 3]
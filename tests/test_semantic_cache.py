@@ -0,0 +1,86 @@
+from semantic_cache import SemanticCache, normalize_query, key_terms
+
+RESUME = "Jane Roe\nBackend Engineer\nSkills: Python"
+
+
+def test_paraphrase_hits_cache():
+    """
+    Test that a rephrased query against the same resume version is served from cache.
+    """
+    cache = SemanticCache()
+    cache.store(RESUME, "company_researcher", "optimize my resume for Google", "cached result")
+    assert cache.lookup(RESUME, "company_researcher", "Make it better for Google") == "cached result"
+    assert cache.audit()[0]["matched_query"] == "optimize my resume for Google"
+
+def test_different_entity_or_scope_misses():
+    """
+    Test that other companies, agents and resume versions never share entries.
+    """
+    cache = SemanticCache()
+    cache.store(RESUME, "company_researcher", "optimize my resume for Google", "cached result")
+    assert cache.lookup(RESUME, "company_researcher", "optimize my resume for Meta") is None
+    assert cache.lookup(RESUME, "section_enhancer", "optimize my resume for Google") is None
+    assert cache.lookup(RESUME + " Go", "company_researcher", "optimize my resume for Google") is None
+
+def test_expired_entries_miss():
+    """
+    Test TTL expiry.
+    """
+    cache = SemanticCache(ttl_seconds=0)
+    cache.store(RESUME, "translation", "translate to German", "cached result")
+    cache.scopes[next(iter(cache.scopes))]["entries"][0]["created_at"] -= 1
+    assert cache.lookup(RESUME, "translation", "translate to German") is None
+
+def test_report_false_hit_evicts_entry():
+    """
+    Test the false-hit audit flow.
+    """
+    cache = SemanticCache()
+    cache.store(RESUME, "section_enhancer", "improve my experience section", "cached result")
+    assert cache.lookup(RESUME, "section_enhancer", "make my experience section stronger") == "cached result"
+    record = cache.report_false_hit(cache.audit()[0]["id"])
+    assert record["false_hit"]
+    assert cache.lookup(RESUME, "section_enhancer", "make my experience section stronger") is None
+
+def test_normalization():
+    """
+    Test synonym folding and key term extraction.
+    """
+    assert key_terms(normalize_query("Please polish my CV for Stripe")) == {"stripe"}
+
+def test_byte_cap_evicts_least_recently_used_scopes():
+    """
+    Test that cached outputs stay under max_bytes by evicting the oldest scopes.
+    """
+    cache = SemanticCache(max_bytes=1000)
+    cache.store(RESUME, "translation", "translate to German", "x" * 400)
+    cache.store(RESUME, "section_enhancer", "improve my summary", "y" * 400)
+    cache.store(RESUME + " Go", "translation", "translate to German", "z" * 400)
+    assert cache.stats()["bytes"] <= 1000 and cache.stats()["scopes"] == 2
+    assert cache.lookup(RESUME, "translation", "translate to German") is None
+    cache.store(RESUME, "translation", "translate to French", "w" * 2000)
+    assert cache.lookup(RESUME, "translation", "translate to French") is None
+
+def test_role_order_is_part_of_the_key():
+    """
+    Test that swapping a translation direction or add/remove objects never shares an entry.
+    """
+    assert key_terms(normalize_query("Translate my resume from German to English")) != key_terms(normalize_query("Translate my resume from English to German"))
+    assert key_terms(normalize_query("add Python, remove Java")) != key_terms(normalize_query("add Java, remove Python"))
+    cache = SemanticCache()
+    cache.store(RESUME, "translation", "Translate my resume from German to English", "english resume")
+    cache.store(RESUME, "section_enhancer", "add Python, remove Java", "python resume")
+    assert cache.lookup(RESUME, "translation", "Translate my resume from English to German") is None
+    assert cache.lookup(RESUME, "section_enhancer", "add Java, remove Python") is None
+    assert cache.lookup(RESUME, "translation", "please translate it from German into English") == "english resume"
+
+def test_near_neighbour_needs_every_term_paired():
+    """
+    Test that spelling variants hit while a long query differing in one entity misses despite high similarity.
+    """
+    cache = SemanticCache()
+    cache.store(RESUME, "section_enhancer", "improve my experience section", "cached result")
+    assert cache.lookup(RESUME, "section_enhancer", "improve my experiences section") == "cached result"
+    query = "tailor my experience, skills and summary sections for a senior backend role at {}"
+    cache.store(RESUME, "company_researcher", query.format("Google"), "google result")
+    assert cache.lookup(RESUME, "company_researcher", query.format("Meta")) is None
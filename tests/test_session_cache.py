@@ -0,0 +1,95 @@
+import pytest
+from unittest.mock import MagicMock
+from session_cache import SessionCache
+
+MOCK_CONVERSATION_ID = "test_conv_123"
+LATEST = {'version': 1, 'original_text': "Resume", 'modified_text': "Resume\nSKILLS\nPython\n"}
+
+
+@pytest.fixture
+def store():
+    store = MagicMock()
+    store.get_conversation_history.return_value = [{"role": "user", "content": "hi"}]
+    store.get_latest_resume.return_value = dict(LATEST)
+    store.save_resume_version.return_value = 2
+    return store
+
+def test_read_through_then_hit(store):
+    """
+    Test that Firestore is read once and later turns are served from memory.
+    """
+    cache = SessionCache(store)
+    assert cache.get_latest_resume(MOCK_CONVERSATION_ID)['version'] == 1
+    cache.get_conversation_history(MOCK_CONVERSATION_ID)
+    cache.get_latest_resume(MOCK_CONVERSATION_ID)
+    store.get_conversation_history.assert_called_once()
+    store.get_latest_resume.assert_called_once()
+
+def test_write_behind_batches_history(store):
+    """
+    Test that history entries are visible immediately and flushed in one write.
+    """
+    cache = SessionCache(store, flush_interval=3600)
+    cache.get_conversation_history(MOCK_CONVERSATION_ID)
+    cache.update_conversation_history(MOCK_CONVERSATION_ID, {"role": "user", "content": "a"})
+    cache.update_conversation_history(MOCK_CONVERSATION_ID, {"role": "assistant", "content": "b"})
+    assert len(cache.get_conversation_history(MOCK_CONVERSATION_ID)) == 3
+    store.append_conversation_history.assert_not_called()
+    assert cache.flush() == 2
+    store.append_conversation_history.assert_called_once_with(
+        MOCK_CONVERSATION_ID, [{"role": "user", "content": "a"}, {"role": "assistant", "content": "b"}])
+
+def test_miss_merges_unflushed_entries(store):
+    """
+    Test that a read-through after eviction still sees entries not yet flushed.
+    """
+    cache = SessionCache(store, flush_interval=3600)
+    cache.update_conversation_history(MOCK_CONVERSATION_ID, {"role": "user", "content": "pending"})
+    history = cache.get_conversation_history(MOCK_CONVERSATION_ID)
+    assert history[-1]["content"] == "pending"
+
+def test_failed_flush_is_retried(store):
+    """
+    Test that entries stay pending when Firestore rejects the write.
+    """
+    cache = SessionCache(store, flush_interval=3600)
+    store.append_conversation_history.side_effect = RuntimeError("unavailable")
+    cache.update_conversation_history(MOCK_CONVERSATION_ID, {"role": "user", "content": "a"})
+    assert cache.flush() == 0
+    store.append_conversation_history.side_effect = None
+    assert cache.flush() == 1
+
+def test_save_version_updates_cached_latest(store):
+    """
+    Test write-through of resume versions.
+    """
+    cache = SessionCache(store)
+    assert cache.get_latest_resume(MOCK_CONVERSATION_ID)['version'] == 1
+    cache.save_resume_version(MOCK_CONVERSATION_ID, "Resume", "New resume")
+    latest = cache.get_latest_resume(MOCK_CONVERSATION_ID)
+    assert latest['version'] == 2 and latest['modified_text'] == "New resume"
+    store.get_latest_resume.assert_called_once()
+
+def test_lru_memory_cap(store):
+    """
+    Test that the least recently used conversation is evicted over the memory cap.
+    """
+    cache = SessionCache(store, max_sessions=2)
+    for convo in ("a", "b", "c"): cache.get_latest_resume(convo)
+    assert list(cache.sessions) == ["b", "c"]
+
+def test_flush_drops_deleted_conversations_and_caps_retries(store):
+    """
+    Test that writes to a deleted conversation are dropped at once and other failures after max_flush_attempts.
+    """
+    class NotFound(Exception): pass
+    cache = SessionCache(store, flush_interval=3600, max_flush_attempts=2)
+    store.append_conversation_history.side_effect = NotFound("No document to update")
+    cache.update_conversation_history("deleted", {"role": "user", "content": "a"})
+    assert cache.flush() == 0 and not cache.pending
+    store.append_conversation_history.side_effect = RuntimeError("unavailable")
+    cache.update_conversation_history(MOCK_CONVERSATION_ID, {"role": "user", "content": "b"})
+    cache.flush()
+    assert len(cache.pending) == 1
+    cache.flush()
+    assert not cache.pending
@@ -0,0 +1,103 @@
+import re
+import threading
+from translation import ChunkedTranslator, TranslationMemory, detect_language
+
+RESUME = ("Jane Doe\njane@example.com\n\nSUMMARY\nBackend engineer\n\nEXPERIENCE\n"
+          "- Built data pipelines\n- Led a team of 4\n\nSKILLS\nPython, Docker\n")
+
+
+def fake_translate(calls):
+    def translate(language, glossary, numbered_lines):
+        calls.append((threading.current_thread().name, glossary, numbered_lines))
+        return "\n".join(re.sub(r"^\[(\d+)\] (.*)$", r"[\1] DE:\2", line) for line in numbered_lines.splitlines())
+    return translate
+
+def test_detect_language():
+    """
+    Test that the target language is read from language or country names.
+    """
+    assert detect_language("Translate my resume to German please") == "German"
+    assert detect_language("Adapt it for a job in Japan") == "Japanese"
+    assert detect_language("Make it stronger") is None
+
+def test_detect_language_prefers_the_target():
+    """
+    Test that the language after "to"/"into" wins over the source language, and ambiguity yields None.
+    """
+    assert detect_language("Translate my German resume into English") == "English"
+    assert detect_language("Translate it from Spanish to French") == "French"
+    assert detect_language("Polish the wording and translate to Japanese") == "Japanese"
+    assert detect_language("Polish the wording and translate it") is None
+    assert detect_language("I need a German and a French version") is None
+
+def test_chunks_are_translated_and_reassembled_in_order():
+    """
+    Test that every translatable line is replaced in place while layout, bullets and emails are kept.
+    """
+    calls = []
+    translator = ChunkedTranslator(fake_translate(calls), TranslationMemory(), workers=4, chunk_chars=30)
+    translated, stats = translator.translate(RESUME, "German")
+    assert len(calls) == stats["chunks"] > 1
+    assert translated.splitlines()[:2] == ["DE:Jane Doe", "jane@example.com"]
+    assert "- DE:Built data pipelines\n- DE:Led a team of 4\n" in translated
+    assert translated.count("\n") == RESUME.count("\n")
+    assert stats["lines_missing"] == 0
+
+def test_translation_memory_reuses_lines_and_feeds_glossary():
+    """
+    Test that a second resume only sends unseen lines and gets remembered titles in its glossary.
+    """
+    calls, memory = [], TranslationMemory()
+    translator = ChunkedTranslator(fake_translate(calls), memory)
+    translator.translate(RESUME, "German", skill_names={"Python", "Docker"})
+    assert "Keep these terms exactly as written: Docker, Python." in calls[0][1]
+    calls.clear()
+    _, stats = translator.translate(RESUME.replace("Jane Doe", "John Roe"), "German")
+    assert stats["lines_reused"] == 7 and stats["lines_translated"] == 1
+    assert "[0] John Roe" in calls[0][2] and "Backend engineer => DE:Backend engineer" in calls[0][1]
+    assert translator.translate(RESUME, "French")[1]["lines_reused"] == 0
+
+def test_dropped_lines_stay_untranslated():
+    """
+    Test that lines missing from the model output keep their source text and are not memorized.
+    """
+    memory = TranslationMemory()
+    translator = ChunkedTranslator(lambda language, glossary, lines: lines.splitlines()[0].replace("] ", "] DE:"), memory)
+    translated, stats = translator.translate("Backend engineer\nBuilt APIs\n", "German")
+    assert translated == "DE:Backend engineer\nBuilt APIs\n" and stats["lines_missing"] == 1
+    assert memory.lookup("German", "Built APIs") is None
+
+def test_translation_memory_is_scoped_by_tenant():
+    """
+    Test that one tenant's remembered lines are never reused for another tenant.
+    """
+    calls, memory = [], TranslationMemory()
+    translator = ChunkedTranslator(fake_translate(calls), memory)
+    translator.translate(RESUME, "German", tenant="acme")
+    assert translator.translate(RESUME, "German", tenant="globex")[1]["lines_reused"] == 0
+    assert translator.translate(RESUME, "German", tenant="acme")[1]["lines_reused"] == 8
+    assert memory.lookup("German", "Built data pipelines", "acme") == "DE:Built data pipelines"
+    assert memory.lookup("German", "Built data pipelines") is None
+    assert memory.stats() == {"German": 16}
+
+def test_translation_memory_drops_least_recent_tenant():
+    """
+    Test that the memory keeps at most max_scopes (tenant, language) scopes.
+    """
+    memory = TranslationMemory(max_scopes=2)
+    for tenant in ("a", "b", "c"): memory.store("German", "Engineer", "Ingenieur", tenant)
+    assert memory.lookup("German", "Engineer", "a") is None
+    assert memory.lookup("German", "Engineer", "c") == "Ingenieur"
+
+def test_conventions_are_looked_up_once_and_sent_with_every_chunk():
+    """
+    Test that one conventions lookup per request reaches every chunk, and none is made when all lines are remembered.
+    """
+    calls, lookups = [], []
+    conventions = lambda language: lookups.append(language) or "Put the photo top right; dates as MM/YYYY."
+    translator = ChunkedTranslator(fake_translate(calls), TranslationMemory(), chunk_chars=30, conventions_fn=conventions)
+    _, stats = translator.translate(RESUME, "German")
+    assert lookups == ["German"] and len(calls) == stats["chunks"] > 1
+    assert all(glossary.startswith("Resume conventions in the target market:\nPut the photo top right") for _, glossary, _ in calls)
+    translator.translate(RESUME, "German")
+    assert lookups == ["German"]
@@ -0,0 +1,74 @@
+from verifier import AhoCorasick, HallucinationVerifier, extract_numbers, allowed_source, verifier, UNVERIFIED_AGENTS
+
+ORIGINAL = "Jane Doe\nSKILLS\nPython, C++, PostgreSQL\n- Built REST APIs that cut latency by 40%\n"
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    """
+    Test that one pass reports every pattern, including ones ending at the same position.
+    """
+    automaton = AhoCorasick()
+    for word in ("he", "she", "his", "hers"): automaton.add(word, word)
+    automaton.build()
+    assert sorted((s, e, p) for s, e, p in automaton.iter_matches("ushers")) == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+def test_skill_extraction_respects_token_boundaries_and_case():
+    """
+    Test leftmost-longest, whole-token matching and case-sensitive ambiguous names.
+    """
+    extract = verifier.skill_index.extract
+    assert extract("C++ and C#") == {"C++", "C#"}
+    assert "Java" not in extract("JavaScript developer")
+    assert "Go" in extract("Services written in Go") and "Go" in extract("golang services")
+    assert "Go" not in extract("Ready to go to market")
+
+def test_numbers_ignore_enumerations():
+    """
+    Test that metrics are normalized and list numbering is not treated as a claim.
+    """
+    assert extract_numbers("1. Grew revenue by $2M for 10,000+ users, 40 % faster") == {"$2m", "10000+", "40%"}
+
+def test_verify_flags_only_new_claims():
+    """
+    Test that rewording passes while invented skills and metrics are reported.
+    """
+    checker = HallucinationVerifier(verifier.skill_index)
+    reworded = ORIGINAL.replace("Built", "Designed and shipped")
+    assert checker.verify(ORIGINAL, reworded).ok
+    report = checker.verify(ORIGINAL, reworded + "- Deployed on Kubernetes for 3M users\n")
+    assert report.added_skills == {"Kubernetes"} and report.added_numbers == {"3m"}
+    assert "Kubernetes" in report.describe()
+    assert not HallucinationVerifier(verifier.skill_index, check_numbers=False).verify(ORIGINAL, ORIGINAL + "3M users").added_numbers
+
+def test_allowed_source_includes_user_assertions():
+    """
+    Test that skills the user vouches for in their message are allowed.
+    """
+    assert verifier.verify(allowed_source(ORIGINAL, ORIGINAL, "I also know Docker, add it"), ORIGINAL + "Docker").ok
+    assert not verifier.verify(allowed_source(ORIGINAL, ORIGINAL, "Make it stronger"), ORIGINAL + "Docker").ok
+
+def test_pasted_job_descriptions_are_not_user_assertions():
+    """
+    Test that only first-person statements are allowed, and never for agents fed a job description.
+    """
+    jd = "Match this job. Responsibilities include Kubernetes and Terraform."
+    assert not verifier.verify(allowed_source(ORIGINAL, ORIGINAL, jd), ORIGINAL + "Kubernetes").ok
+    assert not verifier.verify(allowed_source(ORIGINAL, ORIGINAL, "Add Kubernetes"), ORIGINAL + "Kubernetes").ok
+    assert not verifier.verify(allowed_source(ORIGINAL, ORIGINAL, jd + " I know Kubernetes.", "job_matcher"), ORIGINAL + "Kubernetes").ok
+    assert verifier.verify(allowed_source(ORIGINAL, ORIGINAL, jd + " I know Kubernetes.", "section_enhancer"), ORIGINAL + "Kubernetes").ok
+
+def test_number_format_changes_are_not_new_claims():
+    """
+    Test that dates and metrics rewritten in another format compare equal, and changed values do not.
+    """
+    original = "Acme (01/2019 - 2023): grew revenue by $2M, 40% faster, 10,000+ users"
+    assert verifier.verify(original, "Acme (2019–23): grew revenue by $2 million, 40 percent faster, 10k users").ok
+    assert verifier.verify(original, "Acme: 45% faster").added_numbers == {"45%"}
+
+def test_translations_are_not_verified():
+    """
+    Test that translations skip the English taxonomy, which reads French prose as skill names.
+    """
+    french = "Création d'un tableau de bord de suivi pour l'équipe."
+    assert verifier.verify("Built reporting dashboards for the team.", french).added_skills == {"Tableau"}
+    assert "translation" in UNVERIFIED_AGENTS
@@ -0,0 +1,30 @@
+import time
+import warmup as warmup_module
+from warmup import Warmup
+
+
+def _wait(tracker):
+    for _ in range(100):
+        if tracker.state != "warming": return
+        time.sleep(0.01)
+
+
+def test_degraded_components_are_retried_after_backoff(monkeypatch):
+    """
+    Test that a transient failure leaves warmup degraded only until the next start() after the backoff,
+    and that components which already succeeded are not run again.
+    """
+    calls, fail = [], [True]
+    def flaky():
+        calls.append("flaky")
+        if fail[0]: raise RuntimeError("transient")
+    monkeypatch.setattr(warmup_module, "_component_steps", lambda: [("ok", lambda: calls.append("ok")), ("flaky", flaky)])
+    tracker = Warmup(retry_seconds=0.05)
+    tracker.start(); _wait(tracker)
+    assert tracker.state == "degraded"
+    tracker.start()
+    assert tracker.state == "degraded" and tracker.attempts == 1
+    fail[0] = False
+    time.sleep(0.06)
+    tracker.start(); _wait(tracker)
+    assert tracker.state == "ready" and calls == ["ok", "flaky", "flaky"]
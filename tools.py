@@ -1,18 +1,49 @@
-import os
-from langchain_tavily import TavilySearch
-from crewai.tools import tool 
+import threading
 from dotenv import load_dotenv
+from cassette import cassette
 
 load_dotenv()
 
-# Instantiate the original LangChain tool
-tavily_search_instance = TavilySearch(k=3)
+# The Tavily client and the CrewAI tool wrapper are built on first use, so importing
+# this module is cheap and does not need TAVILY_API_KEY.
+_search_client = None
+_web_search_tool = None
+_lock = threading.Lock()
 
-# Use the @tool decorator to create a CrewAI-compatible tool.
-# The function name 'web_search_tool' becomes the tool itself.
-@tool("Tavily Web Search")
-def web_search_tool(query: str) -> str:
-    """Performs a web search using the Tavily API to find up-to-date information."""
-    return tavily_search_instance.invoke({"query": query})
+def get_search_client():
+    """The LangChain TavilySearch instance, created on first use (thread-safe)."""
+    global _search_client
+    if _search_client is None:
+        with _lock:
+            if _search_client is None:
+                from langchain_tavily import TavilySearch
+                _search_client = TavilySearch(k=3)
+    return _search_client
+
+def web_search(query: str):
+    """One Tavily search through the record/replay cassette."""
+    return cassette.call("search", "web_search", query, lambda: get_search_client().invoke({"query": query}))
+
+def get_web_search_tool():
+    """The CrewAI-compatible web search tool, created on first use."""
+    global _web_search_tool
+    if _web_search_tool is None:
+        with _lock:
+            if _web_search_tool is None:
+                from crewai.tools import tool
+
+                # Use the @tool decorator to create a CrewAI-compatible tool.
+                @tool("Tavily Web Search")
+                def web_search_tool(query: str) -> str:
+                    """Performs a web search using the Tavily API to find up-to-date information."""
+                    return web_search(query)
+
+                _web_search_tool = web_search_tool
+    return _web_search_tool
+
+def __getattr__(name):
+    # Keeps `from tools import web_search_tool` working for scripts
+    if name == "web_search_tool": return get_web_search_tool()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 #bye
@@ -0,0 +1,195 @@
+import re
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from metrics import metrics
+from sections import cached_sections
+
+# Chunked translation: the resume is split into section-aligned chunks of numbered lines, chunks are
+# translated concurrently, and the translated lines are put back in place. Lines seen before for the
+# same tenant and language (job titles, headings, common bullets) come from the translation memory.
+# One web search per request for the target market's resume conventions is shared by all chunks.
+
+LANGUAGES = {
+    "german": "German", "deutsch": "German", "germany": "German", "austria": "German",
+    "french": "French", "france": "French", "spanish": "Spanish", "spain": "Spanish", "mexico": "Spanish",
+    "portuguese": "Portuguese", "portugal": "Portuguese", "brazil": "Portuguese",
+    "italian": "Italian", "italy": "Italian", "dutch": "Dutch", "netherlands": "Dutch",
+    "japanese": "Japanese", "japan": "Japanese", "korean": "Korean", "korea": "Korean",
+    "chinese": "Chinese", "china": "Chinese", "mandarin": "Chinese", "hindi": "Hindi",
+    "polish": "Polish", "poland": "Polish", "swedish": "Swedish", "sweden": "Swedish",
+    "turkish": "Turkish", "turkey": "Turkish", "arabic": "Arabic", "russian": "Russian", "english": "English",
+}
+_NAMES = "|".join(sorted(LANGUAGES, key=len, reverse=True))
+LANGUAGE_RE = re.compile(r"\b(" + _NAMES + r")\b", re.I)
+# Strongest evidence first: "into English" / "to French", then "in German", then any mention
+TARGET_RES = (re.compile(r"\b(?:to|into)\s+(" + _NAMES + r")\b", re.I), re.compile(r"\bin\s+(" + _NAMES + r")\b", re.I))
+# Names that are also common words ("polish the wording") only count after a preposition
+_WORD_NAMES = {"polish"}
+
+# Leading bullet / indentation kept verbatim so the memory key is the bullet's text alone
+_PREFIX_RE = re.compile(r"^[\s\-*•·▪◦–>#]*")
+# Lines with nothing to translate: emails, URLs, phone numbers, dates, separators
+_VERBATIM_RE = re.compile(r"^(?:\S+@\S+|(?:https?://|www\.)\S+|[\d\s()+./:|\-–—]+)$", re.I)
+_NUMBERED_RE = re.compile(r"^\s*\[(\d+)\]\s?(.*)$")
+
+
+def detect_language(message: str):
+    """Target language of the user's message ("translate to German", "for a job in Japan"), or None when
+    there is none or it is ambiguous ("a German and a French version") and the single-call
+    translation agent should read the request itself."""
+    for candidates in ([m.group(1).lower() for m in r.finditer(message)] for r in TARGET_RES):
+        if candidates: break
+    else:
+        candidates = [m.group(1).lower() for m in LANGUAGE_RE.finditer(message) if m.group(1).lower() not in _WORD_NAMES]
+    targets = {LANGUAGES[name] for name in candidates}
+    return targets.pop() if len(targets) == 1 else None
+
+def _memory_key(text: str):
+    return " ".join(text.split()).lower()
+
+
+class TranslationMemory:
+    """Per-tenant, per-language LRU of source line -> translated line.
+
+    Tenants never see each other's lines: a remembered line can carry another customer's
+    wording (or their content), so the memory is scoped by tenant as well as language.
+    The least recently used scopes are dropped past max_scopes."""
+
+    def __init__(self, max_entries_per_language=5000, max_scopes=1000):
+        self.max_entries_per_language, self.max_scopes = max_entries_per_language, max_scopes
+        self.scopes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, language: str, text: str, tenant="anonymous"):
+        with self._lock:
+            entries = self.scopes.get((tenant, language))
+            key = _memory_key(text)
+            if entries is None or key not in entries: return None
+            self.scopes.move_to_end((tenant, language))
+            entries.move_to_end(key)
+            return entries[key]
+
+    def store(self, language: str, text: str, translated: str, tenant="anonymous"):
+        with self._lock:
+            entries = self.scopes.setdefault((tenant, language), OrderedDict())
+            self.scopes.move_to_end((tenant, language))
+            entries[_memory_key(text)] = translated
+            entries.move_to_end(_memory_key(text))
+            while len(entries) > self.max_entries_per_language: entries.popitem(last=False)
+            while len(self.scopes) > self.max_scopes: self.scopes.popitem(last=False)
+
+    def stats(self):
+        """Remembered lines per language, summed over tenants (tenant keys are not exposed)."""
+        with self._lock:
+            counts = {}
+            for (_, language), entries in self.scopes.items(): counts[language] = counts.get(language, 0) + len(entries)
+            return counts
+
+
+class ChunkedTranslator:
+    """Translate a resume section by section, concurrently, reusing the translation memory.
+
+    translate_fn(language, glossary, numbered_lines) returns the translated lines, each still
+    prefixed with its "[n]" marker. It is called from worker threads in a copy of the caller's
+    context, so admission tenant/lane bindings carry over.
+
+    conventions_fn(language), when given, returns notes on resume conventions in the target
+    market. It is called at most once per translate() call, and only when some line still
+    needs the model; the notes go at the top of every chunk's prompt."""
+
+    def __init__(self, translate_fn, memory, workers=4, chunk_chars=1500, conventions_fn=None):
+        self.translate_fn, self.memory = translate_fn, memory
+        self.workers, self.chunk_chars = workers, chunk_chars
+        self.conventions_fn = conventions_fn
+
+    @staticmethod
+    def glossary(skill_names=(), established=(), conventions=""):
+        """Shared terminology context sent with every chunk, so sections translate consistently."""
+        parts = []
+        if conventions: parts.append("Resume conventions in the target market:\n" + conventions.strip())
+        if skill_names: parts.append("Keep these terms exactly as written: " + ", ".join(sorted(skill_names)) + ".")
+        # Remembered titles and headings pin the wording the other chunks should reuse
+        known = [f"{src} => {dst}" for src, dst in established if len(src.split()) <= 6]
+        if known: parts.append("Use these established translations:\n" + "\n".join(dict.fromkeys(known)))
+        parts.append("Keep names, company names, email addresses, URLs and numbers unchanged.")
+        return "\n".join(parts)
+
+    def _chunks(self, sections):
+        """Group pending (index, body) lines into chunks that break at section boundaries where possible."""
+        chunks, current, size = [], [], 0
+        for section in sections:
+            if current and size + sum(len(b) for _, b in section) > self.chunk_chars:
+                chunks.append(current); current, size = [], 0
+            for index, body in section:
+                if current and size + len(body) > self.chunk_chars:
+                    chunks.append(current); current, size = [], 0
+                current.append((index, body)); size += len(body)
+        if current: chunks.append(current)
+        return chunks
+
+    def _translate_chunk(self, language, glossary, chunk):
+        numbered = "\n".join(f"[{i}] {body}" for i, body in chunk)
+        with metrics.timer("translation.chunk_seconds"):
+            raw = self.translate_fn(language, glossary, numbered)
+        translated = {}
+        for line in raw.splitlines():
+            match = _NUMBERED_RE.match(line)
+            if match and match.group(2).strip(): translated[int(match.group(1))] = match.group(2).strip()
+        return translated
+
+    def translate(self, text: str, language: str, skill_names=(), tenant="anonymous"):
+        """Returns (translated text, stats). Lines the model dropped are left in the source language.
+        Only tenant's own earlier translations are reused."""
+        lines = text.splitlines(keepends=True)
+        out = list(lines)
+        pending_sections, pending, established = [], [], []
+        line_no = 0
+        for section in cached_sections(text):
+            section_pending = []
+            for raw in section["text"].splitlines(keepends=True):
+                content = raw.rstrip("\r\n")
+                prefix = _PREFIX_RE.match(content).group(0)
+                body = content[len(prefix):].strip()
+                if body and not _VERBATIM_RE.match(body):
+                    remembered = self.memory.lookup(language, body, tenant)
+                    if remembered is not None:
+                        out[line_no] = prefix + remembered + raw[len(content):]
+                        established.append((body, remembered))
+                    else:
+                        section_pending.append((line_no, body))
+                line_no += 1
+            if section_pending: pending_sections.append(section_pending); pending += section_pending
+
+        chunks = self._chunks(pending_sections)
+        conventions = self.conventions_fn(language) if chunks and self.conventions_fn else ""
+        glossary = self.glossary(skill_names, established, conventions)
+        translated = {}
+        if chunks:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(chunks))) as pool:
+                futures = [pool.submit(contextvars.copy_context().run, self._translate_chunk, language, glossary, chunk) for chunk in chunks]
+                for future in futures: translated.update(future.result())
+
+        missing = 0
+        for index, body in pending:
+            if index not in translated:
+                missing += 1
+                continue
+            content = lines[index].rstrip("\r\n")
+            prefix = _PREFIX_RE.match(content).group(0)
+            out[index] = prefix + translated[index] + lines[index][len(content):]
+            self.memory.store(language, body, translated[index], tenant)
+
+        metrics.incr("translation.lines_reused", len(established))
+        metrics.incr("translation.lines_translated", len(pending) - missing)
+        if missing: metrics.incr("translation.lines_missing", missing)
+        stats = {"language": language, "chunks": len(chunks), "lines_translated": len(pending) - missing,
+                 "lines_reused": len(established), "lines_missing": missing}
+        return "".join(out), stats
+
+# Global translation memory, partitioned by tenant
+translation_memory = TranslationMemory(max_entries_per_language=config.TRANSLATION_MEMORY_SIZE,
+                                       max_scopes=config.TRANSLATION_MEMORY_SCOPES)
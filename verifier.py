@@ -0,0 +1,185 @@
+import os
+import re
+import time
+from collections import deque
+
+import config
+from metrics import metrics
+
+# Deterministic check that a rewritten resume does not claim skills, technologies or numbers
+# the candidate never wrote. Replaces asking an LLM to "verify no hallucinated skills were added".
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "skills_taxonomy.txt")
+
+# Characters that continue a token: a match must not be glued to one of these on either side
+_TOKEN_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789+#&")
+
+NUMBER_RE = re.compile(r"(?<![\w.])[$€£₹]?\d+(?:[.,]\d+)*(?:\s?%|\s(?:thousand|million|billion|percent)\b|[a-z]{1,3})?\+?(?![\w])", re.I)
+ENUMERATION_RE = re.compile(r"^\s*\d+[.)]\s", re.M)
+# Date formats a rewrite may switch between: "03/2023" -> "2023", "2019-23" -> "2019-2023"
+MONTH_YEAR_RE = re.compile(r"(?<![\d/])(?:0?[1-9]|1[0-2])[/.]((?:19|20)\d{2})\b")
+YEAR_RANGE_RE = re.compile(r"\b((?:19|20)(\d{2}))(\s*(?:[-–—]|to)\s*)(\d{2})\b(?![\d/])")
+CLAIM_RE = re.compile(r"[$€£₹]?(\d+(?:\.\d+)?)([a-z%]*)")
+SCALES = {"k": 1e3, "thousand": 1e3, "m": 1e6, "mm": 1e6, "mn": 1e6, "million": 1e6, "b": 1e9, "bn": 1e9, "billion": 1e9}
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: one pass over the text finds every taxonomy term."""
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]     # per state: [(pattern length, payload)]
+
+    def add(self, pattern: str, payload):
+        state = 0
+        for ch in pattern:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({}); self.fail.append(0); self.output.append([])
+            state = nxt
+        self.output[state].append((len(pattern), payload))
+
+    def build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]: f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+        return self
+
+    def iter_matches(self, text: str):
+        """Yield (start, end, payload) for every pattern occurrence."""
+        state = 0
+        goto, fail, output = self.goto, self.fail, self.output
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]: state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, payload in output[state]:
+                yield i - length + 1, i + 1, payload
+
+
+class SkillIndex:
+    """Skill taxonomy compiled into an Aho-Corasick automaton over lowercased text."""
+
+    def __init__(self, path=None):
+        self.automaton = AhoCorasick()
+        self.names = {}        # lowercased name or alias -> canonical (lenient lookup for search queries)
+        self.size = 0
+        with open(path or DEFAULT_TAXONOMY_PATH, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"): continue
+                names = line.split("|")
+                canonical = names[0].lstrip("=")
+                for name in names:
+                    case_sensitive = name.startswith("=")
+                    term = name.lstrip("=").strip()
+                    if term:
+                        self.automaton.add(term.lower(), (canonical, term if case_sensitive else None))
+                        self.names[term.lower()] = canonical
+                self.size += 1
+        self.automaton.build()
+
+    def extract(self, text: str):
+        """Canonical skill names mentioned in text (leftmost-longest, whole-token matches only)."""
+        lowered = text.lower()
+        candidates = []
+        for start, end, (canonical, exact) in self.automaton.iter_matches(lowered):
+            if start > 0 and lowered[start - 1] in _TOKEN_CHARS: continue
+            if end < len(lowered) and lowered[end] in _TOKEN_CHARS: continue
+            if exact is not None and text[start:end] != exact: continue
+            candidates.append((start, -(end - start), end, canonical))
+        found, covered_until = set(), -1
+        for start, _, end, canonical in sorted(candidates):
+            if start < covered_until: continue   # inside a longer match ("C" within "C++")
+            found.add(canonical)
+            covered_until = end
+        return found
+
+
+def extract_numbers(text: str):
+    """Normalized numeric claims ("40%", "$2m", "10k+"), ignoring list enumerations like "1."."""
+    text = ENUMERATION_RE.sub(" ", text)
+    text = YEAR_RANGE_RE.sub(lambda m: m.group(1) + m.group(3) + m.group(1)[:2] + m.group(4), MONTH_YEAR_RE.sub(r"\1", text))
+    return {re.sub(r"\s", "", m.group(0)).lower().replace(",", "") for m in NUMBER_RE.finditer(text)}
+
+def claim_value(claim: str):
+    """The quantity behind a normalized claim, so format-only changes compare equal:
+    "$2m" == "$2million" == "2000000", "40%" == "40percent", "5+" == "5"."""
+    match = CLAIM_RE.match(claim)
+    if not match: return claim
+    try: value = float(match.group(1))
+    except ValueError: return claim
+    return round(value * SCALES.get(match.group(2), 1), 6)
+
+
+class VerificationReport:
+    __slots__ = ("added_skills", "added_numbers", "seconds")
+
+    def __init__(self, added_skills, added_numbers, seconds):
+        self.added_skills, self.added_numbers, self.seconds = added_skills, added_numbers, seconds
+
+    @property
+    def ok(self):
+        return not self.added_skills and not self.added_numbers
+
+    def describe(self):
+        parts = []
+        if self.added_skills: parts.append("skills/technologies not in the original resume: " + ", ".join(sorted(self.added_skills)))
+        if self.added_numbers: parts.append("numbers not in the original resume: " + ", ".join(sorted(self.added_numbers)))
+        return "; ".join(parts)
+
+
+class HallucinationVerifier:
+    """Flags skills and numbers present in an updated resume but absent from every allowed source."""
+
+    def __init__(self, skill_index, check_numbers=True):
+        self.skill_index, self.check_numbers = skill_index, check_numbers
+
+    def verify(self, allowed_text: str, updated_text: str, check_numbers=None) -> VerificationReport:
+        start = time.perf_counter()
+        check_numbers = self.check_numbers if check_numbers is None else check_numbers
+        added_skills = self.skill_index.extract(updated_text) - self.skill_index.extract(allowed_text)
+        added_numbers = set()
+        if check_numbers:
+            allowed_values = {claim_value(n) for n in extract_numbers(allowed_text)}
+            added_numbers = {n for n in extract_numbers(updated_text) if claim_value(n) not in allowed_values}
+        report = VerificationReport(added_skills, added_numbers, time.perf_counter() - start)
+        metrics.observe("verifier.seconds", report.seconds)
+        metrics.incr("verifier.passed" if report.ok else "verifier.flagged")
+        return report
+
+
+# First-person statements about the candidate ("I also know Docker", "I've used Terraform at work").
+# Imperatives like "add"/"include" are not enough: a pasted job description says "include" too.
+USER_ASSERTION_RE = re.compile(
+    r"\b(?:i(?:'ve| have)?\s+(?:also\s+)?(?:know|used|use|have used|have experience (?:with|in)|worked (?:with|on)|built|"
+    r"am (?:also )?(?:proficient|experienced|skilled|certified) (?:in|with)|have)|i'm (?:also )?(?:proficient|experienced|skilled|certified) (?:in|with)|"
+    r"my (?:skills|experience|background) (?:include|includes|covers?))\b", re.I)
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?;])\s+|\n+")
+# Their messages carry job descriptions or company research, never facts about the candidate
+NO_ASSERTION_AGENTS = ("job_matcher", "company_researcher")
+# Not checked at all: the taxonomy is English, so translated prose reads as skill names ("tableau de bord"
+# -> Tableau) and translations reformat numbers ("1,000" -> "1.000")
+UNVERIFIED_AGENTS = ("translation",)
+
+def user_assertions(message: str) -> str:
+    """The sentences of a message in which the user states their own skills or experience."""
+    return "\n".join(s for s in SENTENCE_SPLIT_RE.split(message) if USER_ASSERTION_RE.search(s))
+
+def allowed_source(original_text: str, current_text: str, message: str, agent_type: str = None) -> str:
+    """Text the updated resume may draw claims from: the original upload, the pre-turn resume,
+    and the sentences where the user asserts their own skills (except for agents fed a JD or research)."""
+    parts = [original_text, current_text]
+    if agent_type not in NO_ASSERTION_AGENTS: parts.append(user_assertions(message))
+    return "\n".join(parts)
+
+# Global verifier
+verifier = HallucinationVerifier(SkillIndex(config.SKILL_TAXONOMY_PATH), check_numbers=config.VERIFIER_CHECK_NUMBERS)
@@ -0,0 +1,70 @@
+import time
+import threading
+import importlib
+
+from metrics import metrics
+
+
+def _import(module_name):
+    return lambda: importlib.import_module(module_name)
+
+def _component_steps():
+    # Imported here so that importing warmup stays free
+    import firebase_utils, agents, tools
+    return [
+        ("crewai", _import("crewai")),
+        ("firestore", firebase_utils.get_client),
+        ("llm_clients", lambda: (agents.get_llm(), agents.get_router_llm(), agents.get_synthesizer_llm())),
+        ("web_search", lambda: (tools.get_search_client(), tools.get_web_search_tool())),
+        ("document_parsers", lambda: (_import("pypdf")(), _import("docx")())),
+    ]
+
+
+class Warmup:
+    """Initializes lazily-loaded clients and heavy imports in a background thread.
+
+    Components that failed (a transient Firestore or Tavily error, say) are retried on the next
+    start() once a backoff has passed; /ready calls start(), so readiness recovers on its own."""
+
+    def __init__(self, retry_seconds=5.0, max_retry_seconds=300.0):
+        self.state = "idle"   # idle -> warming -> ready | degraded (-> warming again on retry)
+        self.components = {}
+        self.retry_seconds, self.max_retry_seconds = retry_seconds, max_retry_seconds
+        self.attempts = 0
+        self._next_retry = 0.0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start warming in the background; no-op while warming, once ready, or during a retry backoff."""
+        with self._lock:
+            if self.state in ("warming", "ready"): return
+            if self.state == "degraded" and time.monotonic() < self._next_retry: return
+            self.state = "warming"
+            self.attempts += 1
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        for name, step in _component_steps():
+            if self.components.get(name, {}).get("ready"): continue
+            start = time.perf_counter()
+            try:
+                step()
+                self.components[name] = {"ready": True, "seconds": round(time.perf_counter() - start, 3)}
+            except Exception as e:
+                self.components[name] = {"ready": False, "error": str(e)[:200]}
+            metrics.observe(f"warmup.{name}.seconds", time.perf_counter() - start)
+        with self._lock:
+            if all(c["ready"] for c in self.components.values()):
+                self.state = "ready"
+                return
+            self.state = "degraded"
+            self._next_retry = time.monotonic() + min(self.max_retry_seconds, self.retry_seconds * 2 ** (self.attempts - 1))
+        metrics.incr("warmup.degraded")
+
+    def status(self):
+        return {"state": self.state, "components": dict(self.components), "attempts": self.attempts}
+
+# Global warmup tracker
+warmup = Warmup()